@@ -11,8 +11,10 @@ contract VotingRegistry {
     mapping(bytes32 => bool) public committed;
     mapping(bytes32 => uint256) public commitmentBlock;
     mapping(bytes32 => address) public commitmentSender;
+    mapping(bytes32 => uint256) public rootBlock;
     
     event CommitmentStored(bytes32 indexed commitment, uint256 blockNumber, address indexed sender);
+    event RootAnchored(bytes32 indexed root, uint256 leafCount, uint256 blockNumber, address indexed sender);
 
     /**
      * @dev Store a vote commitment on-chain
@@ -22,6 +24,42 @@ contract VotingRegistry {
         require(!committed[c], "Commitment already exists");
         require(c != bytes32(0), "Invalid commitment");
         
+        _store(c);
+    }
+
+    /**
+     * @dev Store several vote commitments in one transaction.
+     * Zero or already stored commitments are skipped instead of reverting,
+     * so one duplicate does not discard the whole batch. Only stored
+     * commitments emit CommitmentStored.
+     * @param cs The commitment hashes
+     */
+    function storeCommitments(bytes32[] calldata cs) external {
+        for (uint256 i = 0; i < cs.length; i++) {
+            bytes32 c = cs[i];
+            if (c == bytes32(0) || committed[c]) {
+                continue;
+            }
+            _store(c);
+        }
+    }
+
+    /**
+     * @dev Anchor the Merkle root of an epoch of commitments.
+     * Inclusion of each commitment is proven off-chain with its Merkle proof.
+     * @param root Merkle root (sorted-pair keccak256 over keccak256(commitment) leaves)
+     * @param leafCount Number of commitments in the epoch
+     */
+    function anchorRoot(bytes32 root, uint256 leafCount) external {
+        require(root != bytes32(0), "Invalid root");
+        require(rootBlock[root] == 0, "Root already anchored");
+
+        rootBlock[root] = block.number;
+
+        emit RootAnchored(root, leafCount, block.number, msg.sender);
+    }
+
+    function _store(bytes32 c) internal {
         committed[c] = true;
         commitmentBlock[c] = block.number;
         commitmentSender[c] = msg.sender;
@@ -52,4 +90,12 @@ contract VotingRegistry {
     function getCommitmentSender(bytes32 c) public view returns (address) {
         return commitmentSender[c];
     }
-}
+
+    /**
+     * @dev Get block number where a Merkle root was anchored (0 if never)
+     * @param root The Merkle root
+     */
+    function getRootBlock(bytes32 root) public view returns (uint256) {
+        return rootBlock[root];
+    }
+}
\ No newline at end of file
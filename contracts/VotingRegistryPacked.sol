@@ -0,0 +1,119 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+/**
+ * @title VotingRegistryPacked
+ * @dev Gas-optimised variant of VotingRegistry with the same ABI.
+ * Each commitment is stored as one packed slot (block number as uint64 and
+ * sender address: 28 bytes), so storing a vote costs one cold SSTORE
+ * instead of three. Existence is derived from a non-zero block number:
+ * a transaction can never be mined in block 0.
+ * Events, errors and view functions match VotingRegistry, so
+ * VOTING_REGISTRY_ABI consumers work against either deployment.
+ */
+contract VotingRegistryPacked {
+    struct Record {
+        uint64 blockNumber;
+        address sender;
+    }
+
+    mapping(bytes32 => Record) private records;
+    mapping(bytes32 => uint256) public rootBlock;
+
+    event CommitmentStored(bytes32 indexed commitment, uint256 blockNumber, address indexed sender);
+    event RootAnchored(bytes32 indexed root, uint256 leafCount, uint256 blockNumber, address indexed sender);
+
+    /**
+     * @dev Store a vote commitment on-chain
+     * @param c The commitment hash (keccak256 of vote data)
+     */
+    function storeCommitment(bytes32 c) public {
+        require(records[c].blockNumber == 0, "Commitment already exists");
+        require(c != bytes32(0), "Invalid commitment");
+
+        _store(c);
+    }
+
+    /**
+     * @dev Store several vote commitments in one transaction.
+     * Zero or already stored commitments are skipped instead of reverting.
+     * @param cs The commitment hashes
+     */
+    function storeCommitments(bytes32[] calldata cs) external {
+        uint256 n = cs.length;
+        for (uint256 i = 0; i < n; ) {
+            bytes32 c = cs[i];
+            if (c != bytes32(0) && records[c].blockNumber == 0) {
+                _store(c);
+            }
+            unchecked { ++i; }
+        }
+    }
+
+    /**
+     * @dev Anchor the Merkle root of an epoch of commitments.
+     * @param root Merkle root (sorted-pair keccak256 over keccak256(commitment) leaves)
+     * @param leafCount Number of commitments in the epoch
+     */
+    function anchorRoot(bytes32 root, uint256 leafCount) external {
+        require(root != bytes32(0), "Invalid root");
+        require(rootBlock[root] == 0, "Root already anchored");
+
+        rootBlock[root] = block.number;
+
+        emit RootAnchored(root, leafCount, block.number, msg.sender);
+    }
+
+    function _store(bytes32 c) internal {
+        // Single SSTORE: both fields share the slot
+        records[c] = Record(uint64(block.number), msg.sender);
+
+        emit CommitmentStored(c, block.number, msg.sender);
+    }
+
+    // Getters kept from VotingRegistry's public mappings
+
+    function committed(bytes32 c) external view returns (bool) {
+        return records[c].blockNumber != 0;
+    }
+
+    function commitmentBlock(bytes32 c) external view returns (uint256) {
+        return records[c].blockNumber;
+    }
+
+    function commitmentSender(bytes32 c) external view returns (address) {
+        return records[c].sender;
+    }
+
+    /**
+     * @dev Check if a commitment exists
+     * @param c The commitment hash to check
+     */
+    function hasCommitment(bytes32 c) public view returns (bool) {
+        return records[c].blockNumber != 0;
+    }
+
+    /**
+     * @dev Get block number where commitment was stored
+     * @param c The commitment hash
+     */
+    function getCommitmentBlock(bytes32 c) public view returns (uint256) {
+        return records[c].blockNumber;
+    }
+
+    /**
+     * @dev Get sender address that submitted commitment
+     * @param c The commitment hash
+     */
+    function getCommitmentSender(bytes32 c) public view returns (address) {
+        return records[c].sender;
+    }
+
+    /**
+     * @dev Get block number where a Merkle root was anchored (0 if never)
+     * @param root The Merkle root
+     */
+    function getRootBlock(bytes32 root) public view returns (uint256) {
+        return rootBlock[root];
+    }
+}
@@ -7,4 +7,5 @@ class EleccionesConfig(AppConfig):
 
     def ready(self):
         # Registrar signals cuando la app esté lista
-        import elecciones.signals
\ No newline at end of file
+        import elecciones.signals
+        import elecciones.checks
\ No newline at end of file
@@ -0,0 +1,93 @@
+"""
+Cached ballot (candidate list) per event.
+
+The ballot of an event does not change while it is open, yet every
+votar_evento page view used to load its Candidatura rows with their Persona
+and build the photo URLs again. At election open thousands of voters load
+the same ballot within a minute.
+
+event_ballot keeps the rendered candidate list in the Django cache under a
+per-event version: 'boleta:<evento>:v' holds the version and
+'boleta:<evento>:<version>' the list. A warm read is two cache lookups and
+no queries. invalidate_ballot bumps the version (after the surrounding
+transaction commits), so readers move to a new key at once and the old
+entry simply expires; nothing is ever deleted. A missing version starts at
+the current time in milliseconds, so it never matches an entry built before
+an eviction.
+
+Invalidation is wired to the Candidatura and Persona signals
+(elecciones.signals) and to asignar_candidatos, whose bulk_create sends no
+signals. With the default in-process cache each process has its own copy;
+set CACHE_REDIS_URL to share it.
+"""
+
+import logging
+import time
+from typing import Dict, List
+from uuid import UUID
+
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+_VERSION_KEY = 'boleta:{}:v'
+_BALLOT_KEY = 'boleta:{}:{}'
+
+
+def _timeout() -> int:
+    from django.conf import settings
+    return getattr(settings, 'BOLETA_CACHE_SEGUNDOS', 3600)
+
+
+def _event_key(evento_id) -> str:
+    # The URL may carry the id with or without dashes
+    return UUID(str(evento_id)).hex
+
+
+def _version(evento_id) -> int:
+    key = _VERSION_KEY.format(_event_key(evento_id))
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def _load(evento_id) -> List[Dict]:
+    from .models import Candidatura
+
+    candidatos = []
+    for c in Candidatura.objects.filter(evento_id=evento_id).select_related('persona'):
+        candidatos.append({
+            'persona': {
+                'id': c.persona.id,
+                'nombre': c.persona.nombre,
+                'foto_display_url': c.persona.foto.url if c.persona.foto else None,
+            }
+        })
+    return candidatos
+
+
+def event_ballot(evento_id) -> List[Dict]:
+    """Candidates of the event as the voting page shows them: [{'persona': {id, nombre, foto_display_url}}]."""
+    key = _BALLOT_KEY.format(_event_key(evento_id), _version(evento_id))
+    candidatos = cache.get(key)
+    if candidatos is None:
+        candidatos = _load(evento_id)
+        cache.set(key, candidatos, _timeout())
+    return candidatos
+
+
+def invalidate_ballot(evento_id) -> None:
+    """Make the next event_ballot(evento_id) rebuild the list, once the current transaction commits."""
+    key = _VERSION_KEY.format(_event_key(evento_id))
+
+    def bump():
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted: any new value works, since it never matches an older entry
+            cache.set(key, int(time.time() * 1000), None)
+
+    transaction.on_commit(bump)
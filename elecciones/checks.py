@@ -0,0 +1,20 @@
+"""
+System checks for combinations of blockchain settings that cannot work.
+"""
+
+from django.conf import settings
+from django.core.checks import Error, register
+
+
+@register()
+def check_tx_replacement_needs_receipt_watcher(app_configs, **kwargs):
+    # Replacement only retargets Voto.tx_hash; if the original transaction is mined first,
+    # the receipt watcher is the only thing that follows it through hashes_anteriores
+    if getattr(settings, 'BLOCKCHAIN_TX_REPLACEMENT', False) and not getattr(settings, 'BLOCKCHAIN_RECEIPT_WATCHER', False):
+        return [Error(
+            'BLOCKCHAIN_TX_REPLACEMENT requires BLOCKCHAIN_RECEIPT_WATCHER.',
+            hint='Set BLOCKCHAIN_RECEIPT_WATCHER=1 (and run Celery beat), or turn replacement off: '
+                 'a vote whose original transaction is mined would stay \'sent\' under the replacement hash.',
+            id='elecciones.E001',
+        )]
+    return []
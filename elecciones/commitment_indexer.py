@@ -0,0 +1,120 @@
+"""
+Local index of the registry's CommitmentStored events.
+
+`sync_commitment_index` pages eth_getLogs from the last checkpoint
+(CheckpointCadena 'commitments') towards the chain head. The block range
+adapts: it halves when the node rejects a query (too many results, timeout)
+and doubles again after successful pages. Each page is written together with
+its checkpoint in one transaction and inserts ignore rows already present, so
+a crash at any point only repeats work on the next run.
+
+Lookups (`lookup_commitment`, `indexed_commitments`) answer from the database
+what verify_commitment_onchain asks the RPC with two calls per commitment.
+"""
+
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = 'commitments'
+
+# Range used by the next eth_getLogs page; shared by all runs in this process
+_current_range: Optional[int] = None
+
+
+def _store_page(logs, to_block):
+    from .models import CheckpointCadena, CommitmentIndexado
+
+    with transaction.atomic():
+        CommitmentIndexado.objects.bulk_create(
+            [
+                CommitmentIndexado(
+                    commitment=log['commitment'].lower(),
+                    block_number=log['block_number'],
+                    sender=log['sender'],
+                    tx_hash=log['tx_hash'],
+                    log_index=log['log_index'],
+                )
+                for log in logs
+            ],
+            ignore_conflicts=True,
+            batch_size=1000,
+        )
+        CheckpointCadena.objects.filter(nombre=CHECKPOINT_NAME).update(ultimo_bloque=to_block)
+
+
+def sync_commitment_index(blockchain, start_block=0, max_range=2000, min_range=1,
+                          max_pages=50, lag=2) -> Dict[str, int]:
+    """
+    Index CommitmentStored events from the checkpoint up to `lag` blocks behind the head.
+
+    Args:
+        blockchain: VotingBlockchain
+        start_block: Contract deployment block, used when no checkpoint exists yet
+        max_range: Largest block range requested in one eth_getLogs call
+        min_range: Below this the node error is raised instead of shrinking further
+        max_pages: eth_getLogs calls per run
+        lag: Blocks kept away from the head
+
+    Returns:
+        Dict with from_block, to_block and indexed (events written)
+    """
+    global _current_range
+    from .models import CheckpointCadena
+
+    head = blockchain.w3.eth.block_number - lag
+    checkpoint, _ = CheckpointCadena.objects.get_or_create(
+        nombre=CHECKPOINT_NAME, defaults={'ultimo_bloque': start_block - 1}
+    )
+    first = checkpoint.ultimo_bloque + 1
+    from_block = first
+    indexed = 0
+    size = min(_current_range or max_range, max_range)
+
+    for _ in range(max_pages):
+        if from_block > head:
+            break
+        to_block = min(from_block + size - 1, head)
+        try:
+            logs = blockchain.get_commitment_logs(from_block, to_block)
+        except Exception as e:
+            if size <= min_range:
+                raise
+            size = max(size // 2, min_range)
+            logger.info(f"eth_getLogs {from_block}-{to_block} rejected ({e}), range now {size} blocks")
+            continue
+
+        _store_page(logs, to_block)
+        indexed += len(logs)
+        from_block = to_block + 1
+        size = min(size * 2, max_range)
+
+    _current_range = size
+    if indexed:
+        logger.info(f"Commitment index: blocks {first}-{from_block - 1}, {indexed} events")
+    return {'from_block': first, 'to_block': from_block - 1, 'indexed': indexed}
+
+
+def lookup_commitment(commitment: str) -> Tuple[bool, Optional[int]]:
+    """Same contract as VotingBlockchain.verify_commitment_onchain, from the local index."""
+    from .models import CommitmentIndexado
+
+    block_number = (
+        CommitmentIndexado.objects.filter(commitment=commitment.lower())
+        .values_list('block_number', flat=True)
+        .first()
+    )
+    return (block_number is not None, block_number)
+
+
+def indexed_commitments(commitments: Iterable[str]) -> Dict[str, int]:
+    """Map commitment -> block number for those of `commitments` already indexed."""
+    from .models import CommitmentIndexado
+
+    wanted = [c.lower() for c in commitments]
+    return dict(
+        CommitmentIndexado.objects.filter(commitment__in=wanted).values_list('commitment', 'block_number')
+    )
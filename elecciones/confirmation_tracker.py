@@ -0,0 +1,167 @@
+"""
+Confirmation-depth tracker.
+
+The receipt watcher (and the synchronous send paths) leave a mined vote at
+'success' as soon as its first receipt is seen. That block can still be
+reorganised away. This tracker follows the chain head and, once a block is
+`depth` blocks deep, checks the transactions recorded in it against the
+canonical chain:
+
+    still in the canonical block     'success' -> 'confirmed'   (one UPDATE)
+    mined again in another block     block_number updated, confirmed later
+    back in the node's mempool       'success' -> 'sent'        (receipt watcher)
+    unknown to the node (dropped)    re-queued:
+        commitment votes             -> 'pending' (resubmitted)
+        Merkle epochs and their votes -> 'pending' (anchor_merkle_epochs re-anchors)
+
+Each run reads the lowest `max_blocks` block numbers that still have
+'success' rows through the (onchain_status, block_number) index, so the cost
+of a tick depends on the unconfirmed backlog, never on the size of the Voto
+table. Confirmed rows leave the index range, so no checkpoint is needed.
+Canonical blocks are fetched in one JSON-RPC batch per run.
+"""
+
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(tx_hash: str) -> str:
+    tx_hash = tx_hash.lower()
+    return tx_hash if tx_hash.startswith('0x') else '0x' + tx_hash
+
+
+def _unconfirmed_blocks(safe_block, max_blocks):
+    """Lowest block numbers, up to `safe_block`, that still hold 'success' votes or epochs."""
+    from .models import EpocaMerkle, Voto
+
+    def lowest(queryset):
+        return list(
+            queryset.filter(onchain_status='success', block_number__lte=safe_block)
+            .order_by('block_number')
+            .values_list('block_number', flat=True)
+            .distinct()[:max_blocks]
+        )
+
+    return sorted(set(lowest(Voto.objects)) | set(lowest(EpocaMerkle.objects)))[:max_blocks]
+
+
+def _recorded_transactions(blocks):
+    """(tx hash as stored, block number) of every 'success' vote and epoch in `blocks`."""
+    from .models import EpocaMerkle, Voto
+
+    rows = set(
+        Voto.objects.filter(onchain_status='success', block_number__in=blocks, tx_hash__isnull=False)
+        .values_list('tx_hash', 'block_number')
+        .distinct()
+    )
+    rows.update(
+        EpocaMerkle.objects.filter(onchain_status='success', block_number__in=blocks, tx_hash__isnull=False)
+        .values_list('tx_hash', 'block_number')
+    )
+    return rows
+
+
+def _requeue_dropped(hashes):
+    """
+    Put back in the queue everything recorded under `hashes` (transactions the
+    chain no longer knows). Returns the ids of the commitment votes re-queued.
+    """
+    from .models import CommitmentIndexado, EpocaMerkle, Voto
+
+    epocas = list(
+        EpocaMerkle.objects.filter(tx_hash__in=hashes, onchain_status='success').values_list('id', flat=True)
+    )
+    if epocas:
+        EpocaMerkle.objects.filter(id__in=epocas).update(onchain_status='pending', tx_hash=None, block_number=None)
+        Voto.objects.filter(epoca_merkle_id__in=epocas).update(
+            onchain_status='pending', onchain_status_at=timezone.now(), tx_hash=None, block_number=None,
+            commitment_sender=None,
+        )
+
+    votos = list(
+        Voto.objects.filter(tx_hash__in=hashes, onchain_status='success', epoca_merkle__isnull=True)
+        .values_list('id', flat=True)
+    )
+    if votos:
+        Voto.objects.filter(id__in=votos).update(
+            onchain_status='pending', onchain_status_at=timezone.now(), tx_hash=None, block_number=None,
+            commitment_sender=None,
+        )
+    # The local index copied their CommitmentStored events from the orphaned block
+    CommitmentIndexado.objects.filter(tx_hash__in=hashes).delete()
+
+    logger.warning(
+        f"Confirmation tracker: {len(hashes)} transactions dropped by a reorg, "
+        f"{len(votos)} votes and {len(epocas)} Merkle epochs re-queued"
+    )
+    return votos
+
+
+def confirm_votes_once(blockchain, depth=12, max_blocks=200):
+    """
+    Promote the 'success' votes and Merkle epochs of blocks at least `depth`
+    blocks deep to 'confirmed', at most `max_blocks` blocks per run, and
+    resolve the transactions a reorg removed from those blocks.
+
+    Returns:
+        Dict with safe_block (deepest block considered), blocks (checked),
+        confirmed (votes), moved (transactions re-mined in another block),
+        unmined (transactions back in the mempool) and requeued (ids of the
+        commitment votes put back to 'pending', for the caller to resubmit)
+    """
+    from .models import EpocaMerkle, Voto
+
+    safe_block = blockchain.w3.eth.block_number - depth
+    result = {'safe_block': safe_block, 'blocks': 0, 'confirmed': 0, 'moved': 0, 'unmined': 0, 'requeued': []}
+    blocks = _unconfirmed_blocks(safe_block, max_blocks)
+    if not blocks:
+        return result
+
+    canonical = blockchain.get_block_transactions(blocks)
+    missing = [h for h, n in _recorded_transactions(blocks) if _normalize(h) not in canonical[n]]
+
+    moved, unmined, dropped = {}, [], []
+    for h in missing:
+        location = blockchain.get_transaction_location(h)
+        if location is None:
+            dropped.append(h)
+        elif location['block_number'] is None:
+            unmined.append(h)
+        else:
+            moved[h] = location['block_number']
+
+    with transaction.atomic():
+        for h, block_number in moved.items():
+            # Stays 'success': the new block gets its own depth check
+            Voto.objects.filter(tx_hash=h, onchain_status='success').update(block_number=block_number)
+            EpocaMerkle.objects.filter(tx_hash=h, onchain_status='success').update(block_number=block_number)
+        if unmined:
+            Voto.objects.filter(tx_hash__in=unmined, onchain_status='success').update(
+                onchain_status='sent', onchain_status_at=timezone.now(), block_number=None
+            )
+            EpocaMerkle.objects.filter(tx_hash__in=unmined, onchain_status='success').update(
+                onchain_status='sent', block_number=None
+            )
+        if dropped:
+            result['requeued'] = _requeue_dropped(dropped)
+
+        result['confirmed'] = (
+            Voto.objects.filter(onchain_status='success', block_number__in=blocks)
+            .exclude(tx_hash__in=missing)
+            .update(onchain_status='confirmed', onchain_status_at=timezone.now())
+        )
+        EpocaMerkle.objects.filter(onchain_status='success', block_number__in=blocks).exclude(
+            tx_hash__in=missing
+        ).update(onchain_status='confirmed')
+
+    result.update(blocks=len(blocks), moved=len(moved), unmined=len(unmined))
+    if result['confirmed'] or missing:
+        logger.info(
+            f"Confirmation tracker: blocks {blocks[0]}-{blocks[-1]}, {result['confirmed']} votes confirmed, "
+            f"{len(moved)} moved, {len(unmined)} unmined, {len(dropped)} dropped"
+        )
+    return result
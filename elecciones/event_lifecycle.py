@@ -0,0 +1,110 @@
+"""
+Event lifecycle engine: keeps EventoEleccion.fase in step with the dates.
+
+Events used to be closed lazily: only when a voter opened votar_evento after
+fecha_termino, and every view re-parsed the dates to work out the state of
+each row on every request. Now the phase ('programado' -> 'abierto' ->
+'cerrado') is a column that views read and filter on in SQL, and it changes
+on time:
+
+- advance_phases (Celery beat, every EVENTOS_FASE_INTERVALO_SEGUNDOS) moves
+  every overdue event forward with one UPDATE per transition, through the
+  (fase, fecha_inicio) and (fase, fecha_termino) indexes, and schedules an
+  exact task for each boundary due before its next run;
+- schedule_phase_changes schedules those exact tasks (Celery eta) for one
+  event; it also runs when an event is saved, since its dates may have
+  changed (elecciones.signals);
+- sync_event_phase, run by the exact tasks, recomputes one event's phase
+  from its current dates, so a task left over from older dates is harmless.
+
+The beat pass is the safety net: if the broker or the eta task is lost, the
+phase still changes within one interval. EventoEleccion.save recomputes the
+phase itself when the dates are edited. `activo` remains the administrator's
+manual switch and is not touched here.
+"""
+
+import logging
+from datetime import timedelta
+from typing import Dict
+
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def _interval() -> int:
+    from django.conf import settings
+    return getattr(settings, 'EVENTOS_FASE_INTERVALO_SEGUNDOS', 30)
+
+
+def advance_phases(now=None) -> Dict[str, int]:
+    """
+    Open the scheduled events whose start has passed and close the ones whose
+    end has passed. Returns the number of events opened and closed.
+    """
+    from .models import EventoEleccion
+
+    now = now or timezone.now()
+    with transaction.atomic():
+        closed = EventoEleccion.objects.filter(
+            fase__in=[EventoEleccion.FASE_PROGRAMADO, EventoEleccion.FASE_ABIERTO], fecha_termino__lte=now
+        ).update(fase=EventoEleccion.FASE_CERRADO, updated_at=now)
+        opened = EventoEleccion.objects.filter(
+            fase=EventoEleccion.FASE_PROGRAMADO, fecha_inicio__lte=now
+        ).update(fase=EventoEleccion.FASE_ABIERTO, updated_at=now)
+    if opened or closed:
+        logger.info(f"Event phases: {opened} opened, {closed} closed")
+    return {'opened': opened, 'closed': closed}
+
+
+def sync_event_phase(evento_id, now=None) -> str:
+    """Set one event's phase from its current dates. Returns the phase (None if the event no longer exists)."""
+    from .models import EventoEleccion
+
+    now = now or timezone.now()
+    fechas = EventoEleccion.objects.filter(id=evento_id).values_list('fecha_inicio', 'fecha_termino').first()
+    if fechas is None:
+        return None
+    fase = EventoEleccion(fecha_inicio=fechas[0], fecha_termino=fechas[1]).calcular_fase(now)
+    if EventoEleccion.objects.filter(id=evento_id).exclude(fase=fase).update(fase=fase, updated_at=now):
+        logger.info(f"Event {evento_id} is now {fase}")
+    return fase
+
+
+def schedule_phase_changes(evento_id, fecha_inicio, fecha_termino, now=None) -> int:
+    """
+    Schedule sync_event_phase at the event's start and end when they fall
+    before the next beat pass (later ones are scheduled by that pass: long
+    eta tasks sit in worker memory and get redelivered by Redis brokers).
+    Returns the number of tasks scheduled.
+    """
+    from .tasks import advance_event_phase
+
+    now = now or timezone.now()
+    horizon = now + timedelta(seconds=2 * _interval())
+    scheduled = 0
+    for boundary in (fecha_inicio, fecha_termino):
+        if boundary and now < boundary <= horizon:
+            try:
+                advance_event_phase.apply_async(args=[str(evento_id)], eta=boundary)
+                scheduled += 1
+            except Exception:
+                # The beat pass changes the phase anyway, at most one interval late
+                logger.exception(f"Could not schedule the phase change of event {evento_id} at {boundary}")
+    return scheduled
+
+
+def schedule_upcoming(now=None) -> int:
+    """Schedule exact phase changes for every event with a start or end before the next beat pass."""
+    from django.db.models import Q
+    from .models import EventoEleccion
+
+    now = now or timezone.now()
+    horizon = now + timedelta(seconds=2 * _interval())
+    eventos = EventoEleccion.objects.filter(
+        Q(fase=EventoEleccion.FASE_PROGRAMADO, fecha_inicio__gt=now, fecha_inicio__lte=horizon)
+        | Q(fase__in=[EventoEleccion.FASE_PROGRAMADO, EventoEleccion.FASE_ABIERTO],
+            fecha_termino__gt=now, fecha_termino__lte=horizon)
+    ).values_list('id', 'fecha_inicio', 'fecha_termino')
+    return sum(schedule_phase_changes(e_id, fi, ft, now) for e_id, fi, ft in eventos)
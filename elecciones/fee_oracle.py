@@ -0,0 +1,174 @@
+"""
+Fee oracle for registry transactions.
+
+Keeps EIP-1559 pricing (next base fee and a percentile of recent priority
+fees from eth_feeHistory) cached for a short TTL and shared by every thread
+that uses the VotingBlockchain client, so sending a vote no longer costs an
+extra gas price RPC. Fees are clamped to configurable ceilings: during a spike
+transactions are still submitted at the ceiling and wait in the mempool
+instead of draining the wallet.
+
+Gas limits come from eth_estimateGas, cached per (contract function, batch
+size) with a safety margin; the caller's static limit is the fallback.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+GWEI = 10 ** 9
+
+
+def _fee_history_unsupported(error: Exception) -> bool:
+    """True if `error` means the node lacks eth_feeHistory or the chain has no base fee."""
+    if isinstance(error, KeyError):
+        # Response without baseFeePerGas
+        return True
+    message = str(error).lower()
+    return any(text in message for text in ('-32601', 'not found', 'not supported', 'does not exist', 'not available'))
+
+
+class FeeOracle:
+    """Cached EIP-1559 fee fields and gas estimates for one Web3 connection."""
+
+    def __init__(self, w3, ttl: float = 5.0, history_blocks: int = 10, priority_percentile: int = 50,
+                 max_fee_wei: Optional[int] = None, max_priority_fee_wei: Optional[int] = None,
+                 min_priority_fee_wei: int = 25 * GWEI, gas_margin: float = 1.25):
+        """
+        Args:
+            w3: Web3 instance
+            ttl: Seconds a fee quote is reused
+            history_blocks: Blocks sampled by eth_feeHistory
+            priority_percentile: Reward percentile used as priority fee
+            max_fee_wei: Ceiling for maxFeePerGas (None = no ceiling)
+            max_priority_fee_wei: Ceiling for maxPriorityFeePerGas (None = no ceiling)
+            min_priority_fee_wei: Floor for the priority fee (Polygon rejects tips under 25 gwei)
+            gas_margin: Multiplier applied to eth_estimateGas results
+        """
+        self.w3 = w3
+        self.ttl = ttl
+        self.history_blocks = history_blocks
+        self.priority_percentile = priority_percentile
+        self.max_fee_wei = max_fee_wei
+        self.max_priority_fee_wei = max_priority_fee_wei
+        self.min_priority_fee_wei = min_priority_fee_wei
+        self.gas_margin = gas_margin
+
+        self._lock = threading.Lock()
+        self._quote: Optional[Dict[str, int]] = None
+        self._quoted_at = 0.0
+        self._eip1559 = True
+        self._gas_cache: Dict[tuple, int] = {}
+        # Chain head as of the last eth_feeHistory quote (None on legacy chains)
+        self.last_block: Optional[int] = None
+
+    def _refresh(self) -> Dict[str, int]:
+        if self._eip1559:
+            try:
+                history = self.w3.eth.fee_history(self.history_blocks, 'latest', [self.priority_percentile])
+                self.last_block = history['oldestBlock'] + len(history['baseFeePerGas']) - 2
+                # Last entry is the base fee of the next block
+                base_fee = history['baseFeePerGas'][-1]
+                rewards = sorted(r[0] for r in history.get('reward', []) if r and r[0])
+                priority = rewards[len(rewards) // 2] if rewards else self.min_priority_fee_wei
+                return self._clamp(base_fee, priority)
+            except Exception as e:
+                if _fee_history_unsupported(e):
+                    # Chain or node without EIP-1559 support: legacy pricing from now on
+                    logger.warning(f"eth_feeHistory unsupported, using legacy gas price: {e}")
+                    self._eip1559 = False
+                else:
+                    # Timeout, 5xx, open circuit...: legacy price for this quote only,
+                    # eth_feeHistory is tried again once it expires (ttl)
+                    logger.warning(f"eth_feeHistory failed, using legacy gas price for this quote: {e}")
+
+        gas_price = self.w3.eth.gas_price
+        if self.max_fee_wei is not None:
+            gas_price = min(gas_price, self.max_fee_wei)
+        return {'gasPrice': gas_price}
+
+    def bump(self, fees: Dict[str, int], percent: float, ceiling: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+        """
+        Fee fields to replace a pending transaction priced at `fees`: each field
+        raised by `percent` (nodes require at least 10%) or to the current quote
+        if that is higher, and limited by `ceiling` (same keys as `fees`).
+        """
+        quote = self.fee_fields()
+        bumped = {}
+        for field, value in fees.items():
+            bumped[field] = max(math.ceil(value * (1 + percent / 100)), quote.get(field, 0))
+            if ceiling is not None and field in ceiling:
+                bumped[field] = min(bumped[field], ceiling[field])
+        if 'maxPriorityFeePerGas' in bumped:
+            bumped['maxPriorityFeePerGas'] = min(bumped['maxPriorityFeePerGas'], bumped['maxFeePerGas'])
+        return bumped
+
+    def _clamp(self, base_fee: int, priority: int) -> Dict[str, int]:
+        priority = max(priority, self.min_priority_fee_wei)
+        if self.max_priority_fee_wei is not None:
+            priority = min(priority, self.max_priority_fee_wei)
+        # Room for the base fee to double before the transaction stops being includable
+        max_fee = 2 * base_fee + priority
+        if self.max_fee_wei is not None:
+            max_fee = min(max_fee, self.max_fee_wei)
+        return {
+            'maxFeePerGas': max_fee,
+            'maxPriorityFeePerGas': min(priority, max_fee),
+        }
+
+    def fee_fields(self) -> Dict[str, int]:
+        """Fee fields for a transaction dict: type-2 fields, or gasPrice on legacy chains."""
+        now = time.monotonic()
+        with self._lock:
+            if self._quote is None or now - self._quoted_at >= self.ttl:
+                self._quote = self._refresh()
+                self._quoted_at = now
+            return dict(self._quote)
+
+    def gas_limit(self, contract_fn, sender: str, default: int, batch_size: int = 1) -> int:
+        """
+        Gas limit for `contract_fn`, estimated once per (function, batch size)
+        and never below `default`, which is also the fallback when estimation
+        fails (e.g. the call would revert). The estimate depends on the data
+        (commitments already stored are skipped), so one taken on a batch with
+        duplicates can be far below what an all-new batch of the same size
+        needs; the static default is the floor that keeps those from running
+        out of gas.
+        """
+        key = (contract_fn.fn_name, batch_size)
+        cached = self._gas_cache.get(key)
+        if cached is not None:
+            return max(cached, default)
+        try:
+            estimate = contract_fn.estimate_gas({'from': sender})
+        except Exception as e:
+            logger.info(f"Gas estimation for {contract_fn.fn_name} failed, using {default}: {e}")
+            return default
+        limit = math.ceil(estimate * self.gas_margin)
+        with self._lock:
+            # Concurrent estimates for the same key: keep the larger one
+            self._gas_cache[key] = max(limit, self._gas_cache.get(key, 0))
+            return max(self._gas_cache[key], default)
+
+
+def fee_options_from_env() -> Dict[str, Any]:
+    """FeeOracle keyword arguments from the BLOCKCHAIN_*_GWEI / BLOCKCHAIN_FEE_TTL_SECONDS variables."""
+    def gwei(name):
+        value = os.getenv(name)
+        return int(float(value) * GWEI) if value else None
+
+    options = {
+        'max_fee_wei': gwei('BLOCKCHAIN_MAX_FEE_GWEI'),
+        'max_priority_fee_wei': gwei('BLOCKCHAIN_MAX_PRIORITY_FEE_GWEI'),
+    }
+    min_priority = gwei('BLOCKCHAIN_MIN_PRIORITY_FEE_GWEI')
+    if min_priority is not None:
+        options['min_priority_fee_wei'] = min_priority
+    if os.getenv('BLOCKCHAIN_FEE_TTL_SECONDS'):
+        options['ttl'] = float(os.getenv('BLOCKCHAIN_FEE_TTL_SECONDS'))
+    return options
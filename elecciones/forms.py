@@ -123,7 +123,7 @@ class LoginForm(forms.Form):
 class EventoEleccionForm(forms.ModelForm):
     class Meta:
         model = EventoEleccion
-        fields = ['nombre', 'fecha_inicio', 'fecha_termino']
+        fields = ['nombre', 'fecha_inicio', 'fecha_termino', 'modo_anclaje']
         widgets = {
             'fecha_inicio': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
             'fecha_termino': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
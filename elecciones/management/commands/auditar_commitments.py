@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from elecciones.commitment_audit import audit_event_commitments
+from elecciones.commitment_indexer import indexed_commitments
+from elecciones.models import EventoEleccion
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el commitment de cada voto de un evento desde la clave del votante y lo compara con el guardado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('evento_id', type=str)
+        parser.add_argument('--procesos', type=int, default=None, help='Procesos de hash (por defecto, uno por núcleo)')
+        parser.add_argument('--trozo', type=int, default=50000, help='Votos por tarea de hash')
+        parser.add_argument('--ventana', type=int, default=200000, help='Votos leídos de la BD por vez')
+        parser.add_argument('--onchain', action='store_true',
+                            help='Comprobar además que los commitments verificados están on-chain')
+        parser.add_argument('--mostrar', type=int, default=20, help='Votos con discrepancia a listar')
+
+    def handle(self, *args, **options):
+        try:
+            evento = EventoEleccion.objects.get(id=options['evento_id'])
+        except EventoEleccion.DoesNotExist:
+            self.stdout.write(self.style.ERROR("Evento no encontrado"))
+            return
+
+        self.stdout.write(f"🔎 Auditando commitments de '{evento.nombre}'...")
+        inicio = time.time()
+        resultado = audit_event_commitments(
+            evento, processes=options['procesos'], window=options['ventana'], chunk_size=options['trozo'],
+        )
+        duracion = time.time() - inicio
+
+        total = resultado['total']
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {resultado['matched']}/{total} commitments coinciden "
+            f"({duracion:.2f}s, {total / duracion if duracion else 0:.0f} votos/s)"
+        ))
+        if resultado['sin_commitment']:
+            self.stdout.write(self.style.WARNING(f"⚠️ {len(resultado['sin_commitment'])} votos sin commitment"))
+        if resultado['sin_clave']:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ {len(resultado['sin_clave'])} votos cuyo votante no tiene clave (no verificables)"
+            ))
+        for voto_id in resultado['mismatched'][:options['mostrar']]:
+            self.stdout.write(self.style.ERROR(f"❌ Voto {voto_id}: el commitment no corresponde a su votante y candidato"))
+        if len(resultado['mismatched']) > options['mostrar']:
+            self.stdout.write(self.style.ERROR(f"... y {len(resultado['mismatched']) - options['mostrar']} más"))
+
+        if options['onchain']:
+            self._verificar_onchain(evento, resultado['matched_commitments'])
+
+    def _verificar_onchain(self, evento, commitments):
+        if evento.modo_anclaje == 'merkle':
+            self.stdout.write(self.style.WARNING(
+                "El evento usa anclaje Merkle: sus votos no tienen commitment individual on-chain"
+            ))
+            return
+
+        # Primero el índice local de eventos; solo lo no indexado va al RPC
+        indexados = set()
+        for i in range(0, len(commitments), 5000):
+            indexados.update(indexed_commitments(commitments[i:i + 5000]))
+        pendientes = [c for c in commitments if c not in indexados]
+
+        faltantes = []
+        if pendientes:
+            from elecciones.web3_utils import get_voting_blockchain
+
+            onchain = get_voting_blockchain().verify_commitments_bulk(pendientes)
+            faltantes = [c for c in pendientes if not onchain[c]['exists']]
+
+        self.stdout.write(self.style.SUCCESS(
+            f"⛓️ {len(commitments) - len(faltantes)}/{len(commitments)} commitments on-chain "
+            f"({len(indexados)} desde el índice local)"
+        ))
+        for c in faltantes[:20]:
+            self.stdout.write(self.style.ERROR(f"❌ Commitment {c} no encontrado on-chain"))
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from elecciones.tasks import resubmit_votes
+from elecciones.vote_sweeper import sweep_votes_once, unsettled_ages
+from elecciones.web3_utils import get_voting_blockchain
+
+
+class Command(BaseCommand):
+    help = 'Concilia con la cadena los votos atascados (pending, sent, failed, simulated) y reenvía los que faltan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gracia', type=int, default=settings.BLOCKCHAIN_SWEEPER_GRACE_SECONDS,
+                            help='Segundos que un voto puede seguir sin resolver antes de revisarlo')
+        parser.add_argument('--max-filas', type=int, default=settings.BLOCKCHAIN_SWEEPER_MAX_ROWS,
+                            help='Votos revisados por estado')
+        parser.add_argument('--solo-sla', action='store_true', help='Solo muestra la antigüedad de los votos sin resolver')
+
+    def handle(self, *args, **options):
+        edades = unsettled_ages()
+        if not edades:
+            self.stdout.write(self.style.SUCCESS("✅ No hay votos sin resolver"))
+        for estado, segundos in edades.items():
+            estilo = self.style.ERROR if segundos > settings.BLOCKCHAIN_VOTE_SLA_SECONDS else self.style.WARNING
+            self.stdout.write(estilo(f"⏱️ Voto '{estado}' más antiguo: {segundos:.0f}s"))
+        if options['solo_sla']:
+            return
+
+        result = sweep_votes_once(get_voting_blockchain(), grace_seconds=options['gracia'],
+                                  max_rows=options['max_filas'])
+        resubmit_votes(result['resubmit'])
+        self.stdout.write(self.style.SUCCESS(
+            f"🧹 {result['scanned']} votos revisados: {result['fixed']} ya estaban on-chain, "
+            f"{len(result['resubmit'])} reenviados, {result['waiting']} siguen en el mempool"
+        ))
@@ -0,0 +1,60 @@
+import secrets
+import time
+
+from django.core.management.base import BaseCommand
+from eth_account import Account
+from web3 import Web3
+
+from elecciones.signing_pool import SigningPool
+from elecciones.simulated_chain import SIMULATED_CHAIN_ID, SIMULATED_REGISTRY_ADDRESS
+from elecciones.web3_utils import VOTING_REGISTRY_ABI
+
+
+class Command(BaseCommand):
+    help = 'Mide firmas por segundo del pool de firma con distintos números de procesos (sin red)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transacciones', type=int, default=2000, help='Transacciones firmadas por medición')
+        parser.add_argument('--procesos', type=str, default='0,1,2,4', help='Tamaños de pool a medir (0 = en línea)')
+        parser.add_argument('--lote', type=int, default=1, help='Commitments por transacción storeCommitments')
+        parser.add_argument('--trozo', type=int, default=16, help='Transacciones por envío a un proceso')
+
+    def handle(self, *args, **options):
+        total = options['transacciones']
+        # Cuenta desechable: el benchmark nunca toca claves reales
+        account = Account.create()
+        contract = Web3().eth.contract(address=SIMULATED_REGISTRY_ADDRESS, abi=VOTING_REGISTRY_ABI)
+
+        txs = []
+        for nonce in range(total):
+            commitments = ['0x' + secrets.token_hex(32) for _ in range(options['lote'])]
+            txs.append((account.address, {
+                'to': contract.address,
+                'data': contract.encode_abi('storeCommitments', args=[commitments]),
+                'value': 0,
+                'nonce': nonce,
+                'gas': 60000 + 30000 * options['lote'],
+                'maxFeePerGas': 90 * 10 ** 9,
+                'maxPriorityFeePerGas': 30 * 10 ** 9,
+                'chainId': SIMULATED_CHAIN_ID,
+            }))
+
+        self.stdout.write(f"✍️ Firmando {total} transacciones ({options['lote']} commitments c/u)...")
+        base = None
+        for procesos in [int(p) for p in options['procesos'].split(',') if p.strip()]:
+            pool = SigningPool([account.key.hex()], processes=procesos, chunk_size=options['trozo'])
+            try:
+                # Arranque de los procesos fuera de la medición
+                pool.sign_many(txs[:procesos * options['trozo'] or 1])
+                inicio = time.perf_counter()
+                pool.sign_many(txs)
+                duracion = time.perf_counter() - inicio
+            finally:
+                pool.shutdown()
+
+            por_segundo = total / duracion
+            base = base or por_segundo
+            self.stdout.write(
+                f"  procesos={procesos:<3} {por_segundo:9.0f} firmas/s  "
+                f"({duracion * 1000 / total:.2f} ms/tx, x{por_segundo / base:.2f})"
+            )
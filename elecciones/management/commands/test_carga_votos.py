@@ -1,3 +1,4 @@
+import os
 import time
 import random
 import threading
@@ -13,9 +14,33 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('evento_id', type=str, help='b5d0c85c9df04728abe06ae354f67011')
+        # Cadena simulada en proceso: ejercita el flujo real de envío sin testnet
+        parser.add_argument('--simulado', action='store_true', help='Usa la blockchain simulada en memoria')
+        parser.add_argument('--tiempo-bloque', type=float, default=2.0, help='Segundos por bloque (simulado)')
+        parser.add_argument('--latencia-ms', type=float, default=50.0, help='Latencia RPC media en ms (simulado)')
+        parser.add_argument('--jitter-ms', type=float, default=20.0, help='Variación de latencia en ms (simulado)')
+        parser.add_argument('--tasa-fallos', type=float, default=0.0, help='Probabilidad de fallo por petición RPC (simulado)')
 
     def handle(self, *args, **options):
         evento_id = options['evento_id']
+
+        if options['simulado']:
+            from elecciones.simulated_chain import reset_simulated_chain
+            from elecciones.web3_utils import reset_voting_blockchain
+
+            os.environ.update({
+                'BLOCKCHAIN_BACKEND': 'simulated',
+                'SIMULATED_BLOCK_TIME': str(options['tiempo_bloque']),
+                'SIMULATED_LATENCY_MS': str(options['latencia_ms']),
+                'SIMULATED_JITTER_MS': str(options['jitter_ms']),
+                'SIMULATED_FAILURE_RATE': str(options['tasa_fallos']),
+            })
+            reset_simulated_chain()
+            reset_voting_blockchain()
+            self.stdout.write(self.style.WARNING(
+                f"🧪 Blockchain simulada: bloque cada {options['tiempo_bloque']}s, "
+                f"latencia {options['latencia_ms']}±{options['jitter_ms']}ms, fallos {options['tasa_fallos']:.0%}"
+            ))
         
         # 1. Validar Evento
         try:
@@ -52,6 +77,12 @@ class Command(BaseCommand):
             )
             
             # --- ZONA DE RESETEO (CRUCIAL) ---
+            # 0. Clave única por bot: el commitment se deriva de ella y el contrato rechaza duplicados
+            clave_bot = f"bot-{i+1}"
+            if p.clave != clave_bot:
+                p.clave = clave_bot
+                p.save(update_fields=['clave'])
+
             # 1. Eliminar voto previo si existe
             Voto.objects.filter(persona_votante=p, evento=evento).delete()
             
@@ -67,7 +98,7 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS(f"✅ 100 Bots listos, invitados y reseteados."))
 
         # 4. DEFINIR EL ATAQUE
-        resultados = {'exito': 0, 'error': 0, 'tiempos': []}
+        resultados = {'exito': 0, 'error': 0, 'tiempos': [], 'consultas': []}
         lock = threading.Lock()
 
         def disparar_voto(votante):
@@ -85,13 +116,17 @@ class Command(BaseCommand):
                 candidato_elegido = random.choice(candidatos_ids)
 
                 # C) POST (Con la URL corregida con GUION MEDIO)
+                # Las consultas de la vista se cuentan en la conexión de este hilo
                 url = f'/votar-evento/{evento_id}/'
-                response = c.post(url, {'candidato': str(candidato_elegido)})
+                consultas = []
+                with connection.execute_wrapper(lambda execute, *a: consultas.append(1) or execute(*a)):
+                    response = c.post(url, {'candidato': str(candidato_elegido)})
 
                 duration = time.time() - start_time
 
                 with lock:
                     resultados['tiempos'].append(duration)
+                    resultados['consultas'].append(len(consultas))
                     
                     # Detectar URL de destino en caso de redirección
                     if hasattr(response, 'url'):
@@ -143,4 +178,9 @@ class Command(BaseCommand):
         
         if resultados['tiempos']:
             avg = sum(resultados['tiempos']) / len(resultados['tiempos'])
-            self.stdout.write(f"Latencia promedio: {avg:.2f} segundos")
\ No newline at end of file
+            self.stdout.write(f"Latencia promedio: {avg:.2f} segundos")
+            tiempos = sorted(resultados['tiempos'])
+            p99 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.99))]
+            self.stdout.write(f"Latencia p99: {p99:.2f} segundos")
+            consultas = resultados['consultas']
+            self.stdout.write(f"Consultas SQL por voto: {sum(consultas) / len(consultas):.1f} (máx. {max(consultas)})")
\ No newline at end of file
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from elecciones.models import EventoEleccion, Voto
+from elecciones.web3_utils import get_voting_blockchain
+
+
+class Command(BaseCommand):
+    help = 'Verifica on-chain los commitments de todos los votos de un evento usando peticiones JSON-RPC en lote'
+
+    def add_arguments(self, parser):
+        parser.add_argument('evento_id', type=str)
+        parser.add_argument('--lote', type=int, default=200, help='Commitments por petición JSON-RPC')
+        parser.add_argument('--hilos', type=int, default=4, help='Peticiones en paralelo')
+
+    def handle(self, *args, **options):
+        try:
+            evento = EventoEleccion.objects.get(id=options['evento_id'])
+        except EventoEleccion.DoesNotExist:
+            self.stdout.write(self.style.ERROR("Evento no encontrado"))
+            return
+
+        if evento.modo_anclaje == 'merkle':
+            self.stdout.write(self.style.WARNING(
+                "El evento usa anclaje Merkle: sus votos no tienen commitment individual on-chain"
+            ))
+            return
+
+        votos = list(
+            Voto.objects.filter(evento=evento, commitment__isnull=False)
+            .values_list('id', 'commitment', 'block_number')
+        )
+        self.stdout.write(f"🔎 Verificando {len(votos)} votos de '{evento.nombre}'...")
+
+        inicio = time.time()
+        blockchain = get_voting_blockchain()
+        onchain = blockchain.verify_commitments_bulk(
+            [c for _, c, _ in votos], chunk_size=options['lote'], parallelism=options['hilos']
+        )
+        duracion = time.time() - inicio
+
+        faltantes = [voto_id for voto_id, c, _ in votos if not onchain[c]['exists']]
+        bloque_distinto = [
+            voto_id for voto_id, c, bloque in votos
+            if onchain[c]['exists'] and bloque and bloque != onchain[c]['block_number']
+        ]
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {len(votos) - len(faltantes)}/{len(votos)} commitments encontrados on-chain en {duracion:.2f}s"
+        ))
+        if bloque_distinto:
+            self.stdout.write(self.style.WARNING(f"⚠️ {len(bloque_distinto)} votos con bloque distinto al registrado en BD"))
+        for voto_id in faltantes:
+            self.stdout.write(self.style.ERROR(f"❌ Voto {voto_id}: commitment no encontrado on-chain"))
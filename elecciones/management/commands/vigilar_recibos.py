@@ -0,0 +1,46 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from elecciones.receipt_watcher import watch_receipts_once
+from elecciones.web3_utils import get_voting_blockchain, reset_voting_blockchain_on_error
+
+
+class Command(BaseCommand):
+    help = 'Sigue los bloques nuevos y resuelve en lote los recibos de los votos enviados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--intervalo', type=float, default=2.0, help='Segundos entre consultas de bloques nuevos')
+        parser.add_argument('--una-vez', action='store_true', help='Procesa los bloques pendientes y termina')
+
+    def handle(self, *args, **options):
+        intervalo = options['intervalo']
+        self.stdout.write(self.style.SUCCESS("👀 Vigilante de recibos iniciado"))
+
+        while True:
+            blockchain = None
+            try:
+                blockchain = get_voting_blockchain()
+                result = watch_receipts_once(
+                    blockchain,
+                    max_blocks=settings.BLOCKCHAIN_WATCHER_MAX_BLOCKS,
+                    lookback=settings.BLOCKCHAIN_WATCHER_LOOKBACK_BLOCKS,
+                    lag=settings.BLOCKCHAIN_WATCHER_LAG_BLOCKS,
+                )
+                if result['resolved']:
+                    self.stdout.write(
+                        f"Bloques {result['from_block']}-{result['to_block']}: "
+                        f"{result['resolved']} votos resueltos"
+                    )
+                # Still catching up: go straight to the next range
+                atrasado = result['to_block'] - result['from_block'] + 1 >= settings.BLOCKCHAIN_WATCHER_MAX_BLOCKS
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"Error en el vigilante: {e}"))
+                reset_voting_blockchain_on_error(blockchain, e)
+                atrasado = False
+
+            if options['una_vez']:
+                return
+            if not atrasado:
+                time.sleep(intervalo)
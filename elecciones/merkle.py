@@ -0,0 +1,78 @@
+"""
+Merkle trees over vote commitments for root anchoring.
+
+Hashing rules (compatible with OpenZeppelin's MerkleProof.verify):
+    leaf   = keccak256(commitment_bytes32)
+    parent = keccak256(min(a, b) || max(a, b))   (sorted pair, so proofs need no left/right flags)
+An odd node at the end of a level is promoted unchanged to the next level.
+
+Any voter can check inclusion offline with `verify_proof(commitment, proof, root)`.
+"""
+
+from typing import List
+from eth_utils import keccak
+
+
+def _to_bytes32(value: str) -> bytes:
+    raw = bytes.fromhex(value[2:] if value.startswith('0x') else value)
+    if len(raw) != 32:
+        raise ValueError(f"Expected 32-byte hex value, got {len(raw)} bytes")
+    return raw
+
+
+def leaf_hash(commitment: str) -> bytes:
+    """Leaf for a 0x-prefixed commitment."""
+    return keccak(_to_bytes32(commitment))
+
+
+def _hash_pair(a: bytes, b: bytes) -> bytes:
+    return keccak(a + b) if a <= b else keccak(b + a)
+
+
+class MerkleTree:
+    """
+    Merkle tree over one epoch of commitments.
+    Memory is proportional to the epoch size, not to the event size.
+    """
+
+    def __init__(self, commitments: List[str]):
+        if not commitments:
+            raise ValueError("Cannot build a Merkle tree without leaves")
+
+        level = [leaf_hash(c) for c in commitments]
+        self.levels = [level]
+        while len(level) > 1:
+            nxt = [_hash_pair(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+            if len(level) % 2:
+                nxt.append(level[-1])
+            self.levels.append(nxt)
+            level = nxt
+
+    @property
+    def root(self) -> str:
+        """0x-prefixed root hash."""
+        return '0x' + self.levels[-1][0].hex()
+
+    def __len__(self) -> int:
+        return len(self.levels[0])
+
+    def proof(self, index: int) -> List[str]:
+        """Sibling hashes (0x-prefixed) from leaf `index` up to the root."""
+        if not 0 <= index < len(self):
+            raise IndexError(f"Leaf index {index} out of range")
+
+        proof = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                proof.append('0x' + level[sibling].hex())
+            index //= 2
+        return proof
+
+
+def verify_proof(commitment: str, proof: List[str], root: str) -> bool:
+    """Check that `commitment` is included under `root` using `proof`."""
+    node = leaf_hash(commitment)
+    for sibling in proof:
+        node = _hash_pair(node, _to_bytes32(sibling))
+    return node == _to_bytes32(root)
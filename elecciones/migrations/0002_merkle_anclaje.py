@@ -0,0 +1,52 @@
+# Generated by Django 5.1 on 2026-10-18 09:33
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elecciones', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventoeleccion',
+            name='modo_anclaje',
+            field=models.CharField(choices=[('commitment', 'Commitment por voto'), ('merkle', 'Raíz Merkle por época')], default='commitment', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='voto',
+            name='merkle_indice',
+            field=models.PositiveIntegerField(blank=True, help_text='Posición de la hoja en la época', null=True),
+        ),
+        migrations.AddField(
+            model_name='voto',
+            name='merkle_prueba',
+            field=models.JSONField(blank=True, help_text='Hashes hermanos (hex) desde la hoja hasta la raíz', null=True),
+        ),
+        migrations.CreateModel(
+            name='EpocaMerkle',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('numero', models.PositiveIntegerField()),
+                ('raiz', models.CharField(help_text='Raíz Merkle (keccak256) de los commitments de la época', max_length=66)),
+                ('total_hojas', models.PositiveIntegerField()),
+                ('tx_hash', models.CharField(blank=True, help_text='Transacción anchorRoot', max_length=66, null=True)),
+                ('block_number', models.BigIntegerField(blank=True, null=True)),
+                ('onchain_status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('success', 'Success'), ('exists', 'Exists'), ('confirmed', 'Confirmed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('evento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='epocas_merkle', to='elecciones.eventoeleccion')),
+            ],
+            options={
+                'unique_together': {('evento', 'numero')},
+            },
+        ),
+        migrations.AddField(
+            model_name='voto',
+            name='epoca_merkle',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='votos', to='elecciones.epocamerkle'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1 on 2026-10-18 09:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elecciones', '0002_merkle_anclaje'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckpointCadena',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50, unique=True)),
+                ('ultimo_bloque', models.BigIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='voto',
+            name='tx_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='Transaction hash on blockchain', max_length=66, null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1 on 2026-10-18 09:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elecciones', '0003_vigilante_recibos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommitmentIndexado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('commitment', models.CharField(max_length=66, unique=True)),
+                ('block_number', models.BigIntegerField(db_index=True)),
+                ('sender', models.CharField(max_length=42)),
+                ('tx_hash', models.CharField(max_length=66)),
+                ('log_index', models.PositiveIntegerField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1 on 2026-10-18 09:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elecciones', '0004_indice_commitments'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransaccionEnviada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tx_hash', models.CharField(help_text='Hash vigente (el último reemplazo)', max_length=66, unique=True)),
+                ('hashes_anteriores', models.JSONField(blank=True, default=list, help_text='Hashes reemplazados, del más antiguo al más reciente')),
+                ('remitente', models.CharField(max_length=42)),
+                ('nonce', models.BigIntegerField()),
+                ('destino', models.CharField(max_length=42)),
+                ('datos', models.TextField(help_text='Calldata (hex)')),
+                ('gas', models.BigIntegerField()),
+                ('tarifas', models.JSONField()),
+                ('tarifas_iniciales', models.JSONField()),
+                ('bloque_envio', models.BigIntegerField(blank=True, help_text='Cabeza de la cadena al enviar el hash vigente', null=True)),
+                ('reemplazos', models.PositiveIntegerField(default=0)),
+                ('estado', models.CharField(choices=[('pending', 'Pending'), ('mined', 'Mined'), ('capped', 'Fee cap reached')], db_index=True, default='pending', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['remitente', 'nonce'], name='elecciones__remiten_f482a6_idx')],
+            },
+        ),
+    ]
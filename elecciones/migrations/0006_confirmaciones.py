@@ -0,0 +1,17 @@
+# Generated by Django 5.1 on 2026-10-18 10:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elecciones', '0005_reemplazo_transacciones'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='voto',
+            index=models.Index(fields=['onchain_status', 'block_number'], name='elecciones__onchain_a4dab7_idx'),
+        ),
+    ]
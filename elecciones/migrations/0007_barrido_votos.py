@@ -0,0 +1,17 @@
+# Generated by Django 5.1 on 2026-10-18 10:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elecciones', '0006_confirmaciones'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='voto',
+            index=models.Index(fields=['onchain_status', 'time_stamp', 'id'], name='elecciones__onchain_1b32e4_idx'),
+        ),
+    ]
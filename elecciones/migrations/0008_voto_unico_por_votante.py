@@ -0,0 +1,46 @@
+# Generated by Django 5.1 on 2026-10-18 10:10
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def comprobar_votos_duplicados(apps, schema_editor):
+    # Antes de la restricción, dos POST simultáneos del mismo votante podían guardar dos votos.
+    # Los votos emitidos no se borran en una migración: si hay duplicados se aborta y se
+    # listan los pares (votante, evento) para conciliarlos a mano antes de volver a migrar
+    Voto = apps.get_model('elecciones', 'Voto')
+
+    duplicados = list(
+        Voto.objects.filter(persona_votante__isnull=False)
+        .values('persona_votante_id', 'evento_id')
+        .annotate(n=Count('id'))
+        .filter(n__gt=1)
+        .order_by('evento_id', 'persona_votante_id')
+    )
+    if not duplicados:
+        return
+
+    pares = '\n'.join(
+        f"  votante={d['persona_votante_id']} evento={d['evento_id']} votos={d['n']}"
+        for d in duplicados
+    )
+    raise RuntimeError(
+        f"No se puede crear voto_unico_por_votante: {len(duplicados)} votantes tienen más de un "
+        f"voto en el mismo evento. Concílielos manualmente (dejar un voto por par y ajustar "
+        f"Resultado) y vuelva a ejecutar migrate:\n{pares}"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elecciones', '0007_barrido_votos'),
+    ]
+
+    operations = [
+        migrations.RunPython(comprobar_votos_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='voto',
+            constraint=models.UniqueConstraint(fields=('evento', 'persona_votante'), name='voto_unico_por_votante'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1 on 2026-10-18 10:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copiar_resultados(apps, schema_editor):
+    # Los conteos existentes pasan al fragmento 0
+    Resultado = apps.get_model('elecciones', 'Resultado')
+    ResultadoShard = apps.get_model('elecciones', 'ResultadoShard')
+    ResultadoShard.objects.bulk_create(
+        [
+            ResultadoShard(evento_id=evento_id, persona_candidato_id=candidato_id, shard=0, conteo_votos=conteo)
+            for evento_id, candidato_id, conteo in Resultado.objects.values_list(
+                'evento_id', 'persona_candidato_id', 'conteo_votos'
+            ).iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elecciones', '0008_voto_unico_por_votante'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultadoShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('conteo_votos', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('evento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='elecciones.eventoeleccion')),
+                ('persona_candidato', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='elecciones.persona')),
+            ],
+            options={
+                'unique_together': {('evento', 'persona_candidato', 'shard')},
+            },
+        ),
+        migrations.RunPython(copiar_resultados, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1 on 2026-10-18 10:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elecciones', '0009_resultados_shards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarcaRecuento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ultimo_time_stamp', models.DateTimeField(blank=True, null=True)),
+                ('ultimo_voto_id', models.UUIDField(blank=True, null=True)),
+                ('generacion', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='resultado',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='resultado',
+            name='generacion',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterUniqueTogether(
+            name='resultado',
+            unique_together={('evento', 'persona_candidato', 'generacion')},
+        ),
+        migrations.AddIndex(
+            model_name='voto',
+            index=models.Index(fields=['evento', 'time_stamp', 'id'], name='elecciones__evento__194f23_idx'),
+        ),
+        migrations.AddField(
+            model_name='marcarecuento',
+            name='evento',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='marca_recuento', to='elecciones.eventoeleccion'),
+        ),
+    ]
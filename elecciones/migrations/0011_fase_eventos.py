@@ -0,0 +1,36 @@
+# Generated by Django 5.1 on 2026-10-18 10:19
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def calcular_fases(apps, schema_editor):
+    # Fase de los eventos existentes según sus fechas
+    EventoEleccion = apps.get_model('elecciones', 'EventoEleccion')
+    ahora = timezone.now()
+    EventoEleccion.objects.filter(fecha_termino__lte=ahora).update(fase='cerrado')
+    EventoEleccion.objects.filter(fecha_inicio__lte=ahora, fecha_termino__gt=ahora).update(fase='abierto')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elecciones', '0010_recuento_incremental'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventoeleccion',
+            name='fase',
+            field=models.CharField(choices=[('programado', 'Futuro'), ('abierto', 'En curso'), ('cerrado', 'Terminado')], default='programado', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='eventoeleccion',
+            index=models.Index(fields=['fase', 'fecha_inicio'], name='elecciones__fase_81fd42_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventoeleccion',
+            index=models.Index(fields=['fase', 'fecha_termino'], name='elecciones__fase_b7723f_idx'),
+        ),
+        migrations.RunPython(calcular_fases, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1 on 2026-10-18 10:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elecciones', '0011_fase_eventos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SecuenciaEpocas',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ultima_epoca', models.PositiveIntegerField(default=0)),
+                ('evento', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='secuencia_epocas', to='elecciones.eventoeleccion')),
+            ],
+        ),
+    ]
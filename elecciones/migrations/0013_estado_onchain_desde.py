@@ -0,0 +1,31 @@
+# Generated by Django 5.1 on 2026-10-18 10:31
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def desde_emision(apps, schema_editor):
+    # Sin historial de estados, los votos existentes cuentan desde su emisión (como hasta ahora)
+    Voto = apps.get_model('elecciones', 'Voto')
+    Voto.objects.update(onchain_status_at=F('time_stamp'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elecciones', '0012_secuencia_epocas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='voto',
+            name='onchain_status_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(desde_emision, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='voto',
+            index=models.Index(fields=['onchain_status', 'onchain_status_at', 'id'], name='elecciones__onchain_0341c6_idx'),
+        ),
+    ]
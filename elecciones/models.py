@@ -64,6 +64,19 @@ class Administrador(models.Model):
 
 
 class EventoEleccion(models.Model):
+    MODOS_ANCLAJE = [
+        ('commitment', 'Commitment por voto'),
+        ('merkle', 'Raíz Merkle por época'),
+    ]
+    FASE_PROGRAMADO = 'programado'
+    FASE_ABIERTO = 'abierto'
+    FASE_CERRADO = 'cerrado'
+    FASES = [
+        (FASE_PROGRAMADO, 'Futuro'),
+        (FASE_ABIERTO, 'En curso'),
+        (FASE_CERRADO, 'Terminado'),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     nombre = models.CharField(max_length=255)
     fecha_inicio = models.DateTimeField()
@@ -71,18 +84,42 @@ class EventoEleccion(models.Model):
     administrador = models.ForeignKey(Administrador, on_delete=models.CASCADE, null=True, blank=True)
     id_administrador = models.CharField(max_length=36, null=True, blank=True)
     activo = models.BooleanField(default=True)
+    # Cómo se registran los votos on-chain: un commitment por voto o solo la raíz Merkle de cada época
+    modo_anclaje = models.CharField(max_length=20, default='commitment', choices=MODOS_ANCLAJE)
+    # Fase según las fechas, precalculada: la mantiene al día elecciones.event_lifecycle
+    # (Celery beat y tareas programadas a la hora exacta) y las vistas la leen directamente
+    fase = models.CharField(max_length=20, default=FASE_PROGRAMADO, choices=FASES)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # El motor de fases busca los eventos por abrir y por cerrar
+            models.Index(fields=['fase', 'fecha_inicio']),
+            models.Index(fields=['fase', 'fecha_termino']),
+        ]
+
     @property
     def estado(self):
-        ahora = timezone.now()
-        if self.fecha_inicio <= ahora <= self.fecha_termino:
-            return "En curso"
-        elif ahora < self.fecha_inicio:
-            return "Futuro"
-        else:
-            return "Terminado"
+        return self.get_fase_display()
+
+    def calcular_fase(self, ahora=None):
+        ahora = ahora or timezone.now()
+        if ahora >= self.fecha_termino:
+            return self.FASE_CERRADO
+        if ahora >= self.fecha_inicio:
+            return self.FASE_ABIERTO
+        return self.FASE_PROGRAMADO
+
+    def save(self, *args, **kwargs):
+        # Al cambiar las fechas la fase se recalcula en el mismo guardado
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.fase = self.calcular_fase()
+        elif {'fecha_inicio', 'fecha_termino'} & set(update_fields):
+            self.fase = self.calcular_fase()
+            kwargs['update_fields'] = set(update_fields) | {'fase'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.nombre
@@ -115,6 +152,47 @@ class Candidatura(models.Model):
         return f"Candidatura: {self.persona.nombre} en {self.evento.nombre}"
 
 
+ONCHAIN_STATUS_CHOICES = [
+    ('pending', 'Pending'), 
+    ('sent', 'Sent'), 
+    ('success', 'Success'),
+    ('exists', 'Exists'),
+    ('confirmed', 'Confirmed'), 
+    ('failed', 'Failed')
+]
+
+
+class EpocaMerkle(models.Model):
+    """Grupo de votos de un evento cuya raíz Merkle se ancla on-chain en una sola transacción"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    evento = models.ForeignKey(EventoEleccion, on_delete=models.CASCADE, related_name='epocas_merkle')
+    numero = models.PositiveIntegerField()
+    raiz = models.CharField(max_length=66, help_text="Raíz Merkle (keccak256) de los commitments de la época")
+    total_hojas = models.PositiveIntegerField()
+    tx_hash = models.CharField(max_length=66, null=True, blank=True, help_text="Transacción anchorRoot")
+    block_number = models.BigIntegerField(null=True, blank=True)
+    onchain_status = models.CharField(max_length=20, default='pending', choices=ONCHAIN_STATUS_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = (('evento', 'numero'),)
+
+    def __str__(self):
+        return f"Época {self.numero} de {self.evento_id} ({self.total_hojas} votos)"
+
+
+class SecuenciaEpocas(models.Model):
+    """
+    Última época Merkle numerada de un evento. Cerrar una época bloquea esta fila
+    y no la del evento, sobre la que cada INSERT de voto comprueba su clave foránea
+    """
+    evento = models.OneToOneField(EventoEleccion, on_delete=models.CASCADE, related_name='secuencia_epocas')
+    ultima_epoca = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Épocas de {self.evento_id}: {self.ultima_epoca}"
+
+
 class Voto(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     evento = models.ForeignKey(EventoEleccion, on_delete=models.CASCADE)
@@ -125,37 +203,140 @@ class Voto(models.Model):
     
     # Blockchain fields
     commitment = models.CharField(max_length=66, null=True, blank=True, help_text="Keccak256 hash commitment of the vote")
-    tx_hash = models.CharField(max_length=66, null=True, blank=True, help_text="Transaction hash on blockchain")
+    tx_hash = models.CharField(max_length=66, null=True, blank=True, db_index=True, help_text="Transaction hash on blockchain")
     # Address that submitted the commitment (if available)
     commitment_sender = models.CharField(max_length=42, null=True, blank=True, help_text="Address that submitted the commitment on-chain")
     block_number = models.BigIntegerField(null=True, blank=True, help_text="Block number where commitment was stored")
     onchain_status = models.CharField(
         max_length=20,
         default='pending',
-        choices=[
-            ('pending', 'Pending'), 
-            ('sent', 'Sent'), 
-            ('success', 'Success'),
-            ('exists', 'Exists'),
-            ('confirmed', 'Confirmed'), 
-            ('failed', 'Failed')
-        ],
+        choices=ONCHAIN_STATUS_CHOICES,
         help_text="Status of blockchain submission"
     )
+    # Cuándo cambió onchain_status (o se reenvió la transacción) por última vez: el barrido
+    # de conciliación da el plazo de gracia desde aquí y no desde la emisión del voto
+    onchain_status_at = models.DateTimeField(default=timezone.now)
+
+    # Modo Merkle: época cuya raíz contiene este voto y prueba de inclusión
+    epoca_merkle = models.ForeignKey(EpocaMerkle, on_delete=models.SET_NULL, null=True, blank=True, related_name='votos')
+    merkle_indice = models.PositiveIntegerField(null=True, blank=True, help_text="Posición de la hoja en la época")
+    merkle_prueba = models.JSONField(null=True, blank=True, help_text="Hashes hermanos (hex) desde la hoja hasta la raíz")
+
+    class Meta:
+        indexes = [
+            # El seguidor de confirmaciones recorre los votos 'success' por bloque
+            models.Index(fields=['onchain_status', 'block_number']),
+            # Indicador de SLA: el voto más antiguo de cada estado
+            models.Index(fields=['onchain_status', 'time_stamp', 'id']),
+            # El barrido de conciliación recorre cada estado por tiempo en él (paginación por clave)
+            models.Index(fields=['onchain_status', 'onchain_status_at', 'id']),
+            # El recuento incremental lee los votos de un evento posteriores a su marca
+            models.Index(fields=['evento', 'time_stamp', 'id']),
+        ]
+        constraints = [
+            # Un voto por votante y evento, garantizado por la BD aunque lleguen dos POST a la vez
+            models.UniqueConstraint(fields=['evento', 'persona_votante'], name='voto_unico_por_votante'),
+        ]
 
     def __str__(self):
         return f"Voto {self.id} -> {self.persona_candidato.nombre}"
 
 
+class CheckpointCadena(models.Model):
+    """Último bloque procesado por un lector de la cadena (p. ej. el vigilante de recibos)"""
+    nombre = models.CharField(max_length=50, unique=True)
+    ultimo_bloque = models.BigIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.nombre} @ {self.ultimo_bloque}"
+
+
+class CommitmentIndexado(models.Model):
+    """Copia local de los eventos CommitmentStored del contrato, sincronizada desde eth_getLogs"""
+    commitment = models.CharField(max_length=66, unique=True)
+    block_number = models.BigIntegerField(db_index=True)
+    sender = models.CharField(max_length=42)
+    tx_hash = models.CharField(max_length=66)
+    log_index = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.commitment[:10]}... @ {self.block_number}"
+
+
+class TransaccionEnviada(models.Model):
+    """Transacción firmada por un monedero del servidor, con lo necesario para reemplazarla si se atasca"""
+    ESTADOS = [
+        ('pending', 'Pending'),
+        ('mined', 'Mined'),
+        ('capped', 'Fee cap reached'),
+    ]
+    tx_hash = models.CharField(max_length=66, unique=True, help_text="Hash vigente (el último reemplazo)")
+    hashes_anteriores = models.JSONField(default=list, blank=True, help_text="Hashes reemplazados, del más antiguo al más reciente")
+    remitente = models.CharField(max_length=42)
+    nonce = models.BigIntegerField()
+    destino = models.CharField(max_length=42)
+    datos = models.TextField(help_text="Calldata (hex)")
+    gas = models.BigIntegerField()
+    # Precio actual y precio del primer envío (tope de escalado); mismas claves que la transacción
+    tarifas = models.JSONField()
+    tarifas_iniciales = models.JSONField()
+    bloque_envio = models.BigIntegerField(null=True, blank=True, help_text="Cabeza de la cadena al enviar el hash vigente")
+    reemplazos = models.PositiveIntegerField(default=0)
+    estado = models.CharField(max_length=20, default='pending', choices=ESTADOS, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['remitente', 'nonce'])]
+
+    def __str__(self):
+        return f"{self.remitente[:10]}... nonce {self.nonce} ({self.estado})"
+
+
 class Resultado(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     evento = models.ForeignKey(EventoEleccion, on_delete=models.CASCADE)
     persona_candidato = models.ForeignKey(Persona, on_delete=models.CASCADE)
     conteo_votos = models.IntegerField(default=0)
+    # Recuento al que pertenece la fila: el vigente es MarcaRecuento.generacion del evento
+    generacion = models.PositiveIntegerField(default=0)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        unique_together = (('evento', 'persona_candidato'),)
+        unique_together = (('evento', 'persona_candidato', 'generacion'),)
 
     def __str__(self):
         return f"Resultado: {self.persona_candidato.nombre} ({self.conteo_votos})"
+
+
+class ResultadoShard(models.Model):
+    """
+    Conteo parcial de votos de un candidato. Cada voto suma en una fila al azar
+    de RESULTADOS_SHARDS, así los votos simultáneos a un mismo candidato no
+    esperan por la misma fila; el total es la suma de sus fragmentos
+    (ver elecciones.tally). Resultado guarda el recuento desde Voto.
+    """
+    evento = models.ForeignKey(EventoEleccion, on_delete=models.CASCADE)
+    persona_candidato = models.ForeignKey(Persona, on_delete=models.CASCADE)
+    shard = models.PositiveSmallIntegerField()
+    conteo_votos = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        unique_together = (('evento', 'persona_candidato', 'shard'),)
+
+    def __str__(self):
+        return f"Shard {self.shard} de {self.persona_candidato_id} ({self.conteo_votos})"
+
+
+class MarcaRecuento(models.Model):
+    """Hasta qué voto (time_stamp, id) de un evento está contado en Resultado, y qué generación es la vigente"""
+    evento = models.OneToOneField(EventoEleccion, on_delete=models.CASCADE, related_name='marca_recuento')
+    ultimo_time_stamp = models.DateTimeField(null=True, blank=True)
+    ultimo_voto_id = models.UUIDField(null=True, blank=True)
+    generacion = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Recuento de {self.evento_id} hasta {self.ultimo_time_stamp} (generación {self.generacion})"
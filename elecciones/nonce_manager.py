@@ -0,0 +1,274 @@
+"""
+Process-wide nonce allocator for the server wallet(s).
+Every process that signs with the same wallet (web workers, Celery workers)
+shares the nonce sequence through Redis, so concurrent submissions never
+reuse a nonce and many transactions can be in flight at once.
+"""
+
+import logging
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+# KEYS: next, free, reserved | ARGV: now, chain_pending (-1 if unknown)
+# Returns the allocated nonce, or -1 when the counter must be seeded from chain.
+_ALLOCATE_LUA = """
+local popped = redis.call('ZPOPMIN', KEYS[2])
+local nonce
+if popped[1] then
+    nonce = tonumber(popped[1])
+else
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        if tonumber(ARGV[2]) < 0 then
+            return -1
+        end
+        redis.call('SET', KEYS[1], ARGV[2])
+    end
+    nonce = redis.call('INCR', KEYS[1]) - 1
+end
+redis.call('ZADD', KEYS[3], ARGV[1], nonce)
+return nonce
+"""
+
+# KEYS: next, free, reserved, sent | ARGV: chain_pending, stale_before
+# Drops bookkeeping below the chain's pending count, moves the counter forward
+# if another signer used the wallet, and frees the first nonce the chain is
+# waiting for when nobody holds it (a dropped or abandoned transaction).
+# Returns {next, gap_filled (0/1)}.
+_RESYNC_LUA = """
+local pending = tonumber(ARGV[1])
+local stale_before = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', '(' .. pending)
+for _, key in ipairs({KEYS[3], KEYS[4]}) do
+    for _, member in ipairs(redis.call('ZRANGE', key, 0, -1)) do
+        if tonumber(member) < pending then
+            redis.call('ZREM', key, member)
+        end
+    end
+end
+local nxt = tonumber(redis.call('GET', KEYS[1]) or '-1')
+if nxt < pending then
+    redis.call('SET', KEYS[1], pending)
+    nxt = pending
+end
+local filled = 0
+if pending < nxt and not redis.call('ZSCORE', KEYS[2], pending) then
+    local reserved_at = redis.call('ZSCORE', KEYS[3], pending)
+    local sent_at = redis.call('ZSCORE', KEYS[4], pending)
+    local held = (reserved_at and tonumber(reserved_at) >= stale_before)
+        or (sent_at and tonumber(sent_at) >= stale_before)
+    if not held then
+        redis.call('ZREM', KEYS[3], pending)
+        redis.call('ZREM', KEYS[4], pending)
+        redis.call('ZADD', KEYS[2], pending, pending)
+        filled = 1
+    end
+end
+return {nxt, filled}
+"""
+
+
+class NonceManager:
+    """
+    Redis-backed nonce allocator for a single wallet.
+
+    Keys (prefix ``votacion:nonce:<chain_id>:<address>``):
+        next      next nonce never handed out
+        free      ZSET of nonces to reuse first (released or dropped)
+        reserved  ZSET nonce -> time it was handed out (not yet broadcast)
+        sent      ZSET nonce -> time it was broadcast (not yet counted by the chain)
+    """
+
+    def __init__(self, redis_client, address: str, w3, chain_id: int, stale_after: int = 120):
+        """
+        Args:
+            redis_client: redis.Redis instance shared by all signers
+            address: Wallet address whose nonces are managed
+            w3: Web3 instance used to read the chain's pending transaction count
+            chain_id: Chain id, part of the key prefix
+            stale_after: Seconds after which a reserved/sent nonce the chain
+                still has not seen is considered dropped
+        """
+        self.redis = redis_client
+        self.address = address
+        self.w3 = w3
+        self.stale_after = stale_after
+        self._last_resync = 0.0
+
+        prefix = f"votacion:nonce:{chain_id}:{address.lower()}"
+        self._keys = {
+            'next': f"{prefix}:next",
+            'free': f"{prefix}:free",
+            'reserved': f"{prefix}:reserved",
+            'sent': f"{prefix}:sent",
+        }
+        self._allocate = self.redis.register_script(_ALLOCATE_LUA)
+        self._resync = self.redis.register_script(_RESYNC_LUA)
+
+    @classmethod
+    def from_url(cls, redis_url: str, address: str, w3, chain_id: int, **kwargs) -> 'NonceManager':
+        """Build a manager from a redis:// URL."""
+        import redis
+        return cls(redis.Redis.from_url(redis_url), address, w3, chain_id, **kwargs)
+
+    def chain_pending_count(self) -> int:
+        """Transaction count including the node's mempool."""
+        return self.w3.eth.get_transaction_count(self.address, 'pending')
+
+    def allocate(self) -> int:
+        """Hand out the lowest free nonce, or the next consecutive one."""
+        keys = [self._keys['next'], self._keys['free'], self._keys['reserved']]
+        nonce = int(self._allocate(keys=keys, args=[time.time(), -1]))
+        if nonce < 0:
+            # First use of this wallet: seed the counter from the chain
+            nonce = int(self._allocate(keys=keys, args=[time.time(), self.chain_pending_count()]))
+        return nonce
+
+    def mark_sent(self, nonce: int) -> None:
+        """The transaction using `nonce` was accepted by the node."""
+        pipe = self.redis.pipeline()
+        pipe.zrem(self._keys['reserved'], nonce)
+        pipe.zadd(self._keys['sent'], {nonce: time.time()})
+        pipe.execute()
+
+    def release(self, nonce: int) -> None:
+        """The transaction never reached the mempool: reuse `nonce` next."""
+        pipe = self.redis.pipeline()
+        pipe.zrem(self._keys['reserved'], nonce)
+        pipe.zrem(self._keys['sent'], nonce)
+        pipe.zadd(self._keys['free'], {nonce: nonce})
+        pipe.execute()
+
+    def discard(self, nonce: int) -> None:
+        """`nonce` is already used on chain: forget it."""
+        pipe = self.redis.pipeline()
+        pipe.zrem(self._keys['reserved'], nonce)
+        pipe.zrem(self._keys['sent'], nonce)
+        pipe.zrem(self._keys['free'], nonce)
+        pipe.execute()
+
+    def resync(self, chain_pending: Optional[int] = None) -> int:
+        """
+        Reconcile with the chain's pending count and fill a dropped-nonce gap.
+
+        Returns:
+            Number of gaps filled (0 or 1 per call; the next gap, if any,
+            surfaces once the filled nonce is mined)
+        """
+        if chain_pending is None:
+            chain_pending = self.chain_pending_count()
+        keys = [self._keys['next'], self._keys['free'], self._keys['reserved'], self._keys['sent']]
+        nxt, filled = self._resync(keys=keys, args=[chain_pending, time.time() - self.stale_after])
+        self._last_resync = time.time()
+        if filled:
+            logger.warning(f"Nonce gap at {chain_pending} for {self.address}: marked for reuse")
+        return int(filled)
+
+    def maybe_resync(self, interval: float = 30) -> None:
+        """Resync at most once every `interval` seconds in this process."""
+        if time.time() - self._last_resync < interval:
+            return
+        try:
+            self.resync()
+        except Exception as e:
+            logger.warning(f"Nonce resync failed for {self.address}: {e}")
+
+    def handle_send_error(self, nonce: int, error: Exception) -> None:
+        """Return `nonce` to the right state after a failed send and resync."""
+        message = str(error).lower()
+        if 'already known' in message:
+            # Same transaction is already in the mempool
+            self.mark_sent(nonce)
+            return
+        if 'nonce too low' in message:
+            self.discard(nonce)
+        else:
+            self.release(nonce)
+        try:
+            self.resync()
+        except Exception as e:
+            logger.warning(f"Nonce resync failed for {self.address}: {e}")
+
+    def outstanding(self) -> int:
+        """Nonces handed out or broadcast that the chain has not counted yet."""
+        pipe = self.redis.pipeline()
+        pipe.zcard(self._keys['reserved'])
+        pipe.zcard(self._keys['sent'])
+        reserved, sent = pipe.execute()
+        return int(reserved) + int(sent)
+
+
+class LocalNonceManager:
+    """
+    In-process nonce allocator with the NonceManager interface, for a wallet
+    that only this process signs with (e.g. the simulated chain backend).
+    """
+
+    def __init__(self, address: str, w3):
+        self.address = address
+        self.w3 = w3
+        self._lock = threading.Lock()
+        self._next: Optional[int] = None
+        self._free = set()
+        self._outstanding = set()  # Reserved, not yet broadcast
+
+    def chain_pending_count(self) -> int:
+        return self.w3.eth.get_transaction_count(self.address, 'pending')
+
+    def allocate(self) -> int:
+        with self._lock:
+            if self._free:
+                nonce = min(self._free)
+                self._free.discard(nonce)
+            else:
+                if self._next is None:
+                    self._next = self.chain_pending_count()
+                nonce = self._next
+                self._next += 1
+            self._outstanding.add(nonce)
+            return nonce
+
+    def mark_sent(self, nonce: int) -> None:
+        with self._lock:
+            self._outstanding.discard(nonce)
+
+    def release(self, nonce: int) -> None:
+        with self._lock:
+            self._outstanding.discard(nonce)
+            self._free.add(nonce)
+
+    def discard(self, nonce: int) -> None:
+        with self._lock:
+            self._outstanding.discard(nonce)
+            self._free.discard(nonce)
+
+    def resync(self, chain_pending: Optional[int] = None) -> int:
+        if chain_pending is None:
+            chain_pending = self.chain_pending_count()
+        with self._lock:
+            self._free = {n for n in self._free if n >= chain_pending}
+            self._outstanding = {n for n in self._outstanding if n >= chain_pending}
+            if self._next is None or self._next < chain_pending:
+                self._next = chain_pending
+        return 0
+
+    def maybe_resync(self, interval: float = 30) -> None:
+        pass
+
+    def handle_send_error(self, nonce: int, error: Exception) -> None:
+        message = str(error).lower()
+        if 'already known' in message:
+            return
+        if 'nonce too low' in message:
+            self.discard(nonce)
+            self.resync()
+        else:
+            self.release(nonce)
+
+    def outstanding(self) -> int:
+        """Nonces handed out and not yet broadcast (no chain query: called on every send)."""
+        with self._lock:
+            return len(self._outstanding)
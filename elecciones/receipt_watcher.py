@@ -0,0 +1,157 @@
+"""
+Block-driven receipt watcher.
+
+Instead of every submitter polling eth_getTransactionReceipt for its own hash,
+one watcher follows new blocks, fetches their receipts in bulk and resolves
+every outstanding transaction in the block with a single UPDATE:
+
+    Voto         'sent' -> 'success' | 'exists' | 'failed'  (+ block_number)
+    EpocaMerkle  'sent' -> 'success' | 'failed'             (+ block_number)
+
+Progress is stored in CheckpointCadena(nombre='recibos'), so restarts resume
+where the previous run stopped. Run it from Celery beat (tasks.watch_receipts)
+or as a long-lived process (manage.py vigilar_recibos).
+"""
+
+import logging
+
+from django.db import transaction
+from django.db.models import Case, Value, When
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = 'recibos'
+
+
+def _normalize(tx_hash: str) -> str:
+    tx_hash = tx_hash.lower()
+    return tx_hash if tx_hash.startswith('0x') else '0x' + tx_hash
+
+
+def outstanding_transactions():
+    """
+    Map normalized tx hash -> hash as stored in the database, for every
+    transaction that was sent and has no receipt yet. Hashes a fee-bump
+    replacement superseded map to the current one: the original can still be
+    the one that gets mined.
+    """
+    from .models import EpocaMerkle, TransaccionEnviada, Voto
+
+    stored = set(
+        Voto.objects.filter(onchain_status='sent', tx_hash__isnull=False)
+        .values_list('tx_hash', flat=True)
+        .distinct()
+    )
+    stored.update(
+        EpocaMerkle.objects.filter(onchain_status='sent', tx_hash__isnull=False)
+        .values_list('tx_hash', flat=True)
+    )
+    pending = {_normalize(h): h for h in stored}
+    if stored:
+        replaced = TransaccionEnviada.objects.filter(tx_hash__in=stored, reemplazos__gt=0)
+        for current, previous in replaced.values_list('tx_hash', 'hashes_anteriores'):
+            for h in previous:
+                pending[_normalize(h)] = current
+    return pending
+
+
+def _apply_block(block_number, receipts, pending, blockchain):
+    """Write the outcome of `receipts` (all from `block_number`) in one UPDATE per table."""
+    from .models import CheckpointCadena, EpocaMerkle, Voto
+
+    status_whens, block_whens, hash_whens = [], [], []
+    epoca_whens, epoca_hash_whens = [], []
+    hashes = []
+    for receipt in receipts:
+        mined = _normalize(blockchain.w3.to_hex(receipt['transactionHash']))
+        h = pending[mined]
+        hashes.append(h)
+        ok = receipt['status'] == 1
+        estado = 'success' if ok else 'failed'
+
+        epoca_whens.append(When(tx_hash=h, then=Value(estado)))
+        # Merkle votes share their epoch's anchorRoot transaction
+        status_whens.append(When(tx_hash=h, epoca_merkle__isnull=False, then=Value(estado)))
+        block_whens.append(When(tx_hash=h, epoca_merkle__isnull=False, then=Value(block_number)))
+        if ok:
+            # Commitments the contract skipped were already on-chain from an earlier transaction
+            stored = list(blockchain.stored_commitments_from_receipt(receipt))
+            status_whens.append(When(tx_hash=h, commitment__in=stored, then=Value('success')))
+            block_whens.append(When(tx_hash=h, commitment__in=stored, then=Value(block_number)))
+            status_whens.append(When(tx_hash=h, then=Value('exists')))
+            hash_whens.append(When(tx_hash=h, epoca_merkle__isnull=True, commitment__in=stored, then=Value(mined)))
+        else:
+            status_whens.append(When(tx_hash=h, then=Value('failed')))
+            block_whens.append(When(tx_hash=h, then=Value(block_number)))
+            hash_whens.append(When(tx_hash=h, then=Value(mined)))
+        hash_whens.append(When(tx_hash=h, epoca_merkle__isnull=False, then=Value(mined)))
+        epoca_hash_whens.append(When(tx_hash=h, then=Value(mined)))
+
+    with transaction.atomic():
+        checkpoint = CheckpointCadena.objects.select_for_update().get(nombre=CHECKPOINT_NAME)
+        if checkpoint.ultimo_bloque >= block_number:
+            # Another watcher already processed this block
+            return 0
+
+        updated = 0
+        if hashes:
+            # tx_hash goes last: MySQL evaluates SET left to right and the other CASEs read it
+            updated = Voto.objects.filter(tx_hash__in=hashes, onchain_status='sent').update(
+                onchain_status=Case(*status_whens, default=Value('sent')),
+                onchain_status_at=timezone.now(),
+                block_number=Case(*block_whens, default=Value(None)),
+                tx_hash=Case(*hash_whens, default=Value(None)),
+            )
+            EpocaMerkle.objects.filter(tx_hash__in=hashes, onchain_status='sent').update(
+                onchain_status=Case(*epoca_whens, default=Value('sent')),
+                block_number=block_number,
+                tx_hash=Case(*epoca_hash_whens, default=Value(None)),
+            )
+
+        checkpoint.ultimo_bloque = block_number
+        checkpoint.save(update_fields=['ultimo_bloque', 'updated_at'])
+    return updated
+
+
+def watch_receipts_once(blockchain, max_blocks=200, lookback=200, lag=2):
+    """
+    Process the blocks mined since the last checkpoint (at most `max_blocks`).
+    With nothing outstanding the checkpoint just jumps to the chain head.
+    The first run starts `lookback` blocks behind the head.
+
+    The watcher stays `lag` blocks behind the head: a submitter marks its vote
+    'sent' only after broadcasting, so the newest blocks may already contain
+    transactions that are not yet visible as outstanding in the database.
+
+    Returns:
+        Dict with from_block, to_block and resolved (votes updated)
+    """
+    from .models import CheckpointCadena
+
+    head = blockchain.w3.eth.block_number - lag
+    checkpoint, _ = CheckpointCadena.objects.get_or_create(
+        nombre=CHECKPOINT_NAME, defaults={'ultimo_bloque': max(head - lookback, 0)}
+    )
+    start = checkpoint.ultimo_bloque + 1
+    if start > head:
+        return {'from_block': start, 'to_block': head, 'resolved': 0}
+
+    pending = outstanding_transactions()
+    if not pending:
+        CheckpointCadena.objects.filter(
+            nombre=CHECKPOINT_NAME, ultimo_bloque__lt=head
+        ).update(ultimo_bloque=head)
+        return {'from_block': start, 'to_block': head, 'resolved': 0}
+
+    end = min(head, start + max_blocks - 1)
+    resolved = 0
+    for block_number in range(start, end + 1):
+        receipts = blockchain.get_receipts_for_block(block_number, set(pending))
+        resolved += _apply_block(block_number, receipts, pending, blockchain)
+        for receipt in receipts:
+            pending.pop(_normalize(blockchain.w3.to_hex(receipt['transactionHash'])), None)
+
+    if resolved:
+        logger.info(f"Receipt watcher: blocks {start}-{end}, {resolved} votes resolved")
+    return {'from_block': start, 'to_block': end, 'resolved': resolved}
@@ -0,0 +1,249 @@
+"""
+Multi-endpoint JSON-RPC provider for web3.
+
+BalancedHTTPProvider spreads requests over several RPC URLs:
+
+- Reads go to the healthy endpoint with the lowest rolling (EWMA) latency,
+  failing over to the next one on connection errors, timeouts, HTTP errors
+  and rate-limit responses. A small share of reads explores other endpoints
+  so their latency figures stay current.
+- eth_sendRawTransaction is broadcast to several endpoints in parallel; the
+  first accepted hash is returned.
+- An endpoint is circuit-broken (skipped for `open_seconds`) after
+  `failure_threshold` consecutive failures, or when its rolling latency
+  exceeds `slow_ms`. Once the circuit expires it gets traffic again.
+
+Every endpoint keeps a latency histogram (per process) exposed by stats().
+"""
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+import requests
+from eth_utils import keccak, to_bytes
+from web3 import Web3
+from web3.providers.base import JSONBaseProvider
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# JSON-RPC error codes/messages that mean "this endpoint is overloaded", not "the call is wrong"
+_RATE_LIMIT_CODES = {-32005, 429}
+_RATE_LIMIT_MESSAGES = ('rate limit', 'too many requests', 'capacity exceeded')
+
+_broadcast_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='rpc-broadcast')
+
+
+class EndpointStats:
+    """Rolling latency, error counters, circuit state and histogram of one endpoint."""
+
+    def __init__(self, url: str, alpha: float = 0.2):
+        self.url = url
+        self.alpha = alpha
+        self.ewma_ms: Optional[float] = None
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self._lock = threading.Lock()
+
+    def record_success(self, elapsed_ms: float) -> None:
+        with self._lock:
+            self.requests += 1
+            self.consecutive_failures = 0
+            self.ewma_ms = elapsed_ms if self.ewma_ms is None else (
+                self.alpha * elapsed_ms + (1 - self.alpha) * self.ewma_ms
+            )
+            bucket = next((i for i, limit in enumerate(LATENCY_BUCKETS_MS) if elapsed_ms <= limit),
+                          len(LATENCY_BUCKETS_MS))
+            self.histogram[bucket] += 1
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+            self.consecutive_failures += 1
+
+    def is_open(self, now: float) -> bool:
+        return now < self.open_until
+
+    def trip(self, seconds: float, reason: str) -> None:
+        with self._lock:
+            self.open_until = time.monotonic() + seconds
+            # Start over after the break: an endpoint is judged on fresh samples
+            self.consecutive_failures = 0
+            self.ewma_ms = None
+        logger.warning(f"RPC endpoint {self.url} circuit open for {seconds:.0f}s: {reason}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            labels = [f"<={limit}ms" for limit in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+            return {
+                'url': self.url,
+                'ewma_ms': round(self.ewma_ms, 1) if self.ewma_ms is not None else None,
+                'requests': self.requests,
+                'errors': self.errors,
+                'error_rate': round(self.errors / self.requests, 4) if self.requests else 0.0,
+                'circuit_open': self.is_open(time.monotonic()),
+                'histogram': dict(zip(labels, self.histogram)),
+            }
+
+
+class _EndpointError(Exception):
+    """The endpoint answered with a rate-limit error; try another one."""
+
+
+class BalancedHTTPProvider(JSONBaseProvider):
+    """web3 provider over several HTTP endpoints with latency-aware routing and failover."""
+
+    def __init__(self, endpoint_uris: List[str], session: Optional[requests.Session] = None,
+                 stats: Optional[Dict[str, EndpointStats]] = None, broadcast_fanout: int = 3,
+                 failure_threshold: int = 3, open_seconds: float = 30.0, slow_ms: float = 5000.0,
+                 explore_ratio: float = 0.05, timeout: float = 10.0, **kwargs: Any):
+        """
+        Args:
+            endpoint_uris: RPC URLs, all serving the same chain
+            session: requests.Session shared by all endpoints (keep-alive pool)
+            stats: Shared EndpointStats by URL, so several providers (e.g. one per
+                thread) route on the same measurements
+            broadcast_fanout: Endpoints that receive each raw transaction
+            failure_threshold: Consecutive failures that open the circuit
+            open_seconds: How long an open circuit skips the endpoint
+            slow_ms: Rolling latency above which the circuit opens
+            explore_ratio: Share of reads sent to a random healthy endpoint
+            timeout: Per-request HTTP timeout in seconds
+        """
+        super().__init__(**kwargs)
+        if not endpoint_uris:
+            raise ValueError("At least one RPC endpoint is required")
+        self.endpoint_uris = list(endpoint_uris)
+        self.session = session or requests.Session()
+        self.stats_by_url = stats if stats is not None else {}
+        for url in self.endpoint_uris:
+            self.stats_by_url.setdefault(url, EndpointStats(url))
+        self.broadcast_fanout = broadcast_fanout
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.slow_ms = slow_ms
+        self.explore_ratio = explore_ratio
+        self.timeout = timeout
+
+    def __str__(self) -> str:
+        return f"Balanced RPC connection {', '.join(self.endpoint_uris)}"
+
+    # -- routing -- #
+
+    def _ranked(self) -> List[EndpointStats]:
+        """Healthy endpoints by latency (unmeasured first), then circuit-broken ones as last resort."""
+        now = time.monotonic()
+        stats = [self.stats_by_url[url] for url in self.endpoint_uris]
+        healthy = sorted((s for s in stats if not s.is_open(now)), key=lambda s: s.ewma_ms or 0.0)
+        broken = [s for s in stats if s.is_open(now)]
+        if len(healthy) > 1 and random.random() < self.explore_ratio:
+            explored = random.choice(healthy[1:])
+            healthy.remove(explored)
+            healthy.insert(0, explored)
+        return healthy + broken
+
+    def _post(self, endpoint: EndpointStats, payload: bytes) -> Any:
+        """POST one JSON-RPC payload, recording latency or failure on `endpoint`."""
+        start = time.monotonic()
+        try:
+            response = self.session.post(
+                endpoint.url, data=payload, timeout=self.timeout,
+                headers={'Content-Type': 'application/json'},
+            )
+            response.raise_for_status()
+            decoded = self.decode_rpc_response(response.content)
+            if _is_rate_limited(decoded):
+                raise _EndpointError(f"rate limited: {decoded}")
+        except Exception as e:
+            endpoint.record_failure()
+            if endpoint.consecutive_failures >= self.failure_threshold:
+                endpoint.trip(self.open_seconds, f"{endpoint.consecutive_failures} consecutive failures ({e})")
+            raise
+
+        endpoint.record_success((time.monotonic() - start) * 1000)
+        if endpoint.ewma_ms is not None and endpoint.ewma_ms > self.slow_ms:
+            endpoint.trip(self.open_seconds, f"rolling latency {endpoint.ewma_ms:.0f}ms")
+        return decoded
+
+    def _with_failover(self, payload: bytes) -> Any:
+        last_error = None
+        for endpoint in self._ranked():
+            try:
+                return self._post(endpoint, payload)
+            except Exception as e:
+                last_error = e
+                logger.info(f"RPC endpoint {endpoint.url} failed, trying next: {e}")
+        raise ConnectionError(f"All RPC endpoints failed: {last_error}") from last_error
+
+    # -- provider API -- #
+
+    def make_request(self, method, params):
+        payload = self.encode_rpc_request(method, params)
+        if method == 'eth_sendRawTransaction':
+            return self._broadcast(payload, params[0])
+        return self._with_failover(payload)
+
+    def make_batch_request(self, batch_requests):
+        from web3._utils.batching import sort_batch_response_by_response_ids
+
+        response = self._with_failover(self.encode_batch_rpc_request(batch_requests))
+        if not isinstance(response, list):
+            return response
+        return sort_batch_response_by_response_ids(response)
+
+    def _broadcast(self, payload: bytes, raw_tx) -> Any:
+        """
+        Send a raw transaction to the `broadcast_fanout` best endpoints at once.
+        Returns the first successful response. "already known" from an endpoint
+        means another one (or a peer) already has it, which is also a success.
+        """
+        targets = self._ranked()[:self.broadcast_fanout]
+        futures = [_broadcast_pool.submit(self._post, endpoint, payload) for endpoint in targets]
+
+        first_error_response, last_error = None, None
+        for future in as_completed(futures):
+            try:
+                response = future.result()
+            except Exception as e:
+                last_error = e
+                continue
+            if 'result' in response:
+                return response
+            message = str(response.get('error', {}).get('message', '')).lower()
+            if 'already known' in message or 'already imported' in message:
+                tx_hash = Web3.to_hex(keccak(to_bytes(hexstr=raw_tx) if isinstance(raw_tx, str) else raw_tx))
+                return {'jsonrpc': '2.0', 'id': response.get('id'), 'result': tx_hash}
+            first_error_response = first_error_response or response
+
+        if first_error_response is not None:
+            # Rejected by the node (nonce too low, underpriced...): surface it to the caller
+            return first_error_response
+        raise ConnectionError(f"Raw transaction broadcast failed on every endpoint: {last_error}") from last_error
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return any(not s.is_open(time.monotonic()) for s in self.stats_by_url.values())
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Latency, error rate, circuit state and histogram per endpoint."""
+        return [self.stats_by_url[url].snapshot() for url in self.endpoint_uris]
+
+
+def _is_rate_limited(response: Any) -> bool:
+    errors = [r.get('error') for r in response] if isinstance(response, list) else [response.get('error')]
+    for error in errors:
+        if not isinstance(error, dict):
+            continue
+        message = str(error.get('message', '')).lower()
+        if error.get('code') in _RATE_LIMIT_CODES or any(m in message for m in _RATE_LIMIT_MESSAGES):
+            return True
+    return False
@@ -1,9 +1,13 @@
 """
-Signals para mantener sincronizado el campo es_candidato
+Signals para mantener sincronizado el campo es_candidato,
+la boleta en caché de cada evento (elecciones.ballot)
+y los cambios de fase programados de los eventos (elecciones.event_lifecycle)
 """
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import Candidatura, Persona
+from .ballot import invalidate_ballot
+from .models import Candidatura, EventoEleccion, Persona
 
 
 @receiver(post_save, sender=Candidatura)
@@ -14,6 +18,7 @@ def marcar_persona_como_candidato(sender, instance, created, **kwargs):
     if created:
         instance.persona.es_candidato = True
         instance.persona.save(update_fields=['es_candidato'])
+    invalidate_ballot(instance.evento_id)
 
 
 @receiver(post_delete, sender=Candidatura)
@@ -22,6 +27,7 @@ def actualizar_estado_candidato_al_eliminar(sender, instance, **kwargs):
     Cuando se elimina una candidatura, verifica si la persona 
     sigue siendo candidato en otros eventos
     """
+    invalidate_ballot(instance.evento_id)
     persona = instance.persona
     # Verificar si tiene otras candidaturas
     tiene_otras_candidaturas = Candidatura.objects.filter(persona=persona).exists()
@@ -31,6 +37,31 @@ def actualizar_estado_candidato_al_eliminar(sender, instance, **kwargs):
         persona.save(update_fields=['es_candidato'])
 
 
+@receiver(post_save, sender=Persona)
+def invalidar_boletas_de_persona(sender, instance, update_fields=None, **kwargs):
+    """
+    Cuando cambia el nombre o la foto de un candidato, invalida la boleta
+    de los eventos en que participa
+    """
+    if update_fields is not None and not {'nombre', 'foto'} & set(update_fields):
+        return
+    for evento_id in Candidatura.objects.filter(persona=instance).values_list('evento_id', flat=True):
+        invalidate_ballot(evento_id)
+
+
+@receiver(post_save, sender=EventoEleccion)
+def programar_cambios_de_fase(sender, instance, update_fields=None, **kwargs):
+    """
+    Cuando se crea un evento o cambian sus fechas, programa la apertura y el
+    cierre a la hora exacta si caen antes de la próxima pasada del motor de fases
+    """
+    if update_fields is not None and not {'fecha_inicio', 'fecha_termino'} & set(update_fields):
+        return
+    from .event_lifecycle import schedule_phase_changes
+
+    transaction.on_commit(lambda: schedule_phase_changes(instance.id, instance.fecha_inicio, instance.fecha_termino))
+
+
 def sincronizar_estado_candidatos():
     """
     Función utilitaria para sincronizar todos los estados de candidatos
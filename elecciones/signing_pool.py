@@ -0,0 +1,121 @@
+"""
+Process pool for signing transactions.
+
+eth_account signs in pure Python (RLP, keccak, secp256k1) and holds the GIL
+for a few milliseconds per transaction, so threads do not help. SigningPool
+hands fully built transaction dicts to worker processes and gets back the
+raw bytes ready for eth_sendRawTransaction.
+
+Private keys are sent to each worker once, by the pool initializer; calls
+only carry the sender address and the transaction. Transactions are sent to
+the workers in chunks to amortize the inter-process round trip. With
+processes=0 everything is signed inline, which is also the fallback when the
+pool cannot start.
+
+Workers are started with 'spawn': the web and Celery processes that own the
+pool run threads, and forking them is not safe.
+"""
+
+import atexit
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from eth_account import Account
+
+logger = logging.getLogger(__name__)
+
+# Accounts of this worker process, by lowercase address (set by _init_worker)
+_worker_accounts: Dict[str, Any] = {}
+
+
+def _load_accounts(private_keys: Sequence[str]) -> Dict[str, Any]:
+    accounts = {}
+    for key in private_keys:
+        account = Account.from_key(key)
+        accounts[account.address.lower()] = account
+    return accounts
+
+
+def _init_worker(private_keys: Sequence[str]) -> None:
+    global _worker_accounts
+    _worker_accounts = _load_accounts(private_keys)
+
+
+def _sign_with(accounts: Dict[str, Any], items: Sequence[Tuple[str, Dict[str, Any]]]) -> List[Tuple[bytes, bytes]]:
+    signed = []
+    for address, tx in items:
+        result = accounts[address.lower()].sign_transaction(tx)
+        raw_tx = getattr(result, 'raw_transaction', None) or getattr(result, 'rawTransaction', None)
+        signed.append((bytes(raw_tx), bytes(result.hash)))
+    return signed
+
+
+def _sign_chunk(items: Sequence[Tuple[str, Dict[str, Any]]]) -> List[Tuple[bytes, bytes]]:
+    return _sign_with(_worker_accounts, items)
+
+
+class SigningPool:
+    """Signs transactions for a fixed set of wallets in worker processes."""
+
+    def __init__(self, private_keys: Sequence[str], processes: int = 0, chunk_size: int = 16):
+        """
+        Args:
+            private_keys: Keys of every wallet the pool may sign for
+            processes: Worker processes (0 = sign inline in the caller)
+            chunk_size: Transactions per worker round trip
+        """
+        self.processes = processes
+        self.chunk_size = max(chunk_size, 1)
+        self._private_keys = list(private_keys)
+        self._accounts = _load_accounts(self._private_keys)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.processes <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                try:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.processes,
+                        mp_context=multiprocessing.get_context('spawn'),
+                        initializer=_init_worker,
+                        initargs=(self._private_keys,),
+                    )
+                    atexit.register(self.shutdown)
+                except Exception as e:
+                    logger.warning(f"Signing pool unavailable, signing inline: {e}")
+                    self.processes = 0
+            return self._executor
+
+    def sign_many(self, items: Sequence[Tuple[str, Dict[str, Any]]]) -> List[Tuple[bytes, bytes]]:
+        """
+        Sign (sender address, transaction dict) pairs.
+
+        Returns:
+            List of (raw transaction bytes, transaction hash bytes), in input order
+        """
+        items = list(items)
+        executor = self._get_executor()
+        if executor is None or len(items) <= 1:
+            return _sign_with(self._accounts, items)
+
+        chunks = [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+        try:
+            futures = [executor.submit(_sign_chunk, chunk) for chunk in chunks]
+            return [signed for future in futures for signed in future.result()]
+        except Exception as e:
+            # Broken pool (a worker died): sign this call inline and rebuild on the next one
+            logger.warning(f"Signing pool failed, signing inline: {e}")
+            self.shutdown()
+            return _sign_with(self._accounts, items)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
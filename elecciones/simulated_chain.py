@@ -0,0 +1,451 @@
+"""
+In-process simulated chain backend.
+
+VotingBlockchain talks to the chain only through a web3 provider, so the
+provider is the backend seam: the real backend is an HTTP (or balanced
+multi-endpoint) provider, and SimulatedChainProvider answers the same
+JSON-RPC methods from an in-memory VotingRegistry:
+
+- storeCommitment reverts on zero or duplicate commitments ("Commitment
+  already exists"); storeCommitments skips them; anchorRoot reverts on zero
+  or already anchored roots. Events, receipts and views match the contract.
+- Signed raw transactions are decoded and checked (sender, nonce), then mined
+  into the first block produced after they arrive. Blocks are produced every
+  `block_time` seconds of wall clock; nonces are per sender with a mempool.
+- Transactions tipping less than `min_tip_wei` stay in the mempool (and hold
+  back their sender's later nonces) until replaced: a transaction with the
+  same nonce replaces the pending one if both fee fields are at least 10%
+  higher, as geth requires ("replacement transaction underpriced" otherwise).
+- Every request waits `latency_ms` ± `jitter_ms`, and fails with a
+  connection error with probability `failure_rate`.
+
+Chain state is shared by every provider in the process (one simulated chain
+per process), so Celery workers in separate processes each see their own
+chain: run load tests in-process or with CELERY_TASK_ALWAYS_EAGER.
+
+Select it with BLOCKCHAIN_BACKEND=simulated (see create_voting_blockchain).
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+import rlp
+from eth_abi import encode
+from eth_account import Account
+from eth_utils import keccak, to_checksum_address
+from web3 import Web3
+from web3.providers.base import JSONBaseProvider
+
+SIMULATED_CHAIN_ID = 1337
+# Hardhat/Anvil default account #0: well known, only for the simulator
+SIMULATED_PRIVATE_KEY = '0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80'
+SIMULATED_REGISTRY_ADDRESS = '0x5FbDB2315678afecb367f032d93F642f64180aa3'
+
+_GAS_BASE = 21000
+_GAS_PER_STORE = 50000
+_BASE_FEE = 30 * 10 ** 9
+_REPLACEMENT_BUMP = 1.10
+
+_COMMITMENT_STORED = keccak(text='CommitmentStored(bytes32,uint256,address)')
+_ROOT_ANCHORED = keccak(text='RootAnchored(bytes32,uint256,uint256,address)')
+
+
+def _hex(value) -> str:
+    if isinstance(value, int):
+        return hex(value)
+    return '0x' + bytes(value).hex()
+
+
+def _pad_address(address: str) -> bytes:
+    return bytes(12) + bytes.fromhex(address[2:])
+
+
+class _Revert(Exception):
+    pass
+
+
+class SimulatedChain:
+    """In-memory chain holding one VotingRegistry deployment."""
+
+    def __init__(self, block_time: float = 2.0, chain_id: int = SIMULATED_CHAIN_ID,
+                 registry_address: str = SIMULATED_REGISTRY_ADDRESS, max_txs_per_block: int = 500,
+                 min_tip_wei: int = 0):
+        from .web3_utils import VOTING_REGISTRY_ABI
+
+        self.block_time = block_time
+        self.chain_id = chain_id
+        self.registry_address = to_checksum_address(registry_address)
+        self.max_txs_per_block = max_txs_per_block
+        self.min_tip_wei = min_tip_wei
+        self.contract = Web3().eth.contract(address=self.registry_address, abi=VOTING_REGISTRY_ABI)
+
+        self._lock = threading.RLock()
+        self._started = time.monotonic()
+        self.head = 0
+
+        # Contract storage
+        self.commitment_block: Dict[bytes, int] = {}
+        self.commitment_sender: Dict[bytes, str] = {}
+        self.root_block: Dict[bytes, int] = {}
+
+        # Accounts and transactions
+        self.mined_nonce: Dict[str, int] = {}
+        self.mempool: Dict[str, Dict[int, dict]] = {}
+        self.arrival: List[Tuple[str, int]] = []
+        self.transactions: Dict[str, dict] = {}
+        self.receipts: Dict[str, dict] = {}
+        self.blocks: Dict[int, List[str]] = {}
+        self.logs: List[dict] = []
+
+    # -- block production -- #
+
+    def _block_hash(self, number: int) -> str:
+        return _hex(keccak(b'simulated-block' + number.to_bytes(8, 'big')))
+
+    def advance(self) -> None:
+        """Mine every block whose time has come."""
+        target = int((time.monotonic() - self._started) / self.block_time) if self.block_time > 0 else self.head + 1
+        with self._lock:
+            while self.head < target:
+                self.head += 1
+                self._mine(self.head)
+
+    def _mine(self, number: int) -> None:
+        included = []
+        for sender, nonce in list(self.arrival):
+            if len(included) >= self.max_txs_per_block:
+                break
+            if nonce != self.mined_nonce.get(sender, 0):
+                continue  # Waits for the gap before it to be filled
+            if self.mempool[sender][nonce]['tip'] < self.min_tip_wei:
+                continue  # Underpriced: stays until replaced
+            tx = self.mempool[sender].pop(nonce)
+            self.arrival.remove((sender, nonce))
+            self.mined_nonce[sender] = nonce + 1
+            self._execute(tx, number, len(included))
+            included.append(tx['hash'])
+        if included:
+            self.blocks[number] = included
+
+    def _execute(self, tx: dict, number: int, index: int) -> None:
+        logs, status, gas_used = [], 1, _GAS_BASE
+        try:
+            if tx['to'] != self.registry_address.lower():
+                raise _Revert("Unknown contract")
+            fn, args = self.contract.decode_function_input(tx['data'])
+            name = fn.fn_name
+            if name == 'storeCommitment':
+                c = bytes(args['c'])
+                if c in self.commitment_block:
+                    raise _Revert("Commitment already exists")
+                if c == bytes(32):
+                    raise _Revert("Invalid commitment")
+                logs.append(self._store(c, tx['from'], number))
+            elif name == 'storeCommitments':
+                for c in map(bytes, args['cs']):
+                    if c != bytes(32) and c not in self.commitment_block:
+                        logs.append(self._store(c, tx['from'], number))
+            elif name == 'anchorRoot':
+                root = bytes(args['root'])
+                if root == bytes(32):
+                    raise _Revert("Invalid root")
+                if root in self.root_block:
+                    raise _Revert("Root already anchored")
+                self.root_block[root] = number
+                logs.append({
+                    'topics': [_hex(_ROOT_ANCHORED), _hex(root), _hex(_pad_address(tx['from']))],
+                    'data': _hex(encode(['uint256', 'uint256'], [args['leafCount'], number])),
+                })
+            else:
+                raise _Revert(f"{name} is not a transaction")
+            gas_used += _GAS_PER_STORE * max(len(logs), 1)
+        except (_Revert, ValueError):
+            status, logs = 0, []
+
+        block_hash = self._block_hash(number)
+        for i, log in enumerate(logs):
+            log.update({
+                'address': self.registry_address,
+                'blockNumber': hex(number),
+                'blockHash': block_hash,
+                'transactionHash': tx['hash'],
+                'transactionIndex': hex(index),
+                'logIndex': hex(i),
+                'removed': False,
+            })
+        self.logs.extend(logs)
+        self.receipts[tx['hash']] = {
+            'transactionHash': tx['hash'],
+            'transactionIndex': hex(index),
+            'blockHash': block_hash,
+            'blockNumber': hex(number),
+            'from': tx['from'],
+            'to': tx['to'],
+            'cumulativeGasUsed': hex(gas_used),
+            'gasUsed': hex(gas_used),
+            'effectiveGasPrice': hex(_BASE_FEE),
+            'contractAddress': None,
+            'logs': logs,
+            'logsBloom': '0x' + '00' * 256,
+            'status': hex(status),
+            'type': hex(tx['type']),
+        }
+
+    def _store(self, c: bytes, sender: str, number: int) -> dict:
+        self.commitment_block[c] = number
+        self.commitment_sender[c] = sender
+        return {
+            'topics': [_hex(_COMMITMENT_STORED), _hex(c), _hex(_pad_address(sender))],
+            'data': _hex(encode(['uint256'], [number])),
+        }
+
+    # -- JSON-RPC methods -- #
+
+    def send_raw_transaction(self, raw_hex: str) -> str:
+        raw = bytes.fromhex(raw_hex[2:] if raw_hex.startswith('0x') else raw_hex)
+        tx_hash = _hex(keccak(raw))
+        sender = Account.recover_transaction(raw).lower()
+        if raw[0] == 2:
+            fields = rlp.decode(raw[1:])
+            chain_id, nonce, to, data = fields[0], fields[1], fields[5], fields[7]
+            chain_id = int.from_bytes(chain_id, 'big')
+            max_priority, max_fee = (int.from_bytes(f, 'big') for f in fields[2:4])
+            tx_type = 2
+        else:
+            fields = rlp.decode(raw)
+            nonce, to, data = fields[0], fields[3], fields[5]
+            chain_id = None
+            max_fee = int.from_bytes(fields[1], 'big')
+            max_priority = max_fee - _BASE_FEE
+            tx_type = 0
+        nonce = int.from_bytes(nonce, 'big')
+        tip = min(max_priority, max_fee - _BASE_FEE)
+        if chain_id is not None and chain_id != self.chain_id:
+            raise _RPCError(-32000, f"invalid chain id {chain_id}")
+
+        with self._lock:
+            if tx_hash in self.transactions:
+                raise _RPCError(-32000, "already known")
+            if nonce < self.mined_nonce.get(sender, 0):
+                raise _RPCError(-32000, "nonce too low")
+            replaced = self.mempool.get(sender, {}).get(nonce)
+            if replaced is not None and (max_fee < replaced['max_fee'] * _REPLACEMENT_BUMP
+                                         or max_priority < replaced['max_priority'] * _REPLACEMENT_BUMP):
+                raise _RPCError(-32000, "replacement transaction underpriced")
+            tx = {'hash': tx_hash, 'from': sender, 'to': _hex(to), 'data': _hex(data),
+                  'nonce': nonce, 'type': tx_type, 'max_fee': max_fee, 'max_priority': max_priority,
+                  'tip': tip}
+            self.transactions[tx_hash] = tx
+            self.mempool.setdefault(sender, {})[nonce] = tx
+            if replaced is None:
+                self.arrival.append((sender, nonce))
+        return tx_hash
+
+    def transaction_count(self, address: str, block: str) -> int:
+        address = address.lower()
+        with self._lock:
+            count = self.mined_nonce.get(address, 0)
+            if block == 'pending':
+                pool = self.mempool.get(address, {})
+                while count in pool:
+                    count += 1
+            return count
+
+    def call(self, data: str) -> str:
+        fn, args = self.contract.decode_function_input(data)
+        name = fn.fn_name
+        with self._lock:
+            if name == 'hasCommitment':
+                return _hex(encode(['bool'], [bytes(args['c']) in self.commitment_block]))
+            if name == 'getCommitmentBlock':
+                return _hex(encode(['uint256'], [self.commitment_block.get(bytes(args['c']), 0)]))
+            if name == 'getCommitmentSender':
+                sender = self.commitment_sender.get(bytes(args['c']), '0x' + '00' * 20)
+                return _hex(encode(['address'], [sender]))
+            if name in ('getRootBlock', 'rootBlock'):
+                root = bytes(args.get('root', args.get('', b'')))
+                return _hex(encode(['uint256'], [self.root_block.get(root, 0)]))
+        raise _RPCError(3, f"execution reverted: {name} not simulated")
+
+    def estimate_gas(self, data: str) -> int:
+        fn, args = self.contract.decode_function_input(data)
+        stores = len(args['cs']) if fn.fn_name == 'storeCommitments' else 1
+        return _GAS_BASE + _GAS_PER_STORE * stores
+
+    def block(self, number: int) -> dict:
+        with self._lock:
+            txs = self.blocks.get(number, [])
+            return {
+                'number': hex(number),
+                'hash': self._block_hash(number),
+                'parentHash': self._block_hash(number - 1) if number else _hex(bytes(32)),
+                'timestamp': hex(int(time.time())),
+                'transactions': list(txs),
+                'gasLimit': hex(30_000_000),
+                'gasUsed': hex(sum(int(self.receipts[h]['gasUsed'], 16) for h in txs)),
+                'baseFeePerGas': hex(_BASE_FEE),
+                'miner': '0x' + '00' * 20,
+                'logsBloom': '0x' + '00' * 256,
+                'extraData': '0x',
+                'size': hex(0),
+            }
+
+    def block_receipts(self, number: int) -> List[dict]:
+        with self._lock:
+            return [self.receipts[h] for h in self.blocks.get(number, [])]
+
+    def receipt(self, tx_hash: str) -> Optional[dict]:
+        with self._lock:
+            return self.receipts.get(tx_hash.lower())
+
+    def transaction(self, tx_hash: str) -> Optional[dict]:
+        with self._lock:
+            tx = self.transactions.get(tx_hash.lower())
+            if tx is None:
+                return None
+            return {'hash': tx['hash'], 'from': tx['from'], 'to': tx['to'],
+                    'input': tx['data'], 'nonce': hex(tx['nonce'])}
+
+    def get_logs(self, from_block: int, to_block: int, topics) -> List[dict]:
+        topic0 = topics[0] if topics else None
+        with self._lock:
+            return [
+                log for log in self.logs
+                if from_block <= int(log['blockNumber'], 16) <= to_block
+                and (topic0 is None or log['topics'][0] == topic0)
+            ]
+
+
+class _RPCError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+_chain: Optional[SimulatedChain] = None
+_chain_lock = threading.Lock()
+
+
+def get_simulated_chain(**options) -> SimulatedChain:
+    """The process-wide simulated chain (created with `options` on first use)."""
+    global _chain
+    with _chain_lock:
+        if _chain is None:
+            _chain = SimulatedChain(**options)
+        return _chain
+
+
+def reset_simulated_chain() -> None:
+    global _chain
+    with _chain_lock:
+        _chain = None
+
+
+class SimulatedChainProvider(JSONBaseProvider):
+    """web3 provider answering JSON-RPC from the in-process SimulatedChain."""
+
+    def __init__(self, chain: Optional[SimulatedChain] = None, latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, failure_rate: float = 0.0, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.chain = chain or get_simulated_chain()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+
+    def __str__(self) -> str:
+        return f"Simulated chain (block time {self.chain.block_time}s)"
+
+    def _network_delay(self) -> None:
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise requests.exceptions.ConnectionError("Simulated RPC failure")
+
+    def _dispatch(self, method: str, params: list) -> Any:
+        chain = self.chain
+        chain.advance()
+        if method == 'eth_chainId':
+            return hex(chain.chain_id)
+        if method == 'eth_blockNumber':
+            return hex(chain.head)
+        if method == 'eth_gasPrice':
+            return hex(_BASE_FEE)
+        if method == 'eth_maxPriorityFeePerGas':
+            return hex(30 * 10 ** 9)
+        if method == 'eth_feeHistory':
+            count = int(params[0], 16) if isinstance(params[0], str) else params[0]
+            count = min(count, chain.head + 1)
+            return {
+                'oldestBlock': hex(chain.head - count + 1),
+                'baseFeePerGas': [hex(_BASE_FEE)] * (count + 1),
+                'gasUsedRatio': [0.5] * count,
+                'reward': [[hex(30 * 10 ** 9)] * len(params[2] or [])] * count,
+            }
+        if method == 'eth_getBalance':
+            return hex(10 ** 24)
+        if method == 'eth_getTransactionCount':
+            return hex(chain.transaction_count(params[0], params[1]))
+        if method == 'eth_sendRawTransaction':
+            return chain.send_raw_transaction(params[0])
+        if method == 'eth_getTransactionReceipt':
+            return chain.receipt(params[0])
+        if method == 'eth_getTransactionByHash':
+            return chain.transaction(params[0])
+        if method == 'eth_call':
+            return chain.call(params[0].get('data') or params[0].get('input'))
+        if method == 'eth_estimateGas':
+            return hex(chain.estimate_gas(params[0].get('data') or params[0].get('input')))
+        if method in ('eth_getBlockByNumber', 'eth_getBlockReceipts'):
+            ref = params[0]
+            number = chain.head if ref in ('latest', 'pending', 'safe', 'finalized') else int(ref, 16)
+            if number > chain.head:
+                return None
+            return chain.block(number) if method == 'eth_getBlockByNumber' else chain.block_receipts(number)
+        if method == 'eth_getLogs':
+            query = params[0]
+            def block_ref(ref):
+                return chain.head if ref in (None, 'latest') else int(ref, 16) if isinstance(ref, str) else ref
+            return chain.get_logs(block_ref(query.get('fromBlock')), block_ref(query.get('toBlock')),
+                                  query.get('topics'))
+        if method in ('web3_clientVersion', 'net_version'):
+            return 'simulated/1.0' if method == 'web3_clientVersion' else str(chain.chain_id)
+        raise _RPCError(-32601, f"the method {method} does not exist/is not available")
+
+    def _respond(self, request_id, method, params) -> dict:
+        try:
+            return {'jsonrpc': '2.0', 'id': request_id, 'result': self._dispatch(method, params)}
+        except _RPCError as e:
+            return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': e.code, 'message': e.message}}
+
+    def make_request(self, method, params):
+        self._network_delay()
+        return self._respond(next(self.request_counter), method, list(params or []))
+
+    def make_batch_request(self, batch_requests):
+        self._network_delay()
+        return [self._respond(next(self.request_counter), method, list(params or []))
+                for method, params in batch_requests]
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return True
+
+
+def simulated_options_from_env() -> Dict[str, Dict[str, Any]]:
+    """Chain and provider options from the SIMULATED_* environment variables."""
+    return {
+        'chain': {
+            'block_time': float(os.getenv('SIMULATED_BLOCK_TIME', '2.0')),
+            'min_tip_wei': int(float(os.getenv('SIMULATED_MIN_TIP_GWEI', '0')) * 10 ** 9),
+        },
+        'provider': {
+            'latency_ms': float(os.getenv('SIMULATED_LATENCY_MS', '50')),
+            'jitter_ms': float(os.getenv('SIMULATED_JITTER_MS', '20')),
+            'failure_rate': float(os.getenv('SIMULATED_FAILURE_RATE', '0')),
+        },
+    }
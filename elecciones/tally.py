@@ -0,0 +1,251 @@
+"""
+Sharded vote tallies.
+
+A single Resultado row per candidate serialises every concurrent vote for
+that candidate on one row lock. Votes instead add 1 to one of
+RESULTADOS_SHARDS ResultadoShard rows chosen at random, with a single
+UPDATE ... SET conteo_votos = conteo_votos + 1 (the row is created on the
+first vote that lands on it). Two votes for the same candidate only wait
+for each other when they pick the same shard.
+
+Reads sum the shards of an event in one GROUP BY query, which touches at
+most shards x candidates rows.
+
+Resultado is the recount from Voto (for the admin and for direct SQL
+reports), maintained by recount_event: incrementally from a per-event
+watermark (MarcaRecuento), or rebuilt in full into a new generation of rows
+that is swapped in atomically, after which the shards are reset to match.
+recount_recent_events (Celery beat) keeps the events that received votes
+recently up to date; recalcular_resultados_evento (views) is the entry point
+for manual recounts.
+"""
+
+import logging
+import random
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def _shards() -> int:
+    from django.conf import settings
+    return max(1, getattr(settings, 'RESULTADOS_SHARDS', 16))
+
+
+def add_vote(evento_id, candidato_id) -> None:
+    """Count one vote for `candidato_id`. Call inside the transaction that stores the vote."""
+    from .models import ResultadoShard
+
+    shard = random.randrange(_shards())
+    fila = ResultadoShard.objects.filter(evento_id=evento_id, persona_candidato_id=candidato_id, shard=shard)
+    if fila.update(conteo_votos=F('conteo_votos') + 1, updated_at=timezone.now()):
+        return
+    try:
+        # First vote on this shard; another voter may create it at the same time
+        with transaction.atomic():
+            ResultadoShard.objects.create(
+                evento_id=evento_id, persona_candidato_id=candidato_id, shard=shard, conteo_votos=1
+            )
+    except IntegrityError:
+        fila.update(conteo_votos=F('conteo_votos') + 1, updated_at=timezone.now())
+
+
+def event_counts(evento_id) -> Dict[UUID, int]:
+    """candidate id -> votes, summed over the shards (candidates without votes are absent)."""
+    from .models import ResultadoShard
+
+    return dict(
+        ResultadoShard.objects.filter(evento_id=evento_id)
+        .values_list('persona_candidato_id')
+        .annotate(total=Sum('conteo_votos'))
+        .order_by()
+    )
+
+
+def event_results(evento_id) -> List[Dict]:
+    """Candidates with votes, most voted first: dicts with persona_id, nombre and votos."""
+    from .models import ResultadoShard
+
+    rows = (
+        ResultadoShard.objects.filter(evento_id=evento_id)
+        .values('persona_candidato_id', 'persona_candidato__nombre')
+        .annotate(votos=Sum('conteo_votos'))
+        .order_by('-votos')
+    )
+    return [
+        {'persona_id': r['persona_candidato_id'], 'nombre': r['persona_candidato__nombre'], 'votos': r['votos']}
+        for r in rows
+    ]
+
+
+def _margin() -> timedelta:
+    from django.conf import settings
+    return timedelta(seconds=getattr(settings, 'RESULTADOS_MARGEN_SEGUNDOS', 60))
+
+
+def _last_vote(evento_id, until) -> Optional[Tuple]:
+    """(time_stamp, id) of the newest vote of the event cast at or before `until`."""
+    from .models import Voto
+
+    return (
+        Voto.objects.filter(evento_id=evento_id, time_stamp__lte=until)
+        .order_by('-time_stamp', '-id').values_list('time_stamp', 'id').first()
+    )
+
+
+def _count_votes(evento_id, after: Optional[Tuple], upto: Optional[Tuple]) -> Dict[UUID, int]:
+    """candidate id -> votes cast in the keyset range (after, upto] over (time_stamp, id); None is unbounded."""
+    from .models import Voto
+
+    qs = Voto.objects.filter(evento_id=evento_id)
+    if after is not None:
+        qs = qs.filter(Q(time_stamp__gt=after[0]) | Q(time_stamp=after[0], id__gt=after[1]))
+    if upto is not None:
+        qs = qs.filter(Q(time_stamp__lt=upto[0]) | Q(time_stamp=upto[0], id__lte=upto[1]))
+    return dict(qs.values_list('persona_candidato_id').annotate(total=Count('id')).order_by())
+
+
+def _rebase_shards(evento_id, counted: Dict, upto: Optional[Tuple]) -> None:
+    """
+    Make the shards of the event equal to `counted` (votes up to `upto`) plus
+    the votes cast after it. Call inside a transaction. The shard rows are
+    locked first so votes in flight either already committed (and are counted
+    here) or add their 1 after the reset.
+    """
+    from .models import ResultadoShard
+
+    list(ResultadoShard.objects.select_for_update().filter(evento_id=evento_id).values_list('id', flat=True))
+    totals = dict(counted)
+    for c, n in _count_votes(evento_id, upto, None).items():
+        totals[c] = totals.get(c, 0) + n
+    ResultadoShard.objects.filter(evento_id=evento_id).delete()
+    ResultadoShard.objects.bulk_create([
+        ResultadoShard(evento_id=evento_id, persona_candidato_id=c, shard=0, conteo_votos=n)
+        for c, n in totals.items()
+    ])
+
+
+def _rebuild(evento_id) -> Dict:
+    from .models import MarcaRecuento, Resultado
+
+    marca, _ = MarcaRecuento.objects.get_or_create(evento_id=evento_id)
+    generacion = marca.generacion + 1
+    upto = _last_vote(evento_id, timezone.now() - _margin())
+    counts = _count_votes(evento_id, None, upto) if upto is not None else {}
+
+    # Shadow set: readers keep using the current generation meanwhile
+    Resultado.objects.filter(evento_id=evento_id, generacion=generacion).delete()
+    Resultado.objects.bulk_create(
+        [
+            Resultado(evento_id=evento_id, persona_candidato_id=c, conteo_votos=n, generacion=generacion)
+            for c, n in counts.items()
+        ],
+        batch_size=1000,
+    )
+
+    with transaction.atomic():
+        marca = MarcaRecuento.objects.select_for_update().get(pk=marca.pk)
+        if marca.generacion != generacion - 1:
+            # Another rebuild swapped in first; ours is stale
+            Resultado.objects.filter(evento_id=evento_id, generacion=generacion).delete()
+            return {'mode': 'full', 'votes': 0, 'generation': marca.generacion}
+        # The watermark may move back if an incremental recount ran meanwhile:
+        # the next one counts from `upto` into the new generation
+        marca.generacion = generacion
+        marca.ultimo_time_stamp, marca.ultimo_voto_id = upto if upto is not None else (None, None)
+        marca.save(update_fields=['generacion', 'ultimo_time_stamp', 'ultimo_voto_id', 'updated_at'])
+        Resultado.objects.filter(evento_id=evento_id).exclude(generacion=generacion).delete()
+        _rebase_shards(evento_id, counts, upto)
+
+    return {'mode': 'full', 'votes': sum(counts.values()), 'generation': generacion}
+
+
+def recount_event(evento_id, full: bool = False) -> Dict:
+    """
+    Bring Resultado up to date with Voto for one event.
+
+    Incremental (default): count only the votes after the event's watermark
+    (MarcaRecuento: last counted time_stamp and id) and add them to the
+    current generation's rows with UPDATE ... + n, creating the missing ones.
+    Votes younger than RESULTADOS_MARGEN_SEGUNDOS are left for the next run,
+    since a vote's time_stamp is taken before its transaction commits.
+
+    Full (`full=True`, or no watermark yet): count every vote into a new
+    generation of Resultado rows with bulk_create, then switch
+    MarcaRecuento.generacion to it, drop the old rows and reset the shards
+    in one short transaction. Deleted or moved votes are only reflected by
+    a full recount.
+
+    Returns:
+        Dict with mode ('incremental' or 'full'), votes (counted in this
+        run) and generation (the current one)
+    """
+    from .models import MarcaRecuento, Resultado
+
+    if full:
+        return _rebuild(evento_id)
+
+    with transaction.atomic():
+        marca = MarcaRecuento.objects.select_for_update().filter(evento_id=evento_id).first()
+        if marca is None or marca.ultimo_time_stamp is None:
+            nuevos = None
+        else:
+            after = (marca.ultimo_time_stamp, marca.ultimo_voto_id)
+            upto = _last_vote(evento_id, timezone.now() - _margin())
+            if upto is None or upto <= after:
+                return {'mode': 'incremental', 'votes': 0, 'generation': marca.generacion}
+            nuevos = _count_votes(evento_id, after, upto)
+            ahora = timezone.now()
+            filas = Resultado.objects.filter(evento_id=evento_id, generacion=marca.generacion)
+            for c, n in nuevos.items():
+                if not filas.filter(persona_candidato_id=c).update(
+                    conteo_votos=F('conteo_votos') + n, updated_at=ahora
+                ):
+                    Resultado.objects.create(
+                        evento_id=evento_id, persona_candidato_id=c, conteo_votos=n, generacion=marca.generacion
+                    )
+            marca.ultimo_time_stamp, marca.ultimo_voto_id = upto
+            marca.save(update_fields=['ultimo_time_stamp', 'ultimo_voto_id', 'updated_at'])
+
+    if nuevos is None:
+        # Nothing counted yet (or the rows predate the watermark): start from scratch
+        return _rebuild(evento_id)
+    return {'mode': 'incremental', 'votes': sum(nuevos.values()), 'generation': marca.generacion}
+
+
+def current_results(evento_id) -> Dict[UUID, int]:
+    """candidate id -> votes in the current Resultado generation (counted up to the watermark)."""
+    from .models import MarcaRecuento, Resultado
+
+    generacion = (
+        MarcaRecuento.objects.filter(evento_id=evento_id).values_list('generacion', flat=True).first() or 0
+    )
+    return dict(
+        Resultado.objects.filter(evento_id=evento_id, generacion=generacion)
+        .values_list('persona_candidato_id', 'conteo_votos')
+    )
+
+
+def recount_recent_events(since: Optional[timedelta] = None) -> int:
+    """
+    Incrementally recount every event with shards updated in the last
+    `since` (default: 10 minutes). Returns the number of events recounted.
+    """
+    from .models import ResultadoShard
+
+    desde = timezone.now() - (since or timedelta(minutes=10))
+    eventos = list(
+        ResultadoShard.objects.filter(updated_at__gte=desde).values_list('evento_id', flat=True).distinct()
+    )
+    votos = 0
+    for evento_id in eventos:
+        votos += recount_event(evento_id)['votes']
+    if votos:
+        logger.info(f"Recount: {votos} new votes counted into Resultado across {len(eventos)} events")
+    return len(eventos)
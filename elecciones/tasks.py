@@ -5,7 +5,9 @@ Celery tasks for blockchain vote submission.
 import os
 from pathlib import Path
 from celery import shared_task
+from celery.exceptions import Retry
 from django.core.exceptions import ObjectDoesNotExist
+from django.utils import timezone
 import logging
 
 # Load .env at module level
@@ -19,17 +21,21 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
+def _receipt_watcher_enabled():
+    from django.conf import settings
+    return getattr(settings, 'BLOCKCHAIN_RECEIPT_WATCHER', False)
+
+
 @shared_task(bind=True, max_retries=3)
 def send_vote_to_blockchain(self, voto_id):
     """
     Async task to send a vote commitment to blockchain.
-    If blockchain is not configured or RPC is unreachable,
-    marks vote as 'simulated' for demo purposes.
+    If blockchain is not configured the vote stays 'pending';
+    if the RPC is unreachable the task is retried.
     """
     try:
         from .models import Voto
-        from .web3_utils import create_voting_blockchain
-        import uuid
+        from .web3_utils import BlockchainNotConfigured, get_voting_blockchain, reset_voting_blockchain_on_error
         
         # Fetch the vote
         try:
@@ -39,25 +45,48 @@ def send_vote_to_blockchain(self, voto_id):
             return
         
         # Skip if already processed or no commitment
-        if voto.onchain_status in ('confirmed', 'sent') or not voto.commitment:
+        if voto.onchain_status in ('confirmed', 'success', 'exists', 'sent') or not voto.commitment:
             logger.info(f"Vote {voto_id} already processed or no commitment")
             return
+
+        # Merkle-mode events are anchored per epoch by anchor_merkle_epochs
+        from .models import EventoEleccion
+        if EventoEleccion.objects.filter(id=voto.evento_id, modo_anclaje='merkle').exists():
+            logger.info(f"Vote {voto_id} belongs to a Merkle-anchored event, skipping")
+            return
         
+        # Duplicate pre-check against the local CommitmentStored index (no RPC)
+        from .commitment_indexer import lookup_commitment
+        existe, bloque = lookup_commitment(voto.commitment)
+        if existe:
+            voto.onchain_status = 'exists'
+            voto.onchain_status_at = timezone.now()
+            voto.block_number = bloque
+            voto.save(update_fields=['onchain_status', 'onchain_status_at', 'block_number'])
+            logger.info(f"Vote {voto_id} commitment already on-chain at block {bloque}, not resent")
+            return "Exists"
+
         logger.info(f"Processing vote {voto_id} with commitment {voto.commitment[:10]}...")
         
         # Try to initialize blockchain connection
+        blockchain = None
         try:
-            blockchain = create_voting_blockchain()
+            blockchain = get_voting_blockchain()
             
             # Send commitment to chain
-            result = blockchain.send_commitment_to_chain(voto.commitment, wait_for_receipt=True)
+            # With the receipt watcher enabled the vote stays 'sent' until its block is seen
+            result = blockchain.send_commitment_to_chain(
+                voto.commitment, wait_for_receipt=not _receipt_watcher_enabled()
+            )
             
             # Update vote with result
             voto.onchain_status = result['status']
+            voto.onchain_status_at = timezone.now()
             voto.tx_hash = result['tx_hash']
+            voto.commitment_sender = result['sender']
             if result.get('block_number'):
                 voto.block_number = result['block_number']
-            voto.save()
+            voto.save(update_fields=['onchain_status', 'onchain_status_at', 'tx_hash', 'commitment_sender', 'block_number'])
             
             logger.info(
                 f"Vote {voto_id} sent successfully. "
@@ -65,23 +94,22 @@ def send_vote_to_blockchain(self, voto_id):
             )
             return f"Success: {result['tx_hash']}"
             
-        except ValueError as e:
-            # Blockchain not configured
-            logger.warning(f"Blockchain not configured: {str(e)}")
-            # For demo purposes, mark as simulated
-            voto.onchain_status = 'simulated'
-            voto.tx_hash = f"0x{uuid.uuid4().hex[:32]}"  # Fake tx hash for demo
-            voto.block_number = 999999  # Fake block number
-            voto.save()
-            
-            logger.info(f"Vote {voto_id} marked as simulated (demo mode)")
-            return "Simulated (demo mode - blockchain not configured)"
+        except BlockchainNotConfigured as e:
+            # Nothing to send to: the vote stays 'pending' until a backend is configured
+            # (BLOCKCHAIN_BACKEND=simulated runs the whole pipeline without a testnet)
+            logger.warning(f"Blockchain not configured, vote {voto_id} left pending: {str(e)}")
+            return "Skipped (blockchain not configured)"
         
         except Exception as e:
             logger.warning(f"Failed to send vote {voto_id}: {str(e)}")
+            reset_voting_blockchain_on_error(blockchain, e)
             # Retry with exponential backoff
             raise self.retry(exc=e, countdown=60 * (self.request.retries + 1))
     
+    except Retry:
+        # Retry scheduled: the vote stays in its current state until the next attempt
+        raise
+
     except Exception as e:
         logger.error(f"Task error for vote {voto_id}: {str(e)}")
         # Final failure: mark as failed
@@ -89,8 +117,656 @@ def send_vote_to_blockchain(self, voto_id):
             from .models import Voto
             voto = Voto.objects.get(id=voto_id)
             voto.onchain_status = 'failed'
-            voto.save()
+            voto.onchain_status_at = timezone.now()
+            voto.save(update_fields=['onchain_status', 'onchain_status_at'])
         except Exception:
             pass
-            pass
         raise
+
+
+def _claim_pending_batch(batch_size, window_seconds):
+    """
+    Claim up to `batch_size` pending votes by moving them to 'sent'.
+    Returns [] while the batch is not full and the oldest vote is younger
+    than the time window. skip_locked lets several workers drain in parallel.
+    """
+    from datetime import timedelta
+    from django.db import transaction
+    from django.utils import timezone
+    from .models import EventoEleccion, Voto
+
+    with transaction.atomic():
+        # The event filter is a subquery, not a join: FOR UPDATE would also lock the
+        # joined event row, making other drainers skip the whole event and making
+        # new votes of the event wait on their foreign key check
+        rows = list(
+            Voto.objects.select_for_update(skip_locked=True)
+            .filter(onchain_status='pending', tx_hash__isnull=True, commitment__isnull=False,
+                    evento_id__in=EventoEleccion.objects.filter(modo_anclaje='commitment').values('id'))
+            .order_by('time_stamp')
+            .values_list('id', 'time_stamp')[:batch_size]
+        )
+        if not rows:
+            return []
+        if len(rows) < batch_size and rows[0][1] > timezone.now() - timedelta(seconds=window_seconds):
+            return []
+
+        ids = [row[0] for row in rows]
+        Voto.objects.filter(id__in=ids).update(onchain_status='sent', onchain_status_at=timezone.now())
+    return ids
+
+
+def _prepare_vote_batch(voto_ids):
+    """
+    Load the votes of a claimed batch and settle those the local index already
+    has on-chain. Returns (votes still to send, total votes in the batch).
+    """
+    from .models import Voto
+    from .commitment_indexer import indexed_commitments
+
+    votos = list(Voto.objects.filter(id__in=voto_ids).only('id', 'commitment'))
+    total = len(votos)
+
+    # Commitments the local index already has on-chain are settled without a transaction
+    ya_indexados = indexed_commitments(v.commitment for v in votos)
+    if ya_indexados:
+        existentes = [v for v in votos if v.commitment.lower() in ya_indexados]
+        ahora = timezone.now()
+        for voto in existentes:
+            voto.onchain_status = 'exists'
+            voto.onchain_status_at = ahora
+            voto.block_number = ya_indexados[voto.commitment.lower()]
+        Voto.objects.bulk_update(existentes, ['onchain_status', 'onchain_status_at', 'block_number'], batch_size=500)
+        votos = [v for v in votos if v.commitment.lower() not in ya_indexados]
+    return votos, total
+
+
+def _return_votes_to_pending(votos, error):
+    from .models import Voto
+
+    # Nothing reached the chain (or we cannot tell): give the votes back to the queue
+    logger.warning(f"Batch of {len(votos)} votes not sent, returning to pending: {error}")
+    Voto.objects.filter(id__in=[v.id for v in votos], onchain_status='sent').update(
+        onchain_status='pending', onchain_status_at=timezone.now()
+    )
+
+
+def _store_batch_result(votos, result):
+    """
+    Write the outcome of one storeCommitments transaction to its votes.
+    Every field in the bulk_update is assigned on every vote: the votes come
+    from .only('id', 'commitment') and a deferred field would cost one query each.
+    """
+    from .models import Voto
+    from .commitment_indexer import indexed_commitments
+
+    sender = result['sender']
+    stored = result.get('stored')
+    ahora = timezone.now()
+    skipped = []
+    for voto in votos:
+        voto.onchain_status_at = ahora
+        if result['status'] == 'failed':
+            voto.onchain_status = 'failed'
+        elif stored is None:
+            voto.onchain_status = 'sent'
+        elif voto.commitment.lower() in stored:
+            voto.onchain_status = 'success'
+        else:
+            # Already on-chain from an earlier transaction: the contract skipped it.
+            # Not this transaction's vote; its block comes from the local index if known
+            voto.onchain_status = 'exists'
+            voto.tx_hash = None
+            voto.commitment_sender = None
+            skipped.append(voto)
+            continue
+        voto.tx_hash = result['tx_hash']
+        voto.block_number = result.get('block_number')
+        voto.commitment_sender = sender
+
+    if skipped:
+        bloques = indexed_commitments(v.commitment for v in skipped)
+        for voto in skipped:
+            voto.block_number = bloques.get(voto.commitment.lower())
+
+    Voto.objects.bulk_update(
+        votos, ['onchain_status', 'onchain_status_at', 'tx_hash', 'block_number', 'commitment_sender'],
+        batch_size=500,
+    )
+    logger.info(
+        f"Batch of {len(votos)} votes -> {result['status']}. "
+        f"TxHash: {result['tx_hash']}, Block: {result.get('block_number')}"
+    )
+
+
+def _submit_vote_batch(voto_ids):
+    """Send the commitments of `voto_ids` in one transaction and store the outcome per vote."""
+    from .web3_utils import get_voting_blockchain, reset_voting_blockchain_on_error
+
+    votos, total = _prepare_vote_batch(voto_ids)
+    if not votos:
+        return total
+    commitments = list(dict.fromkeys(v.commitment for v in votos))
+
+    blockchain = None
+    try:
+        blockchain = get_voting_blockchain()
+        result = blockchain.send_commitments_batch(
+            commitments, wait_for_receipt=not _receipt_watcher_enabled()
+        )
+    except Exception as e:
+        reset_voting_blockchain_on_error(blockchain, e)
+        _return_votes_to_pending(votos, str(e))
+        return 0
+
+    _store_batch_result(votos, result)
+    return total
+
+
+def _submit_vote_batches(batches):
+    """
+    Send several claimed batches at once (receipt watcher mode): their
+    transactions are signed together by the client's signing pool and only
+    broadcast afterwards. Returns the number of votes settled or sent.
+    """
+    from .web3_utils import get_voting_blockchain, reset_voting_blockchain_on_error
+
+    prepared = []
+    settled = 0
+    for voto_ids in batches:
+        votos, total = _prepare_vote_batch(voto_ids)
+        if votos:
+            prepared.append((votos, total))
+        else:
+            settled += total
+    if not prepared:
+        return settled
+
+    blockchain = None
+    try:
+        blockchain = get_voting_blockchain()
+        results = blockchain.send_commitments_batches(
+            [list(dict.fromkeys(v.commitment for v in votos)) for votos, _ in prepared]
+        )
+    except Exception as e:
+        reset_voting_blockchain_on_error(blockchain, e)
+        for votos, _ in prepared:
+            _return_votes_to_pending(votos, str(e))
+        return settled
+
+    for (votos, total), result in zip(prepared, results):
+        if result['status'] == 'error':
+            _return_votes_to_pending(votos, result['error'])
+            continue
+        _store_batch_result(votos, result)
+        settled += total
+    return settled
+
+
+@shared_task
+def drain_pending_votes(max_batches=20):
+    """
+    Periodic task (Celery beat) for BLOCKCHAIN_VOTE_SUBMIT_MODE='batch'.
+    Groups 'pending' votes into storeCommitments transactions of up to
+    BLOCKCHAIN_BATCH_SIZE commitments, or fewer once the oldest vote has
+    waited BLOCKCHAIN_BATCH_WINDOW_SECONDS.
+    """
+    from django.conf import settings
+
+    if getattr(settings, 'BLOCKCHAIN_VOTE_SUBMIT_MODE', 'sync') != 'batch':
+        return "Skipped (submit mode is not 'batch')"
+
+    batch_size = settings.BLOCKCHAIN_BATCH_SIZE
+    window = settings.BLOCKCHAIN_BATCH_WINDOW_SECONDS
+
+    if _receipt_watcher_enabled():
+        # Nobody waits for receipts: claim every ready batch and sign them together
+        claimed = []
+        while len(claimed) < max_batches:
+            voto_ids = _claim_pending_batch(batch_size, window)
+            if not voto_ids:
+                break
+            claimed.append(voto_ids)
+        votes = _submit_vote_batches(claimed) if claimed else 0
+        return f"{len(claimed)} batches, {votes} votes"
+
+    batches = 0
+    votes = 0
+    while batches < max_batches:
+        voto_ids = _claim_pending_batch(batch_size, window)
+        if not voto_ids:
+            break
+        votes += _submit_vote_batch(voto_ids)
+        batches += 1
+
+    return f"{batches} batches, {votes} votes"
+
+
+def _claim_votes(voto_ids):
+    """
+    Claim the given votes that are still pending (commitment-mode events only)
+    by moving them to 'sent' in one UPDATE. Returns the claimed ids.
+    """
+    from django.db import transaction
+    from .models import EventoEleccion, Voto
+
+    with transaction.atomic():
+        # Subquery instead of a join, so the event row is not locked (see _claim_pending_batch)
+        ids = list(
+            Voto.objects.select_for_update(skip_locked=True)
+            .filter(id__in=voto_ids, onchain_status='pending', tx_hash__isnull=True, commitment__isnull=False,
+                    evento_id__in=EventoEleccion.objects.filter(modo_anclaje='commitment').values('id'))
+            .values_list('id', flat=True)
+        )
+        if ids:
+            Voto.objects.filter(id__in=ids).update(onchain_status='sent', onchain_status_at=timezone.now())
+    return ids
+
+
+@shared_task
+def send_votes_to_blockchain(voto_ids):
+    """
+    Batch variant of send_vote_to_blockchain: claim every still-pending vote in
+    `voto_ids` with one query and send their commitments in storeCommitments
+    transactions of up to BLOCKCHAIN_BATCH_SIZE through the process-wide
+    client. Results are written back with bulk_update (see _store_batch_result);
+    ids already sent, settled or unknown are skipped.
+    """
+    from django.conf import settings
+
+    ids = _claim_votes(list(dict.fromkeys(str(v) for v in voto_ids)))
+    if not ids:
+        return "0 votes"
+
+    batch_size = settings.BLOCKCHAIN_BATCH_SIZE
+    batches = [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)]
+    if _receipt_watcher_enabled():
+        votes = _submit_vote_batches(batches)
+    else:
+        votes = sum(_submit_vote_batch(batch) for batch in batches)
+    return f"{len(batches)} batches, {votes} votes"
+
+
+@shared_task
+def drain_vote_queue(max_votes=5000):
+    """
+    Periodic task (Celery beat) for BLOCKCHAIN_VOTE_SUBMIT_MODE='async': pop
+    vote ids pushed by the view to the Redis queue (elecciones.vote_queue) and
+    send them with send_votes_to_blockchain in this worker, up to `max_votes`
+    per run.
+    """
+    from django.conf import settings
+    from .vote_queue import pop_votes, vote_queue_available
+
+    if not vote_queue_available():
+        return "Skipped (vote queue not configured)"
+
+    # Enough ids per round to fill the transactions one run signs together
+    chunk = settings.BLOCKCHAIN_BATCH_SIZE * 20
+    popped = 0
+    results = []
+    while popped < max_votes:
+        try:
+            ids = pop_votes(min(chunk, max_votes - popped))
+        except Exception as e:
+            # The votes stay 'pending' in the database; the next run retries
+            logger.warning(f"Vote queue unavailable: {str(e)}")
+            break
+        if not ids:
+            break
+        popped += len(ids)
+        results.append(send_votes_to_blockchain(ids))
+
+    return f"{popped} ids popped: {'; '.join(results) or 'nothing to send'}"
+
+
+def _close_merkle_epoch(evento_id, epoch_size, window_seconds, force=False):
+    """
+    Assign the next epoch of pending votes of a Merkle-mode event: build the
+    tree over at most `epoch_size` votes and store each vote's proof.
+    Reads the Voto table one epoch at a time, so memory stays bounded by
+    `epoch_size` whatever the event size. Returns the new EpocaMerkle, or None
+    while the epoch is not full and its oldest vote is within the time window
+    (unless `force`).
+    """
+    from datetime import timedelta
+    from django.db import transaction
+    from django.db.models import Max
+    from django.utils import timezone
+    from .merkle import MerkleTree
+    from .models import EpocaMerkle, SecuenciaEpocas, Voto
+
+    # Created outside the transaction so two workers racing on the first epoch do not abort it
+    if not SecuenciaEpocas.objects.filter(evento_id=evento_id).exists():
+        ultima = EpocaMerkle.objects.filter(evento_id=evento_id).aggregate(Max('numero'))['numero__max'] or 0
+        SecuenciaEpocas.objects.get_or_create(evento_id=evento_id, defaults={'ultima_epoca': ultima})
+
+    with transaction.atomic():
+        # Serialize epoch numbering per event on its own row: locking the event row
+        # would stall every vote INSERT of the event (foreign key check) meanwhile
+        secuencia = SecuenciaEpocas.objects.select_for_update().get(evento_id=evento_id)
+
+        rows = list(
+            Voto.objects.filter(
+                evento_id=evento_id, onchain_status='pending',
+                epoca_merkle__isnull=True, commitment__isnull=False
+            )
+            .order_by('time_stamp', 'id')
+            .values_list('id', 'commitment', 'time_stamp')[:epoch_size]
+        )
+        if not rows:
+            return None
+        if not force and len(rows) < epoch_size and rows[0][2] > timezone.now() - timedelta(seconds=window_seconds):
+            return None
+
+        tree = MerkleTree([row[1] for row in rows])
+        numero = secuencia.ultima_epoca + 1
+        SecuenciaEpocas.objects.filter(pk=secuencia.pk).update(ultima_epoca=numero)
+        epoca = EpocaMerkle.objects.create(
+            evento_id=evento_id, numero=numero, raiz=tree.root, total_hojas=len(tree)
+        )
+        Voto.objects.bulk_update(
+            [
+                Voto(id=row[0], epoca_merkle=epoca, merkle_indice=i, merkle_prueba=tree.proof(i))
+                for i, row in enumerate(rows)
+            ],
+            ['epoca_merkle', 'merkle_indice', 'merkle_prueba'],
+            batch_size=500,
+        )
+
+    logger.info(f"Merkle epoch {numero} for event {evento_id}: {len(tree)} votes, root {tree.root}")
+    return epoca
+
+
+def _anchor_epoch(epoca, blockchain):
+    """Anchor the epoch root on-chain and propagate the outcome to its votes."""
+    from .models import Voto
+
+    result = blockchain.anchor_merkle_root(
+        epoca.raiz, epoca.total_hojas, wait_for_receipt=not _receipt_watcher_enabled()
+    )
+
+    epoca.tx_hash = result['tx_hash']
+    epoca.block_number = result.get('block_number')
+    epoca.onchain_status = result['status']
+    epoca.save(update_fields=['tx_hash', 'block_number', 'onchain_status'])
+
+    Voto.objects.filter(epoca_merkle=epoca).update(
+        onchain_status=result['status'],
+        onchain_status_at=timezone.now(),
+        tx_hash=result['tx_hash'],
+        block_number=result.get('block_number'),
+        commitment_sender=result['sender'],
+    )
+    logger.info(f"Merkle epoch {epoca.id} anchored -> {result['status']}. TxHash: {result['tx_hash']}")
+
+
+@shared_task
+def anchor_merkle_epochs(max_epochs=20):
+    """
+    Periodic task (Celery beat) for events with modo_anclaje='merkle'.
+    Closes epochs of MERKLE_EPOCH_SIZE pending votes (or fewer after
+    MERKLE_EPOCH_WINDOW_SECONDS, or once the event ended) and anchors their
+    roots. Epochs whose anchor transaction was never sent are retried first.
+    """
+    from django.conf import settings
+    from django.utils import timezone
+    from .models import EpocaMerkle, Voto
+    from .web3_utils import get_voting_blockchain, reset_voting_blockchain_on_error
+
+    try:
+        blockchain = get_voting_blockchain()
+    except Exception as e:
+        logger.warning(f"Blockchain unavailable, Merkle epochs not anchored: {str(e)}")
+        return "Skipped (blockchain unavailable)"
+
+    anchored = 0
+    for epoca in EpocaMerkle.objects.filter(onchain_status='pending').order_by('created_at')[:max_epochs]:
+        try:
+            _anchor_epoch(epoca, blockchain)
+            anchored += 1
+        except Exception as e:
+            logger.warning(f"Failed to anchor Merkle epoch {epoca.id}: {str(e)}")
+            reset_voting_blockchain_on_error(blockchain, e)
+
+    ahora = timezone.now()
+    eventos = (
+        Voto.objects.filter(
+            evento__modo_anclaje='merkle', onchain_status='pending', epoca_merkle__isnull=True
+        )
+        .values_list('evento_id', 'evento__fecha_termino')
+        .distinct()
+    )
+    for evento_id, fecha_termino in eventos:
+        while anchored < max_epochs:
+            epoca = _close_merkle_epoch(
+                evento_id,
+                settings.MERKLE_EPOCH_SIZE,
+                settings.MERKLE_EPOCH_WINDOW_SECONDS,
+                force=fecha_termino <= ahora,
+            )
+            if epoca is None:
+                break
+            try:
+                _anchor_epoch(epoca, blockchain)
+            except Exception as e:
+                # The epoch keeps its proofs; the next run retries the anchor
+                logger.warning(f"Failed to anchor Merkle epoch {epoca.id}: {str(e)}")
+                reset_voting_blockchain_on_error(blockchain, e)
+                break
+            anchored += 1
+
+    return f"{anchored} epochs anchored"
+
+
+@shared_task
+def watch_receipts():
+    """
+    Periodic task (Celery beat): resolve every 'sent' vote and Merkle epoch
+    from the receipts of newly mined blocks (see elecciones.receipt_watcher).
+    """
+    from django.conf import settings
+    from .receipt_watcher import watch_receipts_once
+    from .web3_utils import get_voting_blockchain, reset_voting_blockchain_on_error
+
+    if not _receipt_watcher_enabled():
+        return "Skipped (receipt watcher disabled)"
+
+    blockchain = None
+    try:
+        blockchain = get_voting_blockchain()
+        result = watch_receipts_once(
+            blockchain,
+            max_blocks=settings.BLOCKCHAIN_WATCHER_MAX_BLOCKS,
+            lookback=settings.BLOCKCHAIN_WATCHER_LOOKBACK_BLOCKS,
+            lag=settings.BLOCKCHAIN_WATCHER_LAG_BLOCKS,
+        )
+    except Exception as e:
+        logger.warning(f"Receipt watcher run failed: {str(e)}")
+        reset_voting_blockchain_on_error(blockchain, e)
+        return "Failed"
+
+    return f"Blocks {result['from_block']}-{result['to_block']}: {result['resolved']} votes resolved"
+
+
+@shared_task
+def sync_commitment_index():
+    """
+    Periodic task (Celery beat): copy new CommitmentStored events into
+    CommitmentIndexado (see elecciones.commitment_indexer).
+    """
+    from django.conf import settings
+    from .commitment_indexer import sync_commitment_index as sync_index
+    from .web3_utils import get_voting_blockchain, reset_voting_blockchain_on_error
+
+    blockchain = None
+    try:
+        blockchain = get_voting_blockchain()
+        result = sync_index(
+            blockchain,
+            start_block=settings.VOTING_REGISTRY_DEPLOY_BLOCK,
+            max_range=settings.COMMITMENT_INDEX_MAX_RANGE,
+            lag=settings.BLOCKCHAIN_WATCHER_LAG_BLOCKS,
+        )
+    except Exception as e:
+        logger.warning(f"Commitment index sync failed: {str(e)}")
+        reset_voting_blockchain_on_error(blockchain, e)
+        return "Failed"
+
+    return f"Blocks {result['from_block']}-{result['to_block']}: {result['indexed']} commitments indexed"
+
+
+@shared_task
+def replace_stuck_transactions():
+    """
+    Periodic task (Celery beat): re-send transactions pending for too many
+    blocks at the same nonce with bumped fees (see elecciones.tx_replacement).
+    """
+    from django.conf import settings
+    from .tx_replacement import replace_stuck_transactions as replace_stuck
+    from .web3_utils import get_voting_blockchain, reset_voting_blockchain_on_error
+
+    if not settings.BLOCKCHAIN_TX_REPLACEMENT:
+        return "Skipped (transaction replacement disabled)"
+
+    blockchain = None
+    try:
+        blockchain = get_voting_blockchain()
+        result = replace_stuck(
+            blockchain,
+            stuck_blocks=settings.BLOCKCHAIN_STUCK_TX_BLOCKS,
+            bump_percent=settings.BLOCKCHAIN_FEE_BUMP_PERCENT,
+            max_escalation=settings.BLOCKCHAIN_MAX_FEE_ESCALATION,
+        )
+    except Exception as e:
+        logger.warning(f"Stuck transaction replacement failed: {str(e)}")
+        reset_voting_blockchain_on_error(blockchain, e)
+        return "Failed"
+
+    return f"{result['replaced']} replaced, {result['mined']} mined, {result['capped']} at fee cap"
+
+
+@shared_task
+def confirm_votes():
+    """
+    Periodic task (Celery beat): promote 'success' votes whose block is
+    BLOCKCHAIN_CONFIRMATION_DEPTH blocks deep to 'confirmed' and resubmit the
+    ones a reorg dropped (see elecciones.confirmation_tracker).
+    """
+    from django.conf import settings
+    from django.db import transaction
+    from .confirmation_tracker import confirm_votes_once
+    from .web3_utils import get_voting_blockchain, reset_voting_blockchain_on_error
+
+    blockchain = None
+    try:
+        blockchain = get_voting_blockchain()
+        result = confirm_votes_once(
+            blockchain,
+            depth=settings.BLOCKCHAIN_CONFIRMATION_DEPTH,
+            max_blocks=settings.BLOCKCHAIN_CONFIRMATION_MAX_BLOCKS,
+        )
+    except Exception as e:
+        logger.warning(f"Confirmation tracker run failed: {str(e)}")
+        reset_voting_blockchain_on_error(blockchain, e)
+        return "Failed"
+
+    # In batch mode drain_pending_votes picks the re-queued votes up by itself
+    if result['requeued'] and getattr(settings, 'BLOCKCHAIN_VOTE_SUBMIT_MODE', 'sync') != 'batch':
+        for voto_id in result['requeued']:
+            transaction.on_commit(lambda voto_id=voto_id: send_vote_to_blockchain.delay(str(voto_id)))
+
+    return (
+        f"{result['blocks']} blocks up to {result['safe_block']}: {result['confirmed']} votes confirmed, "
+        f"{len(result['requeued'])} re-queued"
+    )
+
+
+def resubmit_votes(voto_ids):
+    """Send votes reset to 'pending' again: batch mode drains them by itself, otherwise one task per chunk."""
+    from django.conf import settings
+
+    if not voto_ids or getattr(settings, 'BLOCKCHAIN_VOTE_SUBMIT_MODE', 'sync') == 'batch':
+        return
+    chunk = settings.BLOCKCHAIN_BATCH_SIZE * 20
+    ids = [str(v) for v in voto_ids]
+    for i in range(0, len(ids), chunk):
+        try:
+            send_votes_to_blockchain.delay(ids[i:i + chunk])
+        except Exception:
+            # The votes stay 'pending': the next sweep resubmits them
+            logger.exception(f"Could not enqueue {len(ids[i:i + chunk])} votes for resubmission")
+
+
+@shared_task
+def sweep_votes():
+    """
+    Periodic task (Celery beat): reconcile votes stuck in 'pending', 'sent',
+    'failed' or 'simulated' against the chain and resubmit the ones that are
+    not on-chain (see elecciones.vote_sweeper). Logs a warning when the oldest
+    unsettled vote is older than BLOCKCHAIN_VOTE_SLA_SECONDS.
+    """
+    from django.conf import settings
+    from .vote_sweeper import sweep_votes_once, unsettled_ages
+    from .web3_utils import get_voting_blockchain, reset_voting_blockchain_on_error
+
+    ages = unsettled_ages()
+    oldest = max(ages.values(), default=0)
+    if oldest > settings.BLOCKCHAIN_VOTE_SLA_SECONDS:
+        logger.warning(
+            f"Vote SLA breached: oldest unsettled vote is {oldest:.0f}s old "
+            f"({', '.join(f'{k}={v:.0f}s' for k, v in ages.items())})"
+        )
+
+    blockchain = None
+    try:
+        blockchain = get_voting_blockchain()
+        result = sweep_votes_once(
+            blockchain,
+            grace_seconds=settings.BLOCKCHAIN_SWEEPER_GRACE_SECONDS,
+            max_rows=settings.BLOCKCHAIN_SWEEPER_MAX_ROWS,
+        )
+    except Exception as e:
+        logger.warning(f"Vote sweep failed: {str(e)}")
+        reset_voting_blockchain_on_error(blockchain, e)
+        return "Failed"
+
+    resubmit_votes(result['resubmit'])
+    return (
+        f"{result['scanned']} scanned, {result['fixed']} found on-chain, {len(result['resubmit'])} resubmitted, "
+        f"oldest unsettled {oldest:.0f}s"
+    )
+
+
+@shared_task
+def consolidate_results():
+    """
+    Periodic task (Celery beat): incrementally recount into Resultado the
+    events with recent votes (see elecciones.tally.recount_event).
+    """
+    from .tally import recount_recent_events
+
+    eventos = recount_recent_events()
+    return f"{eventos} events recounted"
+
+
+@shared_task
+def advance_event_phases():
+    """
+    Periodic task (Celery beat): open and close the events whose dates have
+    passed, and schedule advance_event_phase at the exact time of the starts
+    and ends due before the next run (see elecciones.event_lifecycle).
+    """
+    from .event_lifecycle import advance_phases, schedule_upcoming
+
+    result = advance_phases()
+    scheduled = schedule_upcoming()
+    return f"{result['opened']} opened, {result['closed']} closed, {scheduled} phase changes scheduled"
+
+
+@shared_task
+def advance_event_phase(evento_id):
+    """Set one event's phase from its dates (scheduled with eta at its start or end)."""
+    from .event_lifecycle import sync_event_phase
+
+    return sync_event_phase(evento_id)
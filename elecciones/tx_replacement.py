@@ -0,0 +1,159 @@
+"""
+Stuck-transaction detection and fee-bump replacement.
+
+Every transaction the server wallets broadcast is recorded in
+TransaccionEnviada (record_sent_transaction, called by VotingBlockchain).
+A transaction that is still unmined `stuck_blocks` after it was sent holds
+its nonce, and every later transaction from that wallet waits behind it.
+replace_stuck_transactions re-signs it with the same nonce, calldata and gas
+and fees raised by a percentage, so the node replaces it in the mempool:
+
+- Mined or not is read from the sender's confirmed transaction count (one
+  RPC per wallet): rows below it are marked 'mined', whichever hash won.
+- Fees never rise above `max_escalation` times the first submission's. Once
+  a further bump would be under the 10% nodes require, the row is marked
+  'capped' and left alone.
+- The new hash replaces the old one on the Voto / EpocaMerkle rows that
+  referenced it. The old hash is kept in `hashes_anteriores`, and the receipt
+  watcher also looks for it, because the original can still be mined first.
+  The watcher is the only component that follows superseded hashes, so
+  BLOCKCHAIN_TX_REPLACEMENT requires BLOCKCHAIN_RECEIPT_WATCHER (system check
+  elecciones.E001); without it such a vote would stay 'sent' under a hash
+  that never lands.
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+FEE_FIELDS = ('maxFeePerGas', 'maxPriorityFeePerGas', 'gasPrice')
+
+# Minimum increase (percent) nodes accept for a same-nonce replacement
+MIN_REPLACEMENT_BUMP_PERCENT = 10
+
+
+def record_sent_transaction(tx: Dict[str, Any], tx_hash: str, block_number: Optional[int]) -> None:
+    """Store a broadcast transaction so it can be replaced if it gets stuck."""
+    from django.conf import settings
+    from .models import TransaccionEnviada
+
+    if not getattr(settings, 'BLOCKCHAIN_TX_REPLACEMENT', False):
+        return
+    fees = {field: int(tx[field]) for field in FEE_FIELDS if field in tx}
+    TransaccionEnviada.objects.create(
+        tx_hash=tx_hash,
+        remitente=tx['from'],
+        nonce=tx['nonce'],
+        destino=tx['to'],
+        datos=tx['data'],
+        gas=tx['gas'],
+        tarifas=fees,
+        tarifas_iniciales=fees,
+        bloque_envio=block_number,
+    )
+
+
+def _is_bump_possible(current: Dict[str, int], bumped: Dict[str, int]) -> bool:
+    return all(
+        bumped[field] * 100 >= current[field] * (100 + MIN_REPLACEMENT_BUMP_PERCENT)
+        for field in current
+    )
+
+
+def _replace(blockchain, row, head: int, bump_percent: float, max_escalation: float) -> Optional[str]:
+    """Send the replacement for `row`; returns 'replaced', 'capped', 'mined' or None (error)."""
+    from .models import EpocaMerkle, TransaccionEnviada, Voto
+
+    ceiling = {field: int(value * max_escalation) for field, value in row.tarifas_iniciales.items()}
+    fees = blockchain.fee_oracle.bump(row.tarifas, bump_percent, ceiling)
+    if not _is_bump_possible(row.tarifas, fees):
+        logger.warning(
+            f"Transaction {row.tx_hash} (nonce {row.nonce} of {row.remitente}) is still pending "
+            f"at the fee cap ({max_escalation}x the original fees)"
+        )
+        TransaccionEnviada.objects.filter(pk=row.pk).update(estado='capped')
+        return 'capped'
+
+    try:
+        new_hash = blockchain.replace_transaction(
+            row.remitente, row.nonce, row.destino, row.datos, row.gas, fees
+        )
+    except Exception as e:
+        message = str(e).lower()
+        if 'nonce too low' in message:
+            # Mined between the nonce check and the replacement
+            TransaccionEnviada.objects.filter(pk=row.pk).update(estado='mined')
+            return 'mined'
+        logger.warning(f"Replacement of {row.tx_hash} failed: {e}")
+        return None
+
+    with transaction.atomic():
+        TransaccionEnviada.objects.filter(pk=row.pk).update(
+            tx_hash=new_hash,
+            hashes_anteriores=row.hashes_anteriores + [row.tx_hash],
+            tarifas=fees,
+            bloque_envio=head,
+            reemplazos=F('reemplazos') + 1,
+        )
+        Voto.objects.filter(tx_hash=row.tx_hash, onchain_status='sent').update(
+            tx_hash=new_hash, onchain_status_at=timezone.now()
+        )
+        EpocaMerkle.objects.filter(tx_hash=row.tx_hash, onchain_status='sent').update(tx_hash=new_hash)
+    logger.info(f"Replaced stuck transaction {row.tx_hash} (nonce {row.nonce}) with {new_hash}: {fees}")
+    return 'replaced'
+
+
+def replace_stuck_transactions(blockchain, stuck_blocks=10, bump_percent=15.0, max_escalation=3.0,
+                               limit=500) -> Dict[str, int]:
+    """
+    Mark mined transactions and replace those pending for `stuck_blocks` or more.
+
+    Args:
+        blockchain: VotingBlockchain holding the keys of the recorded senders
+        stuck_blocks: Blocks a transaction may stay unmined before it is replaced
+        bump_percent: Fee increase per replacement (at least 10)
+        max_escalation: Ceiling for the fees, as a multiple of the first submission's
+        limit: Pending rows examined per run
+
+    Returns:
+        Dict with mined, replaced and capped counts
+    """
+    from .models import TransaccionEnviada
+
+    senders = [lane.address for lane in blockchain.lanes]
+    rows = list(
+        TransaccionEnviada.objects.filter(estado='pending', remitente__in=senders)
+        .order_by('remitente', 'nonce')[:limit]
+    )
+    result = {'mined': 0, 'replaced': 0, 'capped': 0}
+    if not rows:
+        return result
+
+    head = blockchain.w3.eth.block_number
+    # Sent while no fee quote carried the block number: start counting now
+    unknown = [row.pk for row in rows if row.bloque_envio is None]
+    if unknown:
+        TransaccionEnviada.objects.filter(pk__in=unknown).update(bloque_envio=head)
+
+    confirmed = {}
+    for sender in {row.remitente for row in rows}:
+        confirmed[sender] = blockchain.w3.eth.get_transaction_count(sender, 'latest')
+
+    mined = [row.pk for row in rows if row.nonce < confirmed[row.remitente]]
+    if mined:
+        result['mined'] = TransaccionEnviada.objects.filter(pk__in=mined).update(estado='mined')
+
+    for row in rows:
+        if row.nonce < confirmed[row.remitente] or row.bloque_envio is None:
+            continue
+        if head - row.bloque_envio < stuck_blocks:
+            continue
+        outcome = _replace(blockchain, row, head, bump_percent, max_escalation)
+        if outcome:
+            result[outcome] += 1
+    return result
@@ -24,7 +24,6 @@ from .models import (
     Resultado
 )
 from django.utils import timezone
-from datetime import datetime
 logger = logging.getLogger(__name__)
 import os
 import logging
@@ -34,39 +33,150 @@ from django.views.decorators.csrf import csrf_exempt
 # ============================================================================
 # FUNCIÓN AUXILIAR: Recalcular resultados de un evento
 # ============================================================================
-def recalcular_resultados_evento(evento_id):
+def recalcular_resultados_evento(evento_id, completo=False):
     """
     Recalcula los resultados de un evento específico desde la tabla de votos.
-    Útil para sincronizar después de migraciones o correcciones.
+    Por defecto solo cuenta los votos posteriores a la última marca de recuento;
+    con completo=True recuenta todo en una generación nueva de Resultado y la
+    activa de una vez (útil después de migraciones o correcciones).
+    """
+    from .tally import recount_event
+
+    resultado = recount_event(evento_id, full=completo)
+    logger.info(
+        f"Resultados recalculados para evento {evento_id} "
+        f"({resultado['mode']}, {resultado['votes']} votos, generación {resultado['generation']})"
+    )
+    return resultado
+
+
+# ============================================================================
+# FUNCIÓN AUXILIAR: Admisión y escritura de un voto
+# ============================================================================
+def admitir_voto(evento_id, votante_id, candidato_id):
+    """
+    Lee en una sola consulta todo lo que la admisión de un voto necesita:
+    la participación del votante (bloqueada con SELECT ... FOR UPDATE hasta
+    el fin de la transacción), los datos del evento, la clave del votante y
+    si `candidato_id` es candidato del evento. Devuelve None si el votante
+    no está invitado. Debe llamarse dentro de transaction.atomic().
+    """
+    from django.db.models import Exists, OuterRef
+
+    # Solo la fila de participación: sin OF, MySQL bloquearía también la fila del evento
+    # (que comparten todos los votantes) y serializaría el evento entero
+    of = ('self',) if connection.features.has_select_for_update_of else ()
+    return (
+        ParticipacionEleccion.objects.select_for_update(of=of)
+        .filter(evento_id=evento_id, persona_id=votante_id)
+        .annotate(es_candidato=Exists(
+            Candidatura.objects.filter(evento_id=OuterRef('evento_id'), persona_id=candidato_id)
+        ))
+        .values(
+            'id', 'ha_votado', 'es_candidato', 'persona__clave',
+            'evento__fase', 'evento__fecha_inicio', 'evento__fecha_termino', 'evento__activo',
+            'evento__modo_anclaje',
+        )
+        .first()
+    )
+
+
+def guardar_voto(evento_id, candidato_id, votante_id, participacion_id, commitment, **campos_onchain):
+    """
+    Escribe el voto con un número fijo de sentencias: INSERT del voto, UPDATE
+    de la participación y UPDATE atómico (F) de un fragmento al azar del
+    conteo del candidato (ver elecciones.tally).
+    Un segundo voto del mismo votante falla con IntegrityError por la
+    restricción voto_unico_por_votante. Debe llamarse dentro de transaction.atomic().
+    """
+    from .tally import add_vote
+
+    voto = Voto.objects.create(
+        evento_id=evento_id,
+        persona_candidato_id=candidato_id,
+        persona_votante_id=votante_id,
+        commitment=commitment,
+        **campos_onchain,
+    )
+    ParticipacionEleccion.objects.filter(id=participacion_id).update(ha_votado=True)
+    add_vote(evento_id, candidato_id)
+    return voto
+
+
+# ============================================================================
+# FUNCIÓN AUXILIAR: Registrar voto pendiente (modo asíncrono)
+# ============================================================================
+def registrar_voto_pendiente(evento_id, candidato_id, votante_id, commitment, encolar=True, participacion_id=None):
+    """
+    Guarda el voto con onchain_status='pending' en una sola transacción y
+    encola su envío a la blockchain cuando la transacción hace commit.
+    Con encolar=False el voto queda a la espera del envío por lotes.
+    La petición HTTP no espera a la cadena: el estado se consulta en voto_status.
+    Si se llama dentro de la transacción de admitir_voto, se une a ella.
     """
     from django.db import transaction
-    
-    with transaction.atomic():
-        # Eliminar resultados existentes del evento
-        Resultado.objects.filter(evento_id=evento_id).delete()
-        
-        # Contar votos por candidato
-        votos_por_candidato = Voto.objects.filter(
-            evento_id=evento_id
-        ).values('persona_candidato').annotate(
-            total=Count('id')
+    from .tasks import send_vote_to_blockchain
+    from .vote_queue import push_votes, vote_queue_available
+
+    with transaction.atomic(savepoint=False):
+        if participacion_id is None:
+            participacion_id = ParticipacionEleccion.objects.filter(
+                evento_id=evento_id, persona_id=votante_id
+            ).values_list('id', flat=True).first()
+        voto = guardar_voto(
+            evento_id, candidato_id, votante_id, participacion_id, commitment, onchain_status='pending'
         )
-        
-        # Crear nuevos registros
-        for voto_data in votos_por_candidato:
-            Resultado.objects.create(
-                evento_id=evento_id,
-                persona_candidato_id=voto_data['persona_candidato'],
-                conteo_votos=voto_data['total']
-            )
-        
-        logger.info(f"Resultados recalculados para evento {evento_id}")
+
+        def enviar_a_celery():
+            # Si el broker no responde el voto queda 'pending' en BD (no se pierde)
+            try:
+                if vote_queue_available():
+                    # drain_vote_queue lo envía junto con los demás votos de la cola
+                    push_votes([voto.id])
+                else:
+                    send_vote_to_blockchain.delay(str(voto.id))
+            except Exception:
+                logger.exception(f"No se pudo encolar el voto {voto.id} para blockchain")
+
+        if encolar:
+            transaction.on_commit(enviar_a_celery)
+
+    return voto
 
 from .models import Voto
 from django.db import connection
 
 logger = logging.getLogger(__name__)
 
+
+def _verificar_periodo_votacion(request, fase, activo, fecha_inicio, fecha_termino):
+    """
+    Comprueba que el evento está abierto a votación según su fase (la mantiene
+    al día elecciones.event_lifecycle). Devuelve la redirección con el mensaje
+    correspondiente, o None si se puede votar.
+    """
+    # Las fechas se comprueban también por si la apertura o el cierre programados
+    # aún no se han ejecutado (beat atrasado o detenido)
+    ahora = timezone.now()
+
+    # Caso A: El evento ya terminó (Pasado): nunca se acepta un voto tardío
+    if fase == EventoEleccion.FASE_CERRADO or ahora >= fecha_termino:
+        messages.error(request, "⏳ Este evento ha finalizado. El periodo de votación terminó.")
+        return redirect('panel_usuario')
+
+    # Caso B: El evento no ha empezado (Futuro)
+    if fase == EventoEleccion.FASE_PROGRAMADO and ahora < fecha_inicio:
+        messages.warning(request, f"⏳ Este evento aún no comienza. Vuelve el {timezone.localtime(fecha_inicio)}.")
+        return redirect('panel_usuario')
+
+    # Caso C: El administrador lo desactivó manualmente, aunque las fechas estén bien
+    if not activo:
+        messages.error(request, "⛔ Este evento se encuentra desactivado temporalmente.")
+        return redirect('panel_usuario')
+
+    return None
+
+
 @requiere_votante_sesion
 def votar_evento(request, evento_id):
     # 1. Validar sesión
@@ -76,229 +186,210 @@ def votar_evento(request, evento_id):
              return JsonResponse({'error': 'Sesión expirada'}, status=401)
         messages.error(request, "Tu sesión ha expirado.")
         return redirect('login_votante')
-    
-    # 2. Seguridad: Verificar lista de invitados
-    es_invitado = ParticipacionEleccion.objects.filter(
+
+    # 2. Procesar Voto (POST): admisión en una sola consulta con la participación bloqueada
+    if request.method == "POST":
+        return _procesar_voto(request, evento_id, votante_id)
+
+    # 3. Seguridad: Verificar lista de invitados y si ya votó (una consulta)
+    ha_votado = ParticipacionEleccion.objects.filter(
         evento_id=evento_id, 
         persona_id=votante_id
-    ).exists()
+    ).values_list('ha_votado', flat=True).first()
 
-    if not es_invitado:
+    if ha_votado is None:
         messages.error(request, f"⛔ No tienes permiso para votar en este evento. Votante ID: {votante_id}, Evento ID: {evento_id}")
         return redirect('panel_usuario')
 
-    # 3. Verificar si ya votó
-    ya_voto = Voto.objects.filter(evento_id=evento_id, persona_votante_id=votante_id).exists()
-    if ya_voto:
+    if ha_votado:
         messages.warning(request, "Ya has votado en este evento.")
         return redirect('panel_usuario')
     
     # 4. Cargar Evento (Lógica anti-errores de driver)
-    ev_data = EventoEleccion.objects.filter(id=evento_id).values('id', 'nombre', 'fecha_inicio', 'fecha_termino', 'activo').first()
+    ev_data = EventoEleccion.objects.filter(id=evento_id).values('id', 'nombre', 'fecha_inicio', 'fecha_termino', 'activo', 'fase').first()
     if not ev_data:
         from django.http import Http404
         messages.error(request, f"Evento no encontrado. ID: {evento_id}")
         raise Http404("Evento no encontrado")
 
-    # --- NORMALIZACIÓN DE FECHAS ---
-    fi = ev_data.get('fecha_inicio')
-    ft = ev_data.get('fecha_termino')
-    
-    # Función auxiliar para limpiar fechas con zona horaria Santiago
-    def limpiar_fecha(fecha_sucia):
-        if not fecha_sucia: return None
-        if isinstance(fecha_sucia, str):
-            try: 
-                fecha_parsed = datetime.fromisoformat(fecha_sucia)
-                if fecha_parsed.tzinfo is None:
-                    from zoneinfo import ZoneInfo
-                    santiago_tz = ZoneInfo('America/Santiago')
-                    fecha_parsed = fecha_parsed.replace(tzinfo=santiago_tz)
-                return fecha_parsed
-            except:
-                try: 
-                    fecha_parsed = datetime.strptime(fecha_sucia, '%Y-%m-%d %H:%M:%S')
-                    from zoneinfo import ZoneInfo
-                    santiago_tz = ZoneInfo('America/Santiago')
-                    return fecha_parsed.replace(tzinfo=santiago_tz)
-                except: return None
-        # Ya es datetime, asegurar zona horaria Santiago
-        if fecha_sucia.tzinfo is None:
-            from zoneinfo import ZoneInfo
-            santiago_tz = ZoneInfo('America/Santiago')
-            return fecha_sucia.replace(tzinfo=santiago_tz)
-        return fecha_sucia
-
-    start_date = limpiar_fecha(fi)
-    end_date = limpiar_fecha(ft)
-
-    # Usar timezone.now() para obtener hora actual con zona horaria de Santiago
-    ahora = timezone.now()
-    
-    # Convertir fechas del evento a la misma zona horaria para comparar
-    if start_date and start_date.tzinfo is None:
-        from zoneinfo import ZoneInfo
-        santiago_tz = ZoneInfo('America/Santiago')
-        start_date = start_date.replace(tzinfo=santiago_tz)
-    if end_date and end_date.tzinfo is None:
-        from zoneinfo import ZoneInfo
-        santiago_tz = ZoneInfo('America/Santiago')
-        end_date = end_date.replace(tzinfo=santiago_tz)
-
-    # -------------------------------------------------------------------------
-    # 🕒 LÓGICA DE TIEMPO: PASADO, FUTURO Y AUTO-CIERRE
-    # -------------------------------------------------------------------------
-    
-    # Caso A: El evento ya terminó (Pasado)
-    if end_date and ahora > end_date:
-        # 1. Si seguía activo en BD, lo apagamos automáticamente
-        if ev_data['activo']:
-            EventoEleccion.objects.filter(id=evento_id).update(activo=False)
-            logger.info(f"Evento {evento_id} cerrado automáticamente por fecha vencida.")
-        
-        messages.error(request, "⏳ Este evento ha finalizado. El periodo de votación terminó.")
-        return redirect('panel_usuario')
-
-    # Caso B: El evento no ha empezado (Futuro)
-    if start_date and ahora < start_date:
-        messages.warning(request, f"⏳ Este evento aún no comienza. Vuelve el {start_date}.")
-        return redirect('panel_usuario')
-
-    # Caso C: El administrador lo desactivó manualmente, aunque las fechas estén bien
-    if not ev_data['activo']:
-        messages.error(request, "⛔ Este evento se encuentra desactivado temporalmente.")
-        return redirect('panel_usuario')
-
-    # -------------------------------------------------------------------------
+    cerrado = _verificar_periodo_votacion(
+        request, ev_data['fase'], ev_data['activo'], ev_data['fecha_inicio'], ev_data['fecha_termino']
+    )
+    if cerrado:
+        return cerrado
 
     # Preparar objeto para el template
     evento = {
         'id': ev_data['id'],
         'nombre': ev_data['nombre'],
-        'fecha_inicio': start_date,
-        'fecha_termino': end_date,
+        'fecha_inicio': ev_data['fecha_inicio'],
+        'fecha_termino': ev_data['fecha_termino'],
     }
 
-    # 5. Cargar Candidatos
-    candidatos = []
+    # 5. Cargar Candidatos (boleta en caché, ver elecciones.ballot)
+    from .ballot import event_ballot
     try:
-        candidaturas_db = Candidatura.objects.filter(evento_id=evento_id).select_related('persona')
-        for c in candidaturas_db:
-            candidatos.append({
-                'persona': {
-                    'id': c.persona.id, 
-                    'nombre': c.persona.nombre,
-                    'foto_display_url': c.persona.foto.url if c.persona.foto else None
-                }
-            })
+        candidatos = event_ballot(evento_id)
     except Exception as e:
         logger.exception(f"Error obteniendo candidatos: {evento_id}")
         candidatos = []
 
-    # 6. Procesar Voto (POST)
-    if request.method == "POST":
-        candidato_id = request.POST.get("candidato")
-        
-        # Validar seguridad final antes de guardar
-        if not ParticipacionEleccion.objects.filter(evento_id=evento_id, persona_id=votante_id).exists():
-             return redirect('panel_usuario')
-
-        # Verificar si ya votó (doble seguridad)
-        ya_voto = Voto.objects.filter(evento_id=evento_id, persona_votante_id=votante_id).exists()
-        if ya_voto:
-            messages.warning(request, "Ya has votado en este evento.")
-            return redirect('panel_usuario')
+    return render(request, "votar_evento.html", {
+        "evento": evento,
+        "candidatos": candidatos
+    })
 
-        # PASO 1: Generar commitment
-        voter_secret = None
-        try:
-            votante_obj = Persona.objects.filter(id=votante_id).values('id', 'clave').first()
-            if votante_obj: 
-                voter_secret = votante_obj.get('clave')
-        except Exception as e:
-            logger.error(f"Error obteniendo clave del votante: {str(e)}")
-            messages.error(request, "Error al procesar tu voto. Intenta nuevamente.")
-            return redirect('votar_evento', evento_id=evento_id)
 
-        if not voter_secret:
-            messages.error(request, "No se pudo verificar tu identidad. Contacta al administrador.")
-            return redirect('panel_usuario')
+def _procesar_voto(request, evento_id, votante_id):
+    from django.conf import settings
+    from django.db import IntegrityError, transaction
+    from .web3_utils import VotingBlockchain
 
-        commitment = None
-        try:
-            from .web3_utils import VotingBlockchain
-            commitment = VotingBlockchain.generate_commitment(voter_secret, evento_id, candidato_id)
-        except Exception as e:
-            logger.error(f"Error generando commitment: {str(e)}")
-            messages.error(request, "Error al generar el voto. Intenta nuevamente.")
-            return redirect('votar_evento', evento_id=evento_id)
+    try:
+        candidato_id = UUID(str(request.POST.get("candidato")))
+    except ValueError:
+        messages.error(request, "Candidato no válido para este evento.")
+        return redirect('votar_evento', evento_id=evento_id)
 
-        if not commitment:
-            messages.error(request, "Error al generar el voto. Intenta nuevamente.")
-            return redirect('votar_evento', evento_id=evento_id)
+    modo_envio = getattr(settings, 'BLOCKCHAIN_VOTE_SUBMIT_MODE', 'sync')
 
-        # PASO 2: Enviar a BLOCKCHAIN PRIMERO (antes de guardar en BD)
-        try:
-            from .web3_utils import create_voting_blockchain
-            blockchain = create_voting_blockchain()
-            
-            logger.info(f"🔄 Enviando voto a blockchain...")
-            result = blockchain.send_commitment_to_chain(commitment, wait_for_receipt=True, timeout=60)
-            
-            if result.get('status') != 'success':
-                logger.error(f"✗ Blockchain rechazó el voto: {result}")
-                messages.error(request, "❌ La blockchain rechazó tu voto. Por favor, intenta nuevamente.")
+    try:
+        with transaction.atomic():
+            # PASO 1: Admisión (participación bloqueada: dos POST del mismo votante se serializan aquí)
+            adm = admitir_voto(evento_id, votante_id, candidato_id)
+            if adm is None:
+                messages.error(request, f"⛔ No tienes permiso para votar en este evento. Votante ID: {votante_id}, Evento ID: {evento_id}")
+                return redirect('panel_usuario')
+            if adm['ha_votado']:
+                messages.warning(request, "Ya has votado en este evento.")
+                return redirect('panel_usuario')
+            cerrado = _verificar_periodo_votacion(
+                request, adm['evento__fase'], adm['evento__activo'],
+                adm['evento__fecha_inicio'], adm['evento__fecha_termino'],
+            )
+            if cerrado:
+                return cerrado
+            if not adm['es_candidato']:
+                messages.error(request, "Candidato no válido para este evento.")
                 return redirect('votar_evento', evento_id=evento_id)
-            
-            logger.info(f"✓ Voto confirmado en blockchain: {result.get('tx_hash')}")
-            
-            # PASO 3: Solo si blockchain tuvo éxito, guardar en BD
+
+            voter_secret = adm['persona__clave']
+            if not voter_secret:
+                messages.error(request, "No se pudo verificar tu identidad. Contacta al administrador.")
+                return redirect('panel_usuario')
+
+            # PASO 2: Generar commitment
             try:
-                from django.db import transaction
-                with transaction.atomic():
-                    voto = Voto.objects.create(
-                        evento_id=evento_id, 
-                        persona_candidato_id=candidato_id, 
-                        persona_votante_id=votante_id, 
-                        commitment=commitment,
-                        onchain_status='success',
-                        tx_hash=result.get('tx_hash'),
-                        block_number=result.get('block_number'),
-                        commitment_sender=blockchain.account.address
-                    )
-                    ParticipacionEleccion.objects.filter(
-                        evento_id=evento_id, 
-                        persona_id=votante_id
-                    ).update(ha_votado=True)
-                    
-                    # PASO 4: Actualizar tabla de Resultados
-                    from .models import Resultado
-                    resultado, created = Resultado.objects.get_or_create(
-                        evento_id=evento_id,
-                        persona_candidato_id=candidato_id,
-                        defaults={'conteo_votos': 0}
-                    )
-                    resultado.conteo_votos += 1
-                    resultado.save()
-                
-                logger.info(f"✓ Voto guardado en BD con éxito")
-                messages.success(request, "✅ Tu voto ha sido registrado exitosamente en la blockchain.")
-                return redirect('voto_confirmado', evento_id=evento_id)
-                
+                commitment = VotingBlockchain.generate_commitment(voter_secret, evento_id, candidato_id)
             except Exception as e:
-                logger.exception("Error guardando voto en BD después de blockchain exitoso")
-                messages.error(request, "⚠️ Tu voto fue registrado en blockchain pero hubo un error en la base de datos. Contacta al administrador.")
-                return redirect('panel_usuario')
-                
+                logger.error(f"Error generando commitment: {str(e)}")
+                messages.error(request, "Error al generar el voto. Intenta nuevamente.")
+                return redirect('votar_evento', evento_id=evento_id)
+
+            # PASO 3 (modo asíncrono/lotes/Merkle): guardar como 'pending' y delegar el envío a Celery
+            # En eventos Merkle el voto se ancla con la raíz de su época (anchor_merkle_epochs)
+            es_merkle = adm['evento__modo_anclaje'] == 'merkle'
+            if modo_envio in ('async', 'batch') or es_merkle:
+                registrar_voto_pendiente(
+                    evento_id, candidato_id, votante_id, commitment,
+                    encolar=(modo_envio == 'async' and not es_merkle),
+                    participacion_id=adm['id'],
+                )
+                messages.success(request, "✅ Tu voto fue registrado y se está enviando a la blockchain.")
+                return redirect('voto_confirmado', evento_id=evento_id)
+
+            # PASO 3 (modo síncrono): guardar el voto ya reclamado ('sent', sin tx) antes de enviarlo,
+            # así un segundo POST simultáneo choca con la restricción única y nunca llega a la cadena
+            voto = guardar_voto(
+                evento_id, candidato_id, votante_id, adm['id'], commitment, onchain_status='sent'
+            )
+    except IntegrityError:
+        # Otro POST del mismo votante ganó la carrera: la restricción única rechazó este
+        messages.warning(request, "Ya has votado en este evento.")
+        return redirect('panel_usuario')
+    except Exception:
+        logger.exception("Error guardando voto en BD")
+        messages.error(request, "Error al registrar tu voto. Intenta nuevamente.")
+        return redirect('votar_evento', evento_id=evento_id)
+
+    # PASO 4 (modo síncrono): enviar a BLOCKCHAIN y esperar el recibo, ya fuera de la transacción.
+    # Un fallo se reintenta una vez aquí mismo; si persiste, el voto vuelve a 'pending' y se encola
+    result = _enviar_voto_sincrono(voto, commitment)
+    if result is None:
+        if _reencolar_voto(voto.id):
+            messages.warning(request, "⚠️ Tu voto quedó registrado, pero no se pudo confirmar en la blockchain; se reintentará su envío automáticamente.")
+        else:
+            messages.warning(request, "⚠️ Tu voto quedó registrado, pero no se pudo confirmar en la blockchain. Contacta al administrador para que lo reenvíe.")
+        return redirect('voto_confirmado', evento_id=evento_id)
+
+    # PASO 5: Guardar el resultado on-chain del voto
+    try:
+        Voto.objects.filter(id=voto.id).update(
+            onchain_status=result['status'],
+            onchain_status_at=timezone.now(),
+            tx_hash=result.get('tx_hash'),
+            block_number=result.get('block_number'),
+            commitment_sender=result.get('sender'),
+        )
+    except Exception:
+        # El voto queda 'sent': el barrido (si corre) lo encontrará en la cadena
+        logger.exception("Error guardando el recibo del voto en BD después de blockchain exitoso")
+
+    logger.info(f"✓ Voto {voto.id} guardado y confirmado en blockchain")
+    messages.success(request, "✅ Tu voto ha sido registrado exitosamente en la blockchain.")
+    return redirect('voto_confirmado', evento_id=evento_id)
+
+
+def _enviar_voto_sincrono(voto, commitment, intentos=2):
+    """
+    Envía el commitment del voto y espera su recibo, con hasta `intentos`
+    intentos. Antes de reintentar consulta la cadena: si el envío anterior se
+    minó aunque su recibo no llegara, no se vuelve a enviar (estado 'exists').
+    Devuelve el resultado ('success' o 'exists') o None si todos fallaron.
+    """
+    from .web3_utils import get_voting_blockchain, reset_voting_blockchain_on_error
+
+    for intento in range(intentos):
+        blockchain = None
+        try:
+            blockchain = get_voting_blockchain()
+            if intento:
+                existe, bloque = blockchain.verify_commitment_onchain(commitment)
+                if existe:
+                    return {'status': 'exists', 'block_number': bloque}
+
+            logger.info(f"🔄 Enviando voto a blockchain (intento {intento + 1}/{intentos})...")
+            result = blockchain.send_commitment_to_chain(commitment, wait_for_receipt=True, timeout=60)
+            if result.get('status') == 'success':
+                logger.info(f"✓ Voto confirmado en blockchain: {result.get('tx_hash')}")
+                return result
+            logger.error(f"✗ Blockchain rechazó el voto {voto.id}: {result}")
         except Exception as e:
-            logger.exception(f"✗ Error enviando voto a blockchain: {str(e)}")
-            messages.error(request, f"❌ Error al enviar tu voto a la blockchain: {str(e)}. Por favor, intenta nuevamente.")
-            return redirect('votar_evento', evento_id=evento_id)
+            logger.exception(f"✗ Error enviando voto {voto.id} a blockchain: {str(e)}")
+            reset_voting_blockchain_on_error(blockchain, e)
+    return None
 
-    return render(request, "votar_evento.html", {
-        "evento": evento,
-        "candidatos": candidatos
-    })
+
+def _reencolar_voto(voto_id):
+    """
+    Devuelve a 'pending' un voto síncrono que no llegó a la cadena y encola su
+    envío en Celery. Sin broker configurado (o si no responde) el voto queda
+    'failed' para que un administrador lo reenvíe; devuelve si quedó encolado.
+    """
+    from django.conf import settings
+    from .tasks import send_vote_to_blockchain
+
+    Voto.objects.filter(id=voto_id).update(onchain_status='pending', onchain_status_at=timezone.now())
+    if getattr(settings, 'CELERY_BROKER_URL', None):
+        try:
+            send_vote_to_blockchain.apply_async((str(voto_id),), countdown=60)
+            return True
+        except Exception:
+            logger.exception(f"No se pudo encolar el reintento del voto {voto_id}")
+    Voto.objects.filter(id=voto_id, onchain_status='pending').update(
+        onchain_status='failed', onchain_status_at=timezone.now()
+    )
+    return False
 
 @requiere_votante_sesion
 def panel_usuario(request):
@@ -334,55 +425,26 @@ def panel_usuario(request):
 
     # 2. Filtramos la tabla de Eventos usando esos IDs y que estén activos.
     #    (Ya no traemos "todos" los activos, solo los que coinciden)
+    #    La fase ya viene calculada (elecciones.event_lifecycle): no hay que normalizar fechas
     eventos_raw = list(EventoEleccion.objects.filter(
         id__in=eventos_invitados_ids, 
         activo=True
-    ).values('id', 'nombre', 'fecha_inicio', 'fecha_termino'))
+    ).values('id', 'nombre', 'fecha_inicio', 'fecha_termino', 'fase'))
     
     debug_info['eventos_raw_count'] = len(eventos_raw)
     debug_info['eventos_raw'] = eventos_raw
     # -------------------------------------------------------------------------
 
-    from datetime import datetime
-    from zoneinfo import ZoneInfo
-    santiago_tz = ZoneInfo('America/Santiago')
-    ahora = datetime.now(santiago_tz)
-    
-    eventos = []
-    
-    # Normalización de fechas con zona horaria Santiago
-    for ev in eventos_raw:
-        fi = ev.get('fecha_inicio')
-        ft = ev.get('fecha_termino')
-        
-        # Normalizar fecha_inicio
-        if isinstance(fi, str):
-            try: fi = datetime.fromisoformat(fi)
-            except: 
-                try: fi = datetime.strptime(fi, '%Y-%m-%d %H:%M:%S')
-                except: fi = None
-        if fi and fi.tzinfo is None:
-            fi = fi.replace(tzinfo=santiago_tz)
-            
-        # Normalizar fecha_termino
-        if isinstance(ft, str):
-            try: ft = datetime.fromisoformat(ft)
-            except: 
-                try: ft = datetime.strptime(ft, '%Y-%m-%d %H:%M:%S')
-                except: ft = None
-        if ft and ft.tzinfo is None:
-            ft = ft.replace(tzinfo=santiago_tz)
-
-        # Determinar si el evento ya terminó
-        evento_terminado = ft and ft <= ahora
-
-        eventos.append({
+    eventos = [
+        {
             'id': ev['id'],
             'nombre': ev['nombre'],
-            'fecha_inicio': fi,
-            'fecha_termino': ft,
-            'terminado': evento_terminado,
-        })
+            'fecha_inicio': ev['fecha_inicio'],
+            'fecha_termino': ev['fecha_termino'],
+            'terminado': ev['fase'] == EventoEleccion.FASE_CERRADO,
+        }
+        for ev in eventos_raw
+    ]
 
     # Filtrar historial vs disponibles
     voted_evento_ids = list(Voto.objects.filter(persona_votante_id=votante_id).values_list('evento_id', flat=True).distinct())
@@ -464,81 +526,26 @@ class EventoSimple:
 def panel_admin(request):
     filtro = request.GET.get('filtro', 'todos')
     
-    # 1. Obtener eventos RAW
+    # 1. Obtener eventos y 2. Filtrar por su fase en SQL (la mantiene al día elecciones.event_lifecycle)
+    fases_filtro = {
+        'curso': EventoEleccion.FASE_ABIERTO,
+        'futuro': EventoEleccion.FASE_PROGRAMADO,
+        'terminado': EventoEleccion.FASE_CERRADO,
+    }
+    ahora = timezone.now()
     try:
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT id, nombre, activo, fecha_inicio, fecha_termino 
-                FROM elecciones_eventoeleccion 
-            """)
-            eventos_raw = cursor.fetchall()
+        eventos_qs = EventoEleccion.objects.all()
+        if filtro in fases_filtro:
+            eventos_qs = eventos_qs.filter(fase=fases_filtro[filtro])
+        eventos_filtrados = [
+            EventoSimple(e_id, nombre, activo, fi, ft)
+            for e_id, nombre, activo, fi, ft in eventos_qs.values_list(
+                'id', 'nombre', 'activo', 'fecha_inicio', 'fecha_termino'
+            )
+        ]
     except Exception as e:
         logger.exception("Error SQL")
-        eventos_raw = []
-
-    # 2. Preparar fechas y Filtrar
-    ahora = timezone.now() # Fecha sistema con zona horaria Santiago
-    eventos_filtrados = []
-
-    # Función interna para limpiar fechas con zona horaria Santiago
-    def limpiar_fecha(fecha_sucia):
-        if not fecha_sucia: return None
-        
-        if isinstance(fecha_sucia, datetime):
-            # Si ya tiene zona horaria, convertir a Santiago
-            if fecha_sucia.tzinfo:
-                return fecha_sucia.astimezone(timezone.get_current_timezone())
-            else:
-                # Si no tiene zona horaria, asumir que es Santiago
-                from zoneinfo import ZoneInfo
-                santiago_tz = ZoneInfo('America/Santiago')
-                return fecha_sucia.replace(tzinfo=santiago_tz)
-        
-        fecha_str = str(fecha_sucia).strip()
-        formatos = [
-            '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M:%S.%f', 
-            '%Y-%m-%d', '%d/%m/%Y %H:%M'
-        ]
-        for fmt in formatos:
-            try: 
-                fecha_naive = datetime.strptime(fecha_str, fmt)
-                from zoneinfo import ZoneInfo
-                santiago_tz = ZoneInfo('America/Santiago')
-                return fecha_naive.replace(tzinfo=santiago_tz)
-            except ValueError: continue
-        try: 
-            fecha_naive = datetime.fromisoformat(fecha_str)
-            if fecha_naive.tzinfo is None:
-                from zoneinfo import ZoneInfo
-                santiago_tz = ZoneInfo('America/Santiago')
-                return fecha_naive.replace(tzinfo=santiago_tz)
-            return fecha_naive
-        except: return None
-
-    for row in eventos_raw:
-        e_id, nombre, activo, fi_raw, ft_raw = row
-        fi = limpiar_fecha(fi_raw)
-        ft = limpiar_fecha(ft_raw)
-        
-        # Instancia del evento simple
-        ev = EventoSimple(e_id, nombre, activo, fi, ft)
-
-        # Lógica de Filtrado
-        agregar = False
-        if not fi or not ft:
-            if filtro == 'todos': agregar = True
-        else:
-            if filtro == 'todos':
-                agregar = True
-            elif filtro == 'curso':
-                if fi <= ahora <= ft: agregar = True
-            elif filtro == 'futuro':
-                if ahora < fi: agregar = True
-            elif filtro == 'terminado':
-                if ahora > ft: agregar = True
-
-        if agregar:
-            eventos_filtrados.append(ev)
+        eventos_filtrados = []
 
     # 3. Calcular Estadísticas para la lista filtrada
     eventos_con_stats = []
@@ -756,6 +763,10 @@ def asignar_candidatos(request, evento_id):
                         nuevos_objs.append(Candidatura(evento=evento, persona_id=pid))
                 
                 Candidatura.objects.bulk_create(nuevos_objs)
+
+                # bulk_create no envía señales: invalidar la boleta en caché
+                from .ballot import invalidate_ballot
+                invalidate_ballot(evento.id)
                 
                 # 3. Actualizar flags de Persona (Opcional, según tu lógica de negocio)
                 # (Aquí iría tu lógica de es_candidato = True/False si la necesitas)
@@ -800,31 +811,19 @@ def ver_evento(request, evento_id):
     try:
         # 1. Obtener datos básicos del evento
         evento_data = EventoEleccion.objects.filter(id=evento_id).values(
-            'id', 'nombre', 'fecha_inicio', 'fecha_termino', 'activo'
+            'id', 'nombre', 'fecha_inicio', 'fecha_termino', 'activo', 'fase'
         ).first()
         
         if not evento_data:
             messages.error(request, "Evento no encontrado")
             return redirect('panel_admin')
 
-        # Calcular estado
-        ahora = timezone.now()
-        fi = evento_data['fecha_inicio']
-        ft = evento_data['fecha_termino']
-        
-        if fi <= ahora <= ft:
-            estado = 'En curso'
-        elif ahora < fi:
-            estado = 'Futuro'
-        else:
-            estado = 'Terminado'
-
         evento = {
             'id': evento_data['id'],
             'nombre': evento_data['nombre'],
-            'fecha_inicio': fi,
-            'fecha_termino': ft,
-            'estado': estado,
+            'fecha_inicio': evento_data['fecha_inicio'],
+            'fecha_termino': evento_data['fecha_termino'],
+            'estado': dict(EventoEleccion.FASES)[evento_data['fase']],
             'activo': evento_data['activo']
         }
 
@@ -873,16 +872,16 @@ def ver_evento(request, evento_id):
                 
             candidatos_lista_completa = []
             from django.conf import settings
+            # Votos por candidato: suma de los fragmentos de conteo en una sola consulta
+            try:
+                from .tally import event_counts
+                conteos = {c.hex: n for c, n in event_counts(evento_id).items()}
+            except Exception:
+                conteos = {}
             for candidato_row in candidatos_raw:
-                # Obtener votos desde la tabla Resultado
                 try:
-                    from .models import Resultado
-                    resultado = Resultado.objects.filter(
-                        evento_id=evento_id, 
-                        persona_candidato_id=candidato_row[0]
-                    ).first()
-                    votos_recibidos = resultado.conteo_votos if resultado else 0
-                except Exception:
+                    votos_recibidos = conteos.get(UUID(str(candidato_row[0])).hex, 0)
+                except ValueError:
                     votos_recibidos = 0
 
                 # Construir URL de foto si existe
@@ -1000,19 +999,11 @@ def resultados_evento(request, evento_id):
         messages.error(request, "Debes iniciar sesión para ver los resultados.")
         return redirect('login_votante')
     
-    # Obtener resultados desde la tabla Resultado
-    from .models import Resultado
-    resultados_qs = Resultado.objects.filter(evento_id=evento_id).select_related('persona_candidato').order_by('-conteo_votos')
-
-    resultados = []
-    for r in resultados_qs:
-        resultados.append({
-            'persona_id': r.persona_candidato.id,
-            'nombre': r.persona_candidato.nombre,
-            'votos': r.conteo_votos
-        })
+    # Obtener resultados sumando los fragmentos de conteo (ver elecciones.tally)
+    from .tally import event_results
+    resultados = event_results(evento_id)
 
-    print(f"DEBUG: Renderizando {len(resultados)} candidatos desde tabla Resultado")
+    logger.debug(f"Renderizando {len(resultados)} candidatos desde los conteos por fragmento")
     
     return render(request, 'resultados_evento.html', {
         'evento_id': evento_id,
@@ -1033,7 +1024,7 @@ def voto_confirmado(request, evento_id):
 @requiere_votante_sesion
 def voto_status(request, evento_id):
     """API endpoint: retorna el estado del último voto del votante para el evento.
-    Devuelve JSON: { status, tx_hash, block_number }
+    Devuelve JSON: { status, tx_hash, block_number, indexed_block }
     """
     from .models import Voto
 
@@ -1045,12 +1036,32 @@ def voto_status(request, evento_id):
     if not voto:
         return JsonResponse({'status': 'not_found'})
 
-    return JsonResponse({
+    data = {
         'status': voto.onchain_status or 'pending',
         'tx_hash': voto.tx_hash or None,
         'block_number': voto.block_number or None,
         'commitment_sender': getattr(voto, 'commitment_sender', None)
-    })
+    }
+
+    # Confirmación independiente desde el índice local de eventos CommitmentStored (sin RPC)
+    if voto.commitment and not voto.epoca_merkle_id:
+        from .commitment_indexer import lookup_commitment
+        en_cadena, bloque = lookup_commitment(voto.commitment)
+        data['indexed_block'] = bloque if en_cadena else None
+
+    # Modo Merkle: prueba de inclusión verificable offline (elecciones.merkle.verify_proof)
+    if voto.epoca_merkle_id:
+        epoca = voto.epoca_merkle
+        data['merkle'] = {
+            'commitment': voto.commitment,
+            'root': epoca.raiz,
+            'epoch': epoca.numero,
+            'leaf_count': epoca.total_hojas,
+            'index': voto.merkle_indice,
+            'proof': voto.merkle_prueba or [],
+        }
+
+    return JsonResponse(data)
 
 @login_required
 @user_passes_test(lambda u: u.is_staff)
@@ -1071,26 +1082,8 @@ def activar_evento(request, evento_id):
     evento = get_object_or_404(EventoEleccion, id=evento_id)
     
     if request.method == 'POST':
-        # 1. Obtener fecha actual y fecha del evento
-        ahora = timezone.now()
-        
-        ft = evento.fecha_termino
-        
-        # 2. Normalizar fecha del evento a zona horaria Santiago
-        if isinstance(ft, str):
-            try: ft = datetime.fromisoformat(ft)
-            except:
-                try: ft = datetime.strptime(ft, '%Y-%m-%d %H:%M:%S')
-                except: ft = None
-        
-        # Asegurar que la fecha tenga zona horaria de Santiago
-        if ft and ft.tzinfo is None:
-            from zoneinfo import ZoneInfo
-            santiago_tz = ZoneInfo('America/Santiago')
-            ft = ft.replace(tzinfo=santiago_tz)
-
-        # 3. 🔒 VALIDACIÓN: Si ya pasó la fecha, prohibido activar
-        if ft and ahora > ft:
+        # 🔒 VALIDACIÓN: Si ya pasó la fecha de término, prohibido activar
+        if evento.calcular_fase() == EventoEleccion.FASE_CERRADO:
             messages.error(request, f'No se puede activar "{evento.nombre}" porque su fecha de término ya pasó.')
             return redirect('panel_admin')
 
@@ -1105,6 +1098,32 @@ def activar_evento(request, evento_id):
 
 
 
+@login_required
+@user_passes_test(lambda u: getattr(u, 'is_superuser', False) or Administrador.objects.filter(persona__email=u.email).exists())
+def estado_rpc(request):
+    """API para administradores: latencia, errores e histograma por endpoint RPC y saldo de cada firmante."""
+    from .web3_utils import get_voting_blockchain
+
+    try:
+        blockchain = get_voting_blockchain()
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=503)
+
+    blockchain.refresh_balances()
+    return JsonResponse({
+        'endpoints': blockchain.rpc_stats(),
+        'signers': [
+            {
+                'address': lane.address,
+                'in_flight': lane.in_flight,
+                'balance_wei': lane.balance_wei,
+                'underfunded': lane.balance_wei is not None and lane.balance_wei <= blockchain.min_balance_wei,
+            }
+            for lane in blockchain.lanes
+        ],
+    })
+
+
 @csrf_exempt
 def check_vote_status(request, vote_id):
     try:
@@ -0,0 +1,85 @@
+"""
+Redis list of vote ids waiting to be sent on-chain (async submit mode).
+
+With one Celery message per vote, every vote costs a broker round trip, a
+task dispatch and its own transaction. Instead the view appends the vote id
+to a Redis list (RPUSH) and tasks.drain_vote_queue pops hundreds at a time
+and hands them to tasks.send_votes_to_blockchain, which loads, sends and
+stores them in bulk.
+
+The list is only a wake-up hint: the vote itself is already stored as
+'pending', and send_votes_to_blockchain ignores ids that are no longer
+pending, so duplicates are harmless and an id lost with a crashed worker
+just leaves its vote pending.
+
+The Redis instance is BLOCKCHAIN_VOTE_QUEUE_REDIS_URL, falling back to
+CELERY_BROKER_URL. Without either (or with BLOCKCHAIN_VOTE_QUEUE off)
+`vote_queue_available()` is False and callers enqueue one task per vote.
+"""
+
+import logging
+import os
+import threading
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUE_KEY = 'votacion:votos:pendientes'
+
+_client = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+
+def _queue_url() -> Optional[str]:
+    from django.conf import settings
+
+    if not getattr(settings, 'BLOCKCHAIN_VOTE_QUEUE', False):
+        return None
+    url = os.getenv('BLOCKCHAIN_VOTE_QUEUE_REDIS_URL') or os.getenv('CELERY_BROKER_URL') or ''
+    return url if url.startswith(('redis://', 'rediss://', 'unix://')) else None
+
+
+def _redis():
+    """Process-wide Redis client (rebuilt after a fork), or None if the queue is not configured."""
+    global _client, _client_pid
+    if _client is not None and _client_pid == os.getpid():
+        return _client
+    url = _queue_url()
+    if url is None:
+        return None
+    try:
+        import redis
+    except ImportError:
+        return None
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = redis.Redis.from_url(url)
+            _client_pid = os.getpid()
+        return _client
+
+
+def vote_queue_available() -> bool:
+    return _redis() is not None
+
+
+def push_votes(voto_ids: Iterable) -> int:
+    """Append vote ids to the queue. Returns the queue length afterwards."""
+    ids = [str(v) for v in voto_ids]
+    if not ids:
+        return 0
+    return _redis().rpush(QUEUE_KEY, *ids)
+
+
+def pop_votes(count: int) -> List[str]:
+    """Remove and return up to `count` ids from the head of the queue (atomic, any Redis version)."""
+    pipe = _redis().pipeline(transaction=True)
+    pipe.lrange(QUEUE_KEY, 0, count - 1)
+    pipe.ltrim(QUEUE_KEY, count, -1)
+    ids, _ = pipe.execute()
+    return [i.decode() if isinstance(i, bytes) else i for i in ids]
+
+
+def queue_length() -> int:
+    client = _redis()
+    return client.llen(QUEUE_KEY) if client is not None else 0
@@ -0,0 +1,170 @@
+"""
+Reconciliation sweeper for votes that never reached a final state.
+
+Votes of commitment-mode events can stall in several states:
+- 'pending': the Celery message or queue entry was lost;
+- 'sent': the transaction was dropped from the mempool, and
+  send_vote_to_blockchain never retries 'sent' votes;
+- 'failed': the per-vote task ran out of retries;
+- 'simulated': a legacy status with no sender left.
+Once a vote has been in its state for longer than the grace period (by
+Voto.onchain_status_at, so a vote cast long ago and resent a moment ago is
+left alone), the sweeper checks its commitment against the chain in bulk: first the local CommitmentStored
+index, then JSON-RPC batches for the rest.
+
+    commitment on-chain                  -> 'success' (+ block_number, sender, tx_hash if indexed)
+    'sent' and the tx is in the mempool  -> left alone (tx_replacement bumps it)
+    otherwise                            -> 'pending', returned to the caller to resubmit
+
+Each state is walked in keyset order (onchain_status_at, id) through the
+(onchain_status, onchain_status_at, id) index, `page_size` rows at a time and at most
+`max_rows` per run. The cursor is kept in the Django cache between runs and
+wraps around once it reaches the grace boundary, so a run never scans the
+whole table and rows that are left alone do not starve the ones behind them.
+
+`unsettled_ages` is the SLA metric: the age of the oldest vote in each
+non-final state (one index seek per state).
+"""
+
+import logging
+from datetime import timedelta
+from typing import Dict, List
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SWEPT_STATES = ('pending', 'sent', 'failed', 'simulated')
+
+_CURSOR_KEY = 'barrido_votos:{}'
+
+
+def _page(estado, cutoff, after, size):
+    from .models import Voto
+
+    qs = Voto.objects.filter(onchain_status=estado, onchain_status_at__lt=cutoff, evento__modo_anclaje='commitment')
+    if after is not None:
+        ts, voto_id = after
+        qs = qs.filter(Q(onchain_status_at__gt=ts) | Q(onchain_status_at=ts, id__gt=voto_id))
+    return list(
+        qs.order_by('onchain_status_at', 'id').values_list('id', 'onchain_status_at', 'commitment', 'tx_hash')[:size]
+    )
+
+
+def _onchain(blockchain, commitments) -> Dict[str, Dict]:
+    """commitment -> {block_number, sender, tx_hash} for the commitments stored on-chain."""
+    from .models import CommitmentIndexado
+
+    found = {
+        c: {'block_number': block_number, 'sender': sender, 'tx_hash': tx_hash}
+        for c, block_number, sender, tx_hash in CommitmentIndexado.objects.filter(commitment__in=commitments)
+        .values_list('commitment', 'block_number', 'sender', 'tx_hash')
+    }
+    rest = [c for c in commitments if c not in found and len(c) == 66 and c.startswith('0x')]
+    if rest:
+        for c, info in blockchain.verify_commitments_bulk(rest).items():
+            if info['exists']:
+                found[c] = {'block_number': info['block_number'], 'sender': info['sender'], 'tx_hash': None}
+    return found
+
+
+def _reconcile_page(blockchain, estado, rows, result) -> List:
+    from .models import Voto
+
+    rows = [r for r in rows if r[2]]  # without commitment there is nothing to send or check
+    onchain = _onchain(blockchain, list({c.lower() for _, _, c, _ in rows}))
+
+    fixed, resubmit = [], []
+    in_mempool = {}
+    ahora = timezone.now()
+    for voto_id, _, commitment, tx_hash in rows:
+        info = onchain.get(commitment.lower())
+        if info is not None:
+            fixed.append(Voto(
+                id=voto_id, onchain_status='success', onchain_status_at=ahora, block_number=info['block_number'],
+                commitment_sender=info['sender'], tx_hash=info['tx_hash'] or tx_hash,
+            ))
+            continue
+        if estado == 'sent' and tx_hash:
+            if tx_hash not in in_mempool:
+                location = blockchain.get_transaction_location(tx_hash)
+                in_mempool[tx_hash] = location is not None and location['block_number'] is None
+            if in_mempool[tx_hash]:
+                result['waiting'] += 1
+                continue
+        resubmit.append(voto_id)
+
+    with transaction.atomic():
+        if fixed:
+            # Only rows still in the swept state: a submitter may have moved them meanwhile
+            still = set(Voto.objects.filter(id__in=[v.id for v in fixed], onchain_status=estado)
+                        .values_list('id', flat=True))
+            fixed = [v for v in fixed if v.id in still]
+            Voto.objects.bulk_update(
+                fixed, ['onchain_status', 'onchain_status_at', 'block_number', 'commitment_sender', 'tx_hash'],
+                batch_size=500,
+            )
+        if resubmit:
+            resubmit = list(Voto.objects.filter(id__in=resubmit, onchain_status=estado).values_list('id', flat=True))
+            Voto.objects.filter(id__in=resubmit).update(
+                onchain_status='pending', onchain_status_at=ahora, tx_hash=None, block_number=None,
+                commitment_sender=None,
+            )
+
+    result['fixed'] += len(fixed)
+    result['resubmit'].extend(resubmit)
+    return resubmit
+
+
+def sweep_votes_once(blockchain, grace_seconds=300, page_size=500, max_rows=5000) -> Dict:
+    """
+    Reconcile up to `max_rows` votes per swept state that have been in that
+    state for more than `grace_seconds` (by onchain_status_at).
+
+    Returns:
+        Dict with scanned, fixed (moved to 'success'), waiting (tx still in the
+        mempool) and resubmit (ids reset to 'pending', for the caller to send)
+    """
+    cutoff = timezone.now() - timedelta(seconds=grace_seconds)
+    result = {'scanned': 0, 'fixed': 0, 'waiting': 0, 'resubmit': []}
+
+    for estado in SWEPT_STATES:
+        key = _CURSOR_KEY.format(estado)
+        after = cache.get(key)
+        scanned = 0
+        while scanned < max_rows:
+            rows = _page(estado, cutoff, after, min(page_size, max_rows - scanned))
+            if not rows:
+                after = None  # reached the grace boundary: start over next run
+                break
+            scanned += len(rows)
+            after = (rows[-1][1], rows[-1][0])
+            _reconcile_page(blockchain, estado, rows, result)
+        cache.set(key, after, None)
+        result['scanned'] += scanned
+
+    if result['fixed'] or result['resubmit']:
+        logger.info(
+            f"Vote sweeper: {result['scanned']} scanned, {result['fixed']} found on-chain, "
+            f"{len(result['resubmit'])} resubmitted, {result['waiting']} still in the mempool"
+        )
+    return result
+
+
+def unsettled_ages(now=None) -> Dict[str, float]:
+    """Seconds since the oldest vote in each non-final state was cast (states with no votes omitted)."""
+    from .models import Voto
+
+    now = now or timezone.now()
+    ages = {}
+    for estado in SWEPT_STATES:
+        oldest = (
+            Voto.objects.filter(onchain_status=estado).order_by('time_stamp')
+            .values_list('time_stamp', flat=True).first()
+        )
+        if oldest is not None:
+            ages[estado] = (now - oldest).total_seconds()
+    return ages
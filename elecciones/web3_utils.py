@@ -6,8 +6,11 @@ Handles commitment generation and on-chain vote storage.
 import os
 from pathlib import Path
 from web3 import Web3
+from web3.exceptions import BlockNotFound, TransactionNotFound
 from eth_utils import keccak
-from typing import Tuple, Dict, Any
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import logging
+import threading
 import time
 
 # Load .env at module level to ensure environment variables are available
@@ -18,6 +21,116 @@ try:
 except ImportError:
     pass
 
+logger = logging.getLogger(__name__)
+
+# Gas budget for storeCommitments: fixed overhead plus three cold SSTOREs and one event per commitment
+BATCH_BASE_GAS = 50000
+BATCH_GAS_PER_COMMITMENT = 75000
+
+# Server-side salt appended to every vote commitment
+DEFAULT_SERVER_SALT = "VOTING_SALT_2025"
+
+
+# -- Precompiled calldata for the registry's hot functions -- #
+# The ABI encoding of these calls is fixed: a 4-byte selector followed by
+# 32-byte words. Building it directly skips web3's per-call ABI lookup,
+# argument normalisation and encoder dispatch (see scripts/check_calldata_encoder.py
+# for the byte-for-byte comparison with web3).
+
+SELECTOR_STORE_COMMITMENT = keccak(text='storeCommitment(bytes32)')[:4]
+SELECTOR_STORE_COMMITMENTS = keccak(text='storeCommitments(bytes32[])')[:4]
+SELECTOR_ANCHOR_ROOT = keccak(text='anchorRoot(bytes32,uint256)')[:4]
+
+
+def _bytes32(value: str) -> bytes:
+    raw = bytes.fromhex(value[2:] if value.startswith(('0x', '0X')) else value)
+    if len(raw) != 32:
+        raise ValueError(f"Expected 32 bytes, got {len(raw)}")
+    return raw
+
+
+def _uint256(value: int) -> bytes:
+    if value < 0 or value >= 2 ** 256:
+        raise ValueError(f"Value out of uint256 range: {value}")
+    return value.to_bytes(32, 'big')
+
+
+def encode_store_commitment(commitment: str) -> str:
+    """Calldata for storeCommitment(bytes32)."""
+    return '0x' + (SELECTOR_STORE_COMMITMENT + _bytes32(commitment)).hex()
+
+
+def encode_store_commitments(commitments: List[str]) -> str:
+    """Calldata for storeCommitments(bytes32[]): head offset, length, then the items."""
+    parts = [SELECTOR_STORE_COMMITMENTS, _uint256(32), _uint256(len(commitments))]
+    parts.extend(_bytes32(c) for c in commitments)
+    return '0x' + b''.join(parts).hex()
+
+
+def encode_anchor_root(root: str, leaf_count: int) -> str:
+    """Calldata for anchorRoot(bytes32,uint256)."""
+    return '0x' + (SELECTOR_ANCHOR_ROOT + _bytes32(root) + _uint256(leaf_count)).hex()
+
+
+class _EncodedCall:
+    """
+    Registry call with precompiled calldata. Provides what the send path uses
+    from a web3 ContractFunction: fn_name, estimate_gas and build_transaction.
+    """
+
+    def __init__(self, w3, address: str, fn_name: str, data: str):
+        self.w3 = w3
+        self.address = address
+        self.fn_name = fn_name
+        self.data = data
+
+    def estimate_gas(self, transaction: Dict[str, Any]) -> int:
+        return self.w3.eth.estimate_gas({**transaction, 'to': self.address, 'data': self.data})
+
+    def build_transaction(self, transaction: Dict[str, Any]) -> Dict[str, Any]:
+        # Same keys web3 returns when every field is supplied
+        return {'value': 0, **transaction, 'to': self.address, 'data': self.data}
+
+
+class BlockchainNotConfigured(ValueError):
+    """Required blockchain settings (keys, contract address) are missing."""
+
+
+def _build_http_session(pool_size: int):
+    """requests.Session with a keep-alive connection pool sized for concurrent senders."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class _SignerLane:
+    """One server wallet with its own nonce sequence."""
+
+    def __init__(self, account, private_key: str, nonce_manager=None):
+        self.account = account
+        self.private_key = private_key
+        self.nonce_manager = nonce_manager
+        self.in_flight = 0  # Sends in progress from this process
+        self.balance_wei: Optional[int] = None  # Last balance seen by get_balances() (None = unknown)
+
+    @property
+    def address(self) -> str:
+        return self.account.address
+
+    def load(self) -> int:
+        """Unconfirmed transactions on this lane: shared across processes when Redis is available."""
+        if self.nonce_manager is not None:
+            try:
+                return self.nonce_manager.outstanding() + self.in_flight
+            except Exception:
+                pass
+        return self.in_flight
+
 
 class VotingBlockchain:
     """
@@ -25,28 +138,111 @@ class VotingBlockchain:
     Commits votes as keccak256 hashes on Polygon Amoy testnet.
     """
     
-    def __init__(self, rpc_url: str, private_key: str, contract_address: str, contract_abi: list):
+    def __init__(self, rpc_url: Union[str, List[str]], private_key: Union[str, List[str]], contract_address: str, contract_abi: list,
+                 nonce_redis_url: Optional[str] = None, chain_id: Optional[int] = None,
+                 http_pool_size: int = 20, fee_options: Optional[Dict[str, Any]] = None,
+                 provider_factory: Optional[Callable[[], Any]] = None, local_nonces: bool = False,
+                 tx_recorder: Optional[Callable[[Dict[str, Any], str, Optional[int]], None]] = None,
+                 signing_processes: int = 0, balance_ttl: float = 30.0, min_balance_wei: int = 0):
         """
         Initialize blockchain connection and contract interface.
         
         Args:
-            rpc_url: Polygon Amoy RPC endpoint
-            private_key: Server wallet private key (hex string, no '0x' prefix)
+            rpc_url: Polygon Amoy RPC endpoint, or a list of endpoints for the
+                same chain: reads go to the fastest healthy one with failover and
+                raw transactions are broadcast to several (see elecciones.rpc_pool)
+            private_key: Server wallet private key (hex string, no '0x' prefix), or a
+                list of keys: each wallet becomes an independent submission lane
             contract_address: Deployed VotingRegistry contract address
             contract_abi: Contract ABI (JSON)
+            nonce_redis_url: Redis URL for the shared nonce allocator. Without it,
+                nonces are read from the chain's pending count on every send.
+            chain_id: Known chain id. If omitted it is fetched once here, which
+                also checks that the RPC answers.
+            http_pool_size: Keep-alive connections kept open to the RPC endpoint
+            fee_options: Keyword arguments for FeeOracle (fee ceilings, TTL)
+            provider_factory: Builds the web3 provider (chain backend) instead of
+                connecting to `rpc_url`, e.g. the in-process simulated chain
+            local_nonces: Without Redis, allocate nonces in this process instead of
+                reading the pending count (only safe if no other process signs)
+            tx_recorder: Called with (transaction dict, tx hash, chain head) after each
+                broadcast, e.g. to track it for fee-bump replacement
+            signing_processes: Worker processes that sign for send_commitments_batches
+                (0 = sign in the calling thread)
+            balance_ttl: Seconds between refreshes of the signer balances used to
+                pick a lane (multi-wallet only)
+            min_balance_wei: Lanes at or below this balance get no new sends while
+                another lane has more
         """
-        self.w3 = Web3(Web3.HTTPProvider(rpc_url))
-        if not self.w3.is_connected():
-            raise ConnectionError(f"Failed to connect to RPC: {rpc_url}")
+        self.rpc_urls = [rpc_url] if isinstance(rpc_url, str) else list(rpc_url)
+        self.rpc_url = self.rpc_urls[0]
+        self._provider_factory = provider_factory
+        self._http_session = _build_http_session(http_pool_size)
+        self._rpc_stats = {}
+        self._thread_local = threading.local()
+        self.w3 = Web3(self._make_provider())
         
-        self.private_key = private_key if private_key.startswith('0x') else f'0x{private_key}'
+        keys = [private_key] if isinstance(private_key, str) else list(private_key)
+        if not keys:
+            raise ValueError("At least one private key is required")
+        keys = [k if k.startswith('0x') else f'0x{k}' for k in keys]
+
+        # The first wallet is the primary one (get_account_address, get_balance)
+        self.private_key = keys[0]
         self.account = self.w3.eth.account.from_key(self.private_key)
         self.contract_address = Web3.to_checksum_address(contract_address)
         self.contract = self.w3.eth.contract(address=self.contract_address, abi=contract_abi)
-        self.chain_id = self.w3.eth.chain_id
+
+        if chain_id is None:
+            try:
+                chain_id = self.w3.eth.chain_id
+            except Exception as e:
+                raise ConnectionError(f"Failed to connect to RPC: {', '.join(self.rpc_urls)}") from e
+        self.chain_id = chain_id
+
+        self._block_receipts_supported = True
+        self.tx_recorder = tx_recorder
+
+        from .fee_oracle import FeeOracle
+        self.fee_oracle = FeeOracle(self.w3, **(fee_options or {}))
+
+        self._lanes_lock = threading.Lock()
+        self.balance_ttl = balance_ttl
+        self.min_balance_wei = min_balance_wei
+        self._balances_lock = threading.Lock()
+        self._balances_at: Optional[float] = None
+        self.lanes = []
+        for key in keys:
+            account = self.w3.eth.account.from_key(key)
+            nonce_manager = None
+            if nonce_redis_url:
+                from .nonce_manager import NonceManager
+                nonce_manager = NonceManager.from_url(nonce_redis_url, account.address, self.w3, self.chain_id)
+            elif local_nonces:
+                from .nonce_manager import LocalNonceManager
+                nonce_manager = LocalNonceManager(account.address, self.w3)
+            self.lanes.append(_SignerLane(account, key, nonce_manager))
+        self.nonce_manager = self.lanes[0].nonce_manager
+
+        from .signing_pool import SigningPool
+        self.signing_pool = SigningPool([lane.private_key for lane in self.lanes], processes=signing_processes)
     
+    def _make_provider(self):
+        """Provider for the configured backend; balanced providers share one set of stats."""
+        if self._provider_factory is not None:
+            return self._provider_factory()
+        if len(self.rpc_urls) == 1:
+            return Web3.HTTPProvider(self.rpc_url, session=self._http_session)
+        from .rpc_pool import BalancedHTTPProvider
+        return BalancedHTTPProvider(self.rpc_urls, session=self._http_session, stats=self._rpc_stats)
+
+    def rpc_stats(self) -> List[Dict[str, Any]]:
+        """Per-endpoint latency, error rate, circuit state and latency histogram (multi-endpoint only)."""
+        provider = self.w3.provider
+        return provider.stats() if hasattr(provider, 'stats') else []
+
     @staticmethod
-    def generate_commitment(voter_secret: str, evento_id: str, candidato_id: str, server_salt: str = "VOTING_SALT_2025") -> str:
+    def generate_commitment(voter_secret: str, evento_id: str, candidato_id: str, server_salt: str = DEFAULT_SERVER_SALT) -> str:
         """
         Generate a keccak256 commitment hash for the vote.
         Privacy-preserving: voter secret is never stored, only its commitment.
@@ -68,7 +264,167 @@ class VotingBlockchain:
         
         # Return as 0x-prefixed hex string (66 chars including 0x)
         return "0x" + commitment_hash.hex()
+
+    @staticmethod
+    def generate_commitments_bulk(voter_secrets: List[Optional[str]], evento_ids: List[str], candidato_ids: List[str],
+                                  server_salt: str = DEFAULT_SERVER_SALT, processes: Optional[int] = None) -> List[Optional[str]]:
+        """
+        generate_commitment over aligned columns, hashed in chunks across
+        processes (see elecciones.commitment_audit).
+
+        Returns:
+            Commitments in input order (None where the secret is None)
+        """
+        from .commitment_audit import commitment_executor, compute_commitments
+
+        executor = commitment_executor(processes)
+        try:
+            return compute_commitments(voter_secrets, evento_ids, candidato_ids,
+                                       server_salt=server_salt, executor=executor)
+        finally:
+            if executor is not None:
+                executor.shutdown()
     
+    def _acquire_lane(self) -> _SignerLane:
+        """Least-loaded signer lane, reserved for one send until _release_lane()."""
+        if len(self.lanes) == 1:
+            lane = self.lanes[0]
+        else:
+            self.refresh_balances()
+            # Underfunded wallets only get traffic if every wallet is underfunded
+            candidates = [
+                l for l in self.lanes if l.balance_wei is None or l.balance_wei > self.min_balance_wei
+            ] or self.lanes
+            loads = {id(l): l.load() for l in candidates}
+            lane = min(candidates, key=lambda l: loads[id(l)])
+        with self._lanes_lock:
+            lane.in_flight += 1
+        return lane
+
+    def _release_lane(self, lane: _SignerLane) -> None:
+        with self._lanes_lock:
+            lane.in_flight -= 1
+
+    def _allocate_nonce(self, lane: _SignerLane) -> int:
+        """Next nonce for the lane's wallet, shared across processes when Redis is configured."""
+        if lane.nonce_manager is not None:
+            try:
+                lane.nonce_manager.maybe_resync()
+                return lane.nonce_manager.allocate()
+            except Exception as e:
+                # Redis unavailable: degrade to the chain view instead of blocking votes
+                logger.warning(f"Nonce manager unavailable, using chain pending count: {e}")
+        return self.w3.eth.get_transaction_count(lane.address, 'pending')
+
+    def _nonce_sent(self, lane: _SignerLane, nonce: int) -> None:
+        if lane.nonce_manager is not None:
+            try:
+                lane.nonce_manager.mark_sent(nonce)
+            except Exception as e:
+                logger.warning(f"Could not mark nonce {nonce} of {lane.address} as sent: {e}")
+
+    def _nonce_failed(self, lane: _SignerLane, nonce: int, error: Exception) -> None:
+        if lane.nonce_manager is not None:
+            try:
+                lane.nonce_manager.handle_send_error(nonce, error)
+            except Exception as e:
+                logger.warning(f"Could not release nonce {nonce} of {lane.address}: {e}")
+
+    def _encoded_call(self, fn_name: str, data: str) -> _EncodedCall:
+        return _EncodedCall(self.w3, self.contract_address, fn_name, data)
+
+    def _send_contract_call(self, contract_fn, gas: int, batch_size: int = 1):
+        """
+        Build, sign and broadcast a registry call as an EIP-1559 transaction from
+        the least-loaded signer lane, with a nonce from that lane's allocator.
+        Fees come from the cached fee oracle and the gas limit from a cached
+        estimate per (function, batch_size), with `gas` as fallback. The nonce
+        is handed back to the allocator if the node never accepts the
+        transaction.
+
+        Returns:
+            Tuple (transaction hash bytes, sender address)
+        """
+        lane = self._acquire_lane()
+        try:
+            return self._send_from_lane(lane, contract_fn, gas, batch_size), lane.address
+        finally:
+            self._release_lane(lane)
+
+    def _send_from_lane(self, lane: _SignerLane, contract_fn, gas: int, batch_size: int):
+        tx = self._build_transaction(lane, contract_fn, gas, batch_size)
+        try:
+            # Sign transaction
+            signed_tx = self.w3.eth.account.sign_transaction(tx, lane.private_key)
+
+            # Compatibility: web3.py v5 used 'rawTransaction', v6 uses 'raw_transaction'
+            raw_tx = getattr(signed_tx, 'rawTransaction', None) or getattr(signed_tx, 'raw_transaction', None)
+            if raw_tx is None:
+                raise Exception("SignedTransaction object missing raw transaction bytes")
+        except Exception as e:
+            self._nonce_failed(lane, tx['nonce'], e)
+            raise
+        return self._broadcast_signed(lane, tx, raw_tx)
+
+    def _build_transaction(self, lane: _SignerLane, contract_fn, gas: int, batch_size: int,
+                           fees: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        """Unsigned transaction for `contract_fn` from `lane`, with a nonce reserved from its allocator."""
+        fees = fees or self.fee_oracle.fee_fields()
+        gas = self.fee_oracle.gas_limit(contract_fn, lane.address, default=gas, batch_size=batch_size)
+        nonce = self._allocate_nonce(lane)
+        try:
+            return contract_fn.build_transaction({
+                'from': lane.address,
+                'nonce': nonce,
+                'gas': gas,
+                'chainId': self.chain_id,
+                **fees,
+            })
+        except Exception as e:
+            self._nonce_failed(lane, nonce, e)
+            raise
+
+    def _broadcast_signed(self, lane: _SignerLane, tx: Dict[str, Any], raw_tx: bytes):
+        """Push signed bytes to the node; the nonce goes back to the allocator if it is not accepted."""
+        try:
+            tx_hash = self.w3.eth.send_raw_transaction(raw_tx)
+        except Exception as e:
+            self._nonce_failed(lane, tx['nonce'], e)
+            raise
+        self._nonce_sent(lane, tx['nonce'])
+        if self.tx_recorder is not None:
+            try:
+                self.tx_recorder(tx, Web3.to_hex(tx_hash), self.fee_oracle.last_block)
+            except Exception as e:
+                logger.warning(f"Could not record transaction {Web3.to_hex(tx_hash)}: {e}")
+        return tx_hash
+
+    def replace_transaction(self, sender: str, nonce: int, to: str, data: str, gas: int,
+                            fees: Dict[str, int]) -> str:
+        """
+        Re-sign a pending transaction at the same nonce with new fee fields and
+        broadcast it, so the node replaces the original in its mempool.
+
+        Returns:
+            Hash of the replacement (0x hex)
+        """
+        lane = next((l for l in self.lanes if l.address.lower() == sender.lower()), None)
+        if lane is None:
+            raise ValueError(f"No signer for {sender} in this client")
+        tx = {
+            'from': lane.address,
+            'to': Web3.to_checksum_address(to),
+            'data': data,
+            'value': 0,
+            'nonce': nonce,
+            'gas': gas,
+            'chainId': self.chain_id,
+            **fees,
+        }
+        signed_tx = self.w3.eth.account.sign_transaction(tx, lane.private_key)
+        raw_tx = getattr(signed_tx, 'rawTransaction', None) or getattr(signed_tx, 'raw_transaction', None)
+        return Web3.to_hex(self.w3.eth.send_raw_transaction(raw_tx))
+
     def send_commitment_to_chain(self, commitment: str, wait_for_receipt: bool = True, timeout: int = 120) -> Dict[str, Any]:
         """
         Send commitment to blockchain via VotingRegistry.storeCommitment.
@@ -80,7 +436,7 @@ class VotingBlockchain:
             timeout: Max seconds to wait for receipt
         
         Returns:
-            Dict with tx_hash, block_number, gas_used, status ('success'/'failed'), and receipt
+            Dict with tx_hash, block_number, gas_used, status ('success'/'failed'), receipt and sender
         
         Raises:
             ValueError: If commitment is invalid format
@@ -90,38 +446,21 @@ class VotingBlockchain:
             raise ValueError(f"Invalid commitment format. Expected 66 chars (0x...), got {len(commitment)}")
         
         try:
-            # Get current nonce and gas price
-            nonce = self.w3.eth.get_transaction_count(self.account.address)
-            gas_price = self.w3.eth.gas_price
-            
-            # Build transaction to call storeCommitment
-            tx = self.contract.functions.storeCommitment(commitment).build_transaction({
-                'from': self.account.address,
-                'nonce': nonce,
-                'gasPrice': gas_price,
-                'gas': 100000,  # Estimated for storeCommitment call
-                'chainId': self.chain_id,
-            })
-            
-            # Sign transaction
-            signed_tx = self.w3.eth.account.sign_transaction(tx, self.private_key)
-
-            # Compatibility: web3.py v5 used 'rawTransaction', v6 uses 'raw_transaction'
-            raw_tx = getattr(signed_tx, 'rawTransaction', None) or getattr(signed_tx, 'raw_transaction', None)
-            if raw_tx is None:
-                raise Exception("SignedTransaction object missing raw transaction bytes")
-
-            # Send transaction
-            tx_hash = self.w3.eth.send_raw_transaction(raw_tx)
+            # Build, sign and broadcast storeCommitment with a reserved nonce
+            tx_hash, sender = self._send_contract_call(
+                self._encoded_call('storeCommitment', encode_store_commitment(commitment)),
+                gas=100000,  # Estimated for storeCommitment call
+            )
             print(f"✓ Transaction sent: {tx_hash.hex()}")
             
             if not wait_for_receipt:
                 return {
-                    'tx_hash': tx_hash.hex(),
+                    'tx_hash': Web3.to_hex(tx_hash),
                     'block_number': None,
                     'gas_used': None,
                     'status': 'sent',
-                    'receipt': None
+                    'receipt': None,
+                    'sender': sender,
                 }
             
             # Wait for receipt (confirmation)
@@ -147,17 +486,285 @@ class VotingBlockchain:
                 print(f"✗ Transaction failed with receipt: {receipt}, decoded_logs: {decoded_logs}")
 
             return {
-                'tx_hash': receipt['transactionHash'].hex(),
+                'tx_hash': Web3.to_hex(receipt['transactionHash']),
                 'block_number': receipt['blockNumber'],
                 'gas_used': receipt['gasUsed'],
                 'status': status,
-                'receipt': receipt
+                'receipt': receipt,
+                'sender': sender,
             }
         
         except Exception as e:
             print(f"✗ Transaction failed: {str(e)}")
             raise
     
+    def send_commitments_batch(self, commitments: List[str], wait_for_receipt: bool = True, timeout: int = 120) -> Dict[str, Any]:
+        """
+        Send many commitments in a single VotingRegistry.storeCommitments transaction.
+        Commitments already on-chain are skipped by the contract instead of reverting.
+        
+        Args:
+            commitments: Keccak256 commitment hashes (0x-prefixed)
+            wait_for_receipt: If True, wait for confirmation before returning
+            timeout: Max seconds to wait for receipt
+        
+        Returns:
+            Dict with tx_hash, block_number, gas_used, status ('sent'/'success'/'failed'),
+            receipt, stored (set of commitments that emitted CommitmentStored,
+            None until the receipt is known) and sender
+        
+        Raises:
+            ValueError: If the batch is empty or a commitment is invalid format
+        """
+        if not commitments:
+            raise ValueError("Empty commitment batch")
+        for commitment in commitments:
+            if not commitment.startswith('0x') or len(commitment) != 66:
+                raise ValueError(f"Invalid commitment format. Expected 66 chars (0x...), got {len(commitment)}")
+
+        tx_hash, sender = self._send_contract_call(
+            self._encoded_call('storeCommitments', encode_store_commitments(commitments)),
+            gas=BATCH_BASE_GAS + BATCH_GAS_PER_COMMITMENT * len(commitments),
+            batch_size=len(commitments),
+        )
+        print(f"✓ Batch transaction sent ({len(commitments)} commitments): {tx_hash.hex()}")
+
+        if not wait_for_receipt:
+            return {
+                'tx_hash': Web3.to_hex(tx_hash),
+                'block_number': None,
+                'gas_used': None,
+                'status': 'sent',
+                'receipt': None,
+                'stored': None,
+                'sender': sender,
+            }
+
+        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout)
+        print(f"✓ Batch receipt confirmed at block {receipt['blockNumber']}")
+
+        return {
+            'tx_hash': Web3.to_hex(receipt['transactionHash']),
+            'block_number': receipt['blockNumber'],
+            'gas_used': receipt['gasUsed'],
+            'status': 'success' if receipt['status'] == 1 else 'failed',
+            'receipt': receipt,
+            'stored': self.stored_commitments_from_receipt(receipt),
+            'sender': sender,
+        }
+
+    def send_commitments_batches(self, batches: List[List[str]]) -> List[Dict[str, Any]]:
+        """
+        Send several storeCommitments transactions without waiting for receipts.
+        All of them are built first (nonces reserved from the lanes' allocators),
+        then signed together in the signing pool, so broadcasting only pushes
+        raw bytes.
+
+        Args:
+            batches: Lists of commitment hashes (0x-prefixed), one per transaction
+
+        Returns:
+            One dict per batch, in order: as send_commitments_batch with
+            wait_for_receipt=False, or status 'error' and error when that
+            transaction was not built or not accepted by the node
+        """
+        for commitments in batches:
+            if not commitments:
+                raise ValueError("Empty commitment batch")
+            for commitment in commitments:
+                if not commitment.startswith('0x') or len(commitment) != 66:
+                    raise ValueError(f"Invalid commitment format. Expected 66 chars (0x...), got {len(commitment)}")
+
+        fees = self.fee_oracle.fee_fields()
+        results: List[Optional[Dict[str, Any]]] = [None] * len(batches)
+        built = []  # (batch index, lane, tx)
+        lanes = []
+        try:
+            for i, commitments in enumerate(batches):
+                lane = self._acquire_lane()
+                lanes.append(lane)
+                try:
+                    tx = self._build_transaction(
+                        lane, self._encoded_call('storeCommitments', encode_store_commitments(commitments)),
+                        gas=BATCH_BASE_GAS + BATCH_GAS_PER_COMMITMENT * len(commitments),
+                        batch_size=len(commitments), fees=fees,
+                    )
+                except Exception as e:
+                    results[i] = {'status': 'error', 'error': str(e), 'sender': lane.address}
+                    continue
+                built.append((i, lane, tx))
+
+            try:
+                signed = self.signing_pool.sign_many([(lane.address, tx) for _, lane, tx in built])
+            except Exception as e:
+                for _, lane, tx in built:
+                    self._nonce_failed(lane, tx['nonce'], e)
+                raise
+
+            for (i, lane, tx), (raw_tx, _) in zip(built, signed):
+                try:
+                    tx_hash = self._broadcast_signed(lane, tx, raw_tx)
+                except Exception as e:
+                    results[i] = {'status': 'error', 'error': str(e), 'sender': lane.address}
+                    continue
+                results[i] = {
+                    'tx_hash': Web3.to_hex(tx_hash),
+                    'block_number': None,
+                    'gas_used': None,
+                    'status': 'sent',
+                    'receipt': None,
+                    'stored': None,
+                    'sender': lane.address,
+                }
+        finally:
+            for lane in lanes:
+                self._release_lane(lane)
+
+        sent = sum(1 for r in results if r['status'] == 'sent')
+        print(f"✓ {sent}/{len(batches)} batch transactions sent ({sum(map(len, batches))} commitments)")
+        return results
+
+    def anchor_merkle_root(self, root: str, leaf_count: int, wait_for_receipt: bool = True, timeout: int = 120) -> Dict[str, Any]:
+        """
+        Anchor the Merkle root of an epoch of commitments via VotingRegistry.anchorRoot.
+
+        Args:
+            root: Merkle root (0x-prefixed, see elecciones.merkle)
+            leaf_count: Number of commitments under the root
+            wait_for_receipt: If True, wait for confirmation before returning
+            timeout: Max seconds to wait for receipt
+
+        Returns:
+            Dict with tx_hash, block_number, gas_used, status ('sent'/'success'/'failed'), receipt and sender
+        """
+        if not root.startswith('0x') or len(root) != 66:
+            raise ValueError(f"Invalid root format. Expected 66 chars (0x...), got {len(root)}")
+
+        tx_hash, sender = self._send_contract_call(
+            self._encoded_call('anchorRoot', encode_anchor_root(root, leaf_count)),
+            gas=80000,  # One SSTORE plus the RootAnchored event
+        )
+        print(f"✓ Root anchor sent ({leaf_count} commitments): {tx_hash.hex()}")
+
+        if not wait_for_receipt:
+            return {
+                'tx_hash': Web3.to_hex(tx_hash),
+                'block_number': None,
+                'gas_used': None,
+                'status': 'sent',
+                'receipt': None,
+                'sender': sender,
+            }
+
+        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout)
+        print(f"✓ Root anchor confirmed at block {receipt['blockNumber']}")
+
+        return {
+            'tx_hash': Web3.to_hex(receipt['transactionHash']),
+            'block_number': receipt['blockNumber'],
+            'gas_used': receipt['gasUsed'],
+            'status': 'success' if receipt['status'] == 1 else 'failed',
+            'receipt': receipt,
+            'sender': sender,
+        }
+
+    def get_receipts_for_block(self, block_number: int, wanted: set) -> list:
+        """
+        Receipts in `block_number` whose transaction hash (0x-prefixed, lowercase)
+        is in `wanted`. Prefers eth_getBlockReceipts; falls back to the block's
+        transaction list plus one eth_getTransactionReceipt per matching hash.
+        """
+        if self._block_receipts_supported:
+            try:
+                receipts = self.w3.eth.get_block_receipts(block_number)
+                return [r for r in receipts if Web3.to_hex(r['transactionHash']).lower() in wanted]
+            except Exception as e:
+                if 'not found' not in str(e).lower() and 'not supported' not in str(e).lower():
+                    raise
+                logger.warning(f"eth_getBlockReceipts unavailable, falling back to per-tx receipts: {e}")
+                self._block_receipts_supported = False
+
+        block = self.w3.eth.get_block(block_number)
+        matches = [Web3.to_hex(h).lower() for h in block['transactions']]
+        return [self.w3.eth.get_transaction_receipt(h) for h in matches if h in wanted]
+
+    def get_block_transactions(self, block_numbers: List[int]) -> Dict[int, set]:
+        """
+        Transaction hashes (0x-prefixed, lowercase) of each canonical block in
+        `block_numbers`, fetched in one JSON-RPC batch when the node supports it.
+        Blocks the node does not return (beyond its head) map to an empty set.
+        """
+        try:
+            with self.w3.batch_requests() as batch:
+                for n in block_numbers:
+                    batch.add(self.w3.eth.get_block(n))
+                blocks = batch.execute()
+        except Exception as e:
+            logger.warning(f"JSON-RPC batch failed, fetching {len(block_numbers)} blocks one by one: {e}")
+            blocks = []
+            for n in block_numbers:
+                try:
+                    blocks.append(self.w3.eth.get_block(n))
+                except BlockNotFound:
+                    blocks.append(None)
+
+        return {
+            n: {Web3.to_hex(h).lower() for h in block['transactions']} if block else set()
+            for n, block in zip(block_numbers, blocks)
+        }
+
+    def get_transaction_location(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Where `tx_hash` currently is on the canonical chain.
+
+        Returns:
+            {'block_number': n} if mined, {'block_number': None} if the node still
+            has it in its mempool, or None if the node does not know it
+        """
+        try:
+            receipt = self.w3.eth.get_transaction_receipt(tx_hash)
+            if receipt is not None:
+                return {'block_number': receipt['blockNumber']}
+        except TransactionNotFound:
+            pass
+        try:
+            self.w3.eth.get_transaction(tx_hash)
+        except TransactionNotFound:
+            return None
+        return {'block_number': None}
+
+    def get_root_block(self, root: str) -> Optional[int]:
+        """Block where `root` was anchored, or None if it is not on-chain."""
+        block_number = self.contract.functions.getRootBlock(root).call()
+        return block_number or None
+
+    def stored_commitments_from_receipt(self, receipt) -> set:
+        """Commitments (0x-prefixed hex) that emitted CommitmentStored in `receipt`."""
+        from web3.logs import DISCARD
+        events = self.contract.events.CommitmentStored().process_receipt(receipt, errors=DISCARD)
+        return {'0x' + bytes(event['args']['commitment']).hex() for event in events}
+
+    def get_commitment_logs(self, from_block: int, to_block: int) -> List[Dict[str, Any]]:
+        """
+        CommitmentStored events emitted by the registry in [from_block, to_block].
+        Raises whatever the node returns when the range is too large; callers
+        (see elecciones.commitment_indexer) shrink the range and retry.
+
+        Returns:
+            List of dicts with commitment, block_number, sender, tx_hash and log_index
+        """
+        events = self.contract.events.CommitmentStored().get_logs(from_block=from_block, to_block=to_block)
+        return [
+            {
+                'commitment': '0x' + bytes(event['args']['commitment']).hex(),
+                'block_number': event['blockNumber'],
+                'sender': event['args']['sender'],
+                'tx_hash': Web3.to_hex(event['transactionHash']),
+                'log_index': event['logIndex'],
+            }
+            for event in events
+        ]
+
     def verify_commitment_onchain(self, commitment: str) -> Tuple[bool, int]:
         """
         Verify if a commitment exists on-chain and get its block number.
@@ -181,19 +788,130 @@ class VotingBlockchain:
             print(f"Error verifying commitment: {str(e)}")
             return (False, None)
     
+    def _thread_contract(self):
+        """
+        Contract bound to a Web3 instance owned by the calling thread.
+        JSON-RPC batching keeps its state on the provider, so parallel batches
+        need one provider per thread; they all share the same HTTP pool.
+        """
+        contract = getattr(self._thread_local, 'contract', None)
+        if contract is None:
+            w3 = Web3(self._make_provider())
+            contract = w3.eth.contract(address=self.contract_address, abi=self.contract.abi)
+            self._thread_local.contract = contract
+        return contract
+
+    def _verify_chunk(self, commitments: List[str]) -> Dict[str, Dict[str, Any]]:
+        contract = self._thread_contract()
+        fns = contract.functions
+        try:
+            with contract.w3.batch_requests() as batch:
+                for c in commitments:
+                    batch.add(fns.getCommitmentBlock(c))
+                    batch.add(fns.getCommitmentSender(c))
+                values = batch.execute()
+        except Exception as e:
+            # Node without batch support (or a failed entry): one eth_call per read
+            logger.warning(f"JSON-RPC batch failed, verifying {len(commitments)} commitments one by one: {e}")
+            values = []
+            for c in commitments:
+                values.append(fns.getCommitmentBlock(c).call())
+                values.append(fns.getCommitmentSender(c).call())
+
+        result = {}
+        for i, c in enumerate(commitments):
+            block_number, sender = values[2 * i], values[2 * i + 1]
+            # commitmentBlock is only set by _store, so a non-zero block means the commitment exists
+            result[c] = {
+                'exists': block_number != 0,
+                'block_number': block_number or None,
+                'sender': sender if block_number else None,
+            }
+        return result
+
+    def verify_commitments_bulk(self, commitments: List[str], chunk_size: int = 200,
+                                parallelism: int = 4) -> Dict[str, Dict[str, Any]]:
+        """
+        Verify many commitments with JSON-RPC batch requests instead of one
+        eth_call per read. Each chunk of `chunk_size` commitments is a single
+        HTTP request; up to `parallelism` chunks are in flight at once.
+
+        Args:
+            commitments: Keccak256 commitment hashes (0x-prefixed)
+            chunk_size: Commitments per batch request (two reads each)
+            parallelism: Concurrent batch requests
+
+        Returns:
+            Dict keyed by commitment with exists, block_number and sender
+
+        Raises:
+            ValueError: If a commitment is invalid format
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        unique = list(dict.fromkeys(commitments))
+        for commitment in unique:
+            if not commitment.startswith('0x') or len(commitment) != 66:
+                raise ValueError(f"Invalid commitment format. Expected 66 chars (0x...), got {len(commitment)}")
+
+        chunks = [unique[i:i + chunk_size] for i in range(0, len(unique), chunk_size)]
+        result = {}
+        if not chunks:
+            return result
+        with ThreadPoolExecutor(max_workers=max(1, min(parallelism, len(chunks)))) as pool:
+            for partial in pool.map(self._verify_chunk, chunks):
+                result.update(partial)
+        return result
+
     def get_account_address(self) -> str:
         """Get the server wallet public address."""
         return self.account.address
     
-    def get_balance(self) -> Dict[str, Any]:
-        """Get server wallet balance in MATIC and wei."""
-        wei_balance = self.w3.eth.get_balance(self.account.address)
+    def get_signer_addresses(self) -> List[str]:
+        """Addresses of every signer lane, primary first."""
+        return [lane.address for lane in self.lanes]
+
+    def get_balance(self, address: Optional[str] = None) -> Dict[str, Any]:
+        """Get server wallet balance in MATIC and wei (primary wallet unless `address` is given)."""
+        wei_balance = self.w3.eth.get_balance(address or self.account.address)
         matic_balance = self.w3.from_wei(wei_balance, 'ether')
         return {
             'wei': wei_balance,
             'matic': float(matic_balance)
         }
 
+    def get_balances(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Balance and load of every signer lane, keyed by address.
+        Lanes at or below min_balance_wei are skipped by submissions.
+        """
+        balances = {}
+        for lane in self.lanes:
+            balance = self.get_balance(lane.address)
+            lane.balance_wei = balance['wei']
+            balances[lane.address] = {**balance, 'in_flight': lane.load()}
+        self._balances_at = time.monotonic()
+        return balances
+
+    def refresh_balances(self, force: bool = False) -> None:
+        """
+        Re-read the signer balances if they are older than balance_ttl. Only one
+        thread refreshes at a time; the others keep using the last values, and
+        so does everyone if the RPC fails.
+        """
+        if not force and self._balances_at is not None and time.monotonic() - self._balances_at < self.balance_ttl:
+            return
+        if not self._balances_lock.acquire(blocking=False):
+            return
+        try:
+            self.get_balances()
+        except Exception as e:
+            # Retry after another TTL rather than on every send
+            self._balances_at = time.monotonic()
+            logger.warning(f"Could not refresh signer balances: {e}")
+        finally:
+            self._balances_lock.release()
+
 
 # Contract ABI (placeholder - will be replaced with actual compiled ABI)
 VOTING_REGISTRY_ABI = [
@@ -222,6 +940,55 @@ VOTING_REGISTRY_ABI = [
         "name": "CommitmentStored",
         "type": "event"
     },
+    {
+        "anonymous": False,
+        "inputs": [
+            {
+                "indexed": True,
+                "internalType": "bytes32",
+                "name": "root",
+                "type": "bytes32"
+            },
+            {
+                "indexed": False,
+                "internalType": "uint256",
+                "name": "leafCount",
+                "type": "uint256"
+            },
+            {
+                "indexed": False,
+                "internalType": "uint256",
+                "name": "blockNumber",
+                "type": "uint256"
+            },
+            {
+                "indexed": True,
+                "internalType": "address",
+                "name": "sender",
+                "type": "address"
+            }
+        ],
+        "name": "RootAnchored",
+        "type": "event"
+    },
+    {
+        "inputs": [
+            {
+                "internalType": "bytes32",
+                "name": "root",
+                "type": "bytes32"
+            },
+            {
+                "internalType": "uint256",
+                "name": "leafCount",
+                "type": "uint256"
+            }
+        ],
+        "name": "anchorRoot",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    },
     {
         "inputs": [
             {
@@ -317,6 +1084,25 @@ VOTING_REGISTRY_ABI = [
         "stateMutability": "view",
         "type": "function"
     },
+    {
+        "inputs": [
+            {
+                "internalType": "bytes32",
+                "name": "root",
+                "type": "bytes32"
+            }
+        ],
+        "name": "getRootBlock",
+        "outputs": [
+            {
+                "internalType": "uint256",
+                "name": "",
+                "type": "uint256"
+            }
+        ],
+        "stateMutability": "view",
+        "type": "function"
+    },
     {
         "inputs": [
             {
@@ -336,6 +1122,25 @@ VOTING_REGISTRY_ABI = [
         "stateMutability": "view",
         "type": "function"
     },
+    {
+        "inputs": [
+            {
+                "internalType": "bytes32",
+                "name": "",
+                "type": "bytes32"
+            }
+        ],
+        "name": "rootBlock",
+        "outputs": [
+            {
+                "internalType": "uint256",
+                "name": "",
+                "type": "uint256"
+            }
+        ],
+        "stateMutability": "view",
+        "type": "function"
+    },
     {
         "inputs": [
             {
@@ -348,6 +1153,19 @@ VOTING_REGISTRY_ABI = [
         "outputs": [],
         "stateMutability": "nonpayable",
         "type": "function"
+    },
+    {
+        "inputs": [
+            {
+                "internalType": "bytes32[]",
+                "name": "cs",
+                "type": "bytes32[]"
+            }
+        ],
+        "name": "storeCommitments",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function"
     }
 ]
 
@@ -357,20 +1175,139 @@ def create_voting_blockchain() -> VotingBlockchain:
     Factory function to create VotingBlockchain instance from environment variables.
     
     Required environment variables:
-    - BLOCKCHAIN_RPC_URL: Polygon Amoy RPC endpoint
-    - BLOCKCHAIN_PRIVATE_KEY: Server wallet private key
+    - BLOCKCHAIN_RPC_URL: Polygon Amoy RPC endpoint, or
+      BLOCKCHAIN_RPC_URLS: comma-separated endpoints, balanced with failover
+    - BLOCKCHAIN_PRIVATE_KEY: Server wallet private key, or
+      BLOCKCHAIN_PRIVATE_KEYS: comma-separated keys, one submission lane per wallet
     - VOTING_REGISTRY_ADDRESS: Deployed contract address
+
+    Optional:
+    - BLOCKCHAIN_NONCE_REDIS_URL: Redis for the shared nonce allocator
+      (falls back to CELERY_BROKER_URL)
+    - BLOCKCHAIN_CHAIN_ID: Chain id (e.g. 80002 for Amoy), skips fetching it
+    - BLOCKCHAIN_MAX_FEE_GWEI / BLOCKCHAIN_MAX_PRIORITY_FEE_GWEI: Fee ceilings
+    - BLOCKCHAIN_MIN_PRIORITY_FEE_GWEI: Priority fee floor (default 25)
+    - BLOCKCHAIN_FEE_TTL_SECONDS: How long a fee quote is reused (default 5)
+    - BLOCKCHAIN_SIGNING_PROCESSES: Processes signing batch transactions (default 0, inline)
+    - BLOCKCHAIN_SIGNER_BALANCE_TTL_SECONDS: How often signer balances are re-read (default 30)
+    - BLOCKCHAIN_MIN_SIGNER_BALANCE_GWEI: Wallets at or below this balance get no
+      new sends while another wallet has more (default 0: only empty wallets)
+    - BLOCKCHAIN_BACKEND: 'rpc' (default) or 'simulated' for the in-process
+      VotingRegistry simulator (SIMULATED_BLOCK_TIME, SIMULATED_LATENCY_MS,
+      SIMULATED_JITTER_MS, SIMULATED_FAILURE_RATE); keys and contract address
+      are then optional
     
     Returns:
         VotingBlockchain instance
     """
-    rpc_url = os.getenv('BLOCKCHAIN_RPC_URL', 'https://polygon-rpc.com')
-    private_key = os.getenv('BLOCKCHAIN_PRIVATE_KEY')
+    if os.getenv('BLOCKCHAIN_BACKEND', 'rpc') == 'simulated':
+        return _create_simulated_blockchain()
+
+    rpc_urls = [u.strip() for u in os.getenv('BLOCKCHAIN_RPC_URLS', '').split(',') if u.strip()]
+    rpc_url = rpc_urls or os.getenv('BLOCKCHAIN_RPC_URL', 'https://polygon-rpc.com')
+    private_keys = [k.strip() for k in os.getenv('BLOCKCHAIN_PRIVATE_KEYS', '').split(',') if k.strip()]
+    if not private_keys and os.getenv('BLOCKCHAIN_PRIVATE_KEY'):
+        private_keys = [os.getenv('BLOCKCHAIN_PRIVATE_KEY')]
     contract_address = os.getenv('VOTING_REGISTRY_ADDRESS')
     
-    if not private_key:
-        raise ValueError("BLOCKCHAIN_PRIVATE_KEY environment variable not set")
+    if not private_keys:
+        raise BlockchainNotConfigured("BLOCKCHAIN_PRIVATE_KEY environment variable not set")
     if not contract_address:
-        raise ValueError("VOTING_REGISTRY_ADDRESS environment variable not set")
+        raise BlockchainNotConfigured("VOTING_REGISTRY_ADDRESS environment variable not set")
     
-    return VotingBlockchain(rpc_url, private_key, contract_address, VOTING_REGISTRY_ABI)
+    # Shared nonce allocator (defaults to the Celery Redis instance)
+    nonce_redis_url = os.getenv('BLOCKCHAIN_NONCE_REDIS_URL') or os.getenv('CELERY_BROKER_URL')
+    chain_id = os.getenv('BLOCKCHAIN_CHAIN_ID')
+
+    from .fee_oracle import fee_options_from_env
+    from .tx_replacement import record_sent_transaction
+
+    return VotingBlockchain(rpc_url, private_keys, contract_address, VOTING_REGISTRY_ABI,
+                            nonce_redis_url=nonce_redis_url,
+                            chain_id=int(chain_id) if chain_id else None,
+                            fee_options=fee_options_from_env(),
+                            tx_recorder=record_sent_transaction,
+                            signing_processes=int(os.getenv('BLOCKCHAIN_SIGNING_PROCESSES', '0')),
+                            **_balance_options_from_env())
+
+
+def _balance_options_from_env() -> Dict[str, Any]:
+    """VotingBlockchain signer-balance keyword arguments from the environment."""
+    return {
+        'balance_ttl': float(os.getenv('BLOCKCHAIN_SIGNER_BALANCE_TTL_SECONDS', '30')),
+        'min_balance_wei': int(float(os.getenv('BLOCKCHAIN_MIN_SIGNER_BALANCE_GWEI', '0')) * 10**9),
+    }
+
+
+def _create_simulated_blockchain() -> VotingBlockchain:
+    """VotingBlockchain on the process-wide simulated chain (see elecciones.simulated_chain)."""
+    from .fee_oracle import fee_options_from_env
+    from .simulated_chain import (
+        SIMULATED_CHAIN_ID, SIMULATED_PRIVATE_KEY, SIMULATED_REGISTRY_ADDRESS,
+        SimulatedChainProvider, get_simulated_chain, simulated_options_from_env,
+    )
+    from .tx_replacement import record_sent_transaction
+
+    options = simulated_options_from_env()
+    contract_address = os.getenv('VOTING_REGISTRY_ADDRESS') or SIMULATED_REGISTRY_ADDRESS
+    chain = get_simulated_chain(registry_address=contract_address, **options['chain'])
+    private_keys = [k.strip() for k in os.getenv('BLOCKCHAIN_PRIVATE_KEYS', '').split(',') if k.strip()]
+
+    # The simulated chain lives in this process only, so nonces can too
+    return VotingBlockchain(
+        'simulated://', private_keys or [os.getenv('BLOCKCHAIN_PRIVATE_KEY') or SIMULATED_PRIVATE_KEY],
+        contract_address, VOTING_REGISTRY_ABI,
+        chain_id=SIMULATED_CHAIN_ID,
+        fee_options=fee_options_from_env(),
+        provider_factory=lambda: SimulatedChainProvider(chain, **options['provider']),
+        local_nonces=True,
+        tx_recorder=record_sent_transaction,
+        signing_processes=int(os.getenv('BLOCKCHAIN_SIGNING_PROCESSES', '0')),
+        **_balance_options_from_env(),
+    )
+
+
+_client_lock = threading.Lock()
+_client: Optional[VotingBlockchain] = None
+_client_pid: Optional[int] = None
+
+
+def get_voting_blockchain() -> VotingBlockchain:
+    """
+    Process-wide VotingBlockchain shared by all threads of this process.
+    Built on first use (so key derivation, contract setup and chain_id cost
+    are paid once per process) and rebuilt after a fork, so each Celery
+    worker child gets its own HTTP connection pool.
+    Call reset_voting_blockchain() after a connection error to reconnect lazily.
+    """
+    global _client, _client_pid
+    client = _client
+    if client is not None and _client_pid == os.getpid():
+        return client
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = create_voting_blockchain()
+            _client_pid = os.getpid()
+        return _client
+
+
+def reset_voting_blockchain(client: Optional[VotingBlockchain] = None) -> None:
+    """
+    Drop the cached client so the next get_voting_blockchain() reconnects.
+    If `client` is given, only drop it if it is still the cached one
+    (another thread may already have replaced it).
+    """
+    global _client, _client_pid
+    with _client_lock:
+        if client is None or _client is client:
+            _client = None
+            _client_pid = None
+
+
+def reset_voting_blockchain_on_error(client: Optional[VotingBlockchain], error: Exception) -> None:
+    """Drop the cached client if `error` means the RPC connection is broken."""
+    import requests
+
+    if isinstance(error, (ConnectionError, requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        logger.warning(f"RPC connection error, blockchain client will be rebuilt: {error}")
+        reset_voting_blockchain(client)
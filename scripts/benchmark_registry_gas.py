@@ -0,0 +1,148 @@
+"""
+Compare the gas of VotingRegistry and VotingRegistryPacked on a local EVM.
+
+Both contracts are compiled with solc and deployed on eth-tester (py-evm);
+the script reports gas per single vote, per batch and per vote within a
+batch, and checks that the packed variant answers the VOTING_REGISTRY_ABI
+views like the original.
+
+Requirements (not needed by the application):
+    pip install py-solc-x "eth-tester[py-evm]"
+
+Usage (from the project root):
+    python scripts/benchmark_registry_gas.py [--solc 0.8.24] [--votos 50]
+"""
+
+import argparse
+import os
+import secrets
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web3 import Web3
+
+from elecciones.web3_utils import VOTING_REGISTRY_ABI
+
+CONTRACTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'contracts')
+CONTRACTS = [
+    ('VotingRegistry', 'VotingRegistry.sol'),
+    ('VotingRegistryPacked', 'VotingRegistryPacked.sol'),
+]
+BATCH_SIZES = (1, 10, 100)
+
+
+def compile_contracts(solc_version):
+    import solcx
+
+    if solc_version not in [str(v) for v in solcx.get_installed_solc_versions()]:
+        solcx.install_solc(solc_version)
+
+    compiled = {}
+    for name, filename in CONTRACTS:
+        output = solcx.compile_files(
+            [os.path.join(CONTRACTS_DIR, filename)],
+            output_values=['abi', 'bin'],
+            solc_version=solc_version,
+            optimize=True,
+            optimize_runs=200,
+        )
+        contract = next(v for k, v in output.items() if k.endswith(f':{name}'))
+        compiled[name] = contract
+    return compiled
+
+
+def deploy(w3, compiled):
+    factory = w3.eth.contract(abi=compiled['abi'], bytecode=compiled['bin'])
+    receipt = w3.eth.wait_for_transaction_receipt(factory.constructor().transact())
+    # Talk to every deployment through the application's ABI
+    return w3.eth.contract(address=receipt['contractAddress'], abi=VOTING_REGISTRY_ABI), receipt['gasUsed']
+
+
+def gas_of(w3, call):
+    return w3.eth.wait_for_transaction_receipt(call.transact())['gasUsed']
+
+
+def random_commitment():
+    return '0x' + secrets.token_hex(32)
+
+
+def measure(w3, contract, votes):
+    results = {}
+    single = [gas_of(w3, contract.functions.storeCommitment(random_commitment())) for _ in range(votes)]
+    results['storeCommitment'] = sum(single) / len(single)
+
+    for size in BATCH_SIZES:
+        cs = [random_commitment() for _ in range(size)]
+        results[f'storeCommitments x{size}'] = gas_of(w3, contract.functions.storeCommitments(cs))
+        # Resubmitting the same batch: every commitment is skipped
+        results[f'storeCommitments x{size} (duplicates)'] = gas_of(w3, contract.functions.storeCommitments(cs))
+
+    results['anchorRoot'] = gas_of(w3, contract.functions.anchorRoot(random_commitment(), 1024))
+    return results
+
+
+def check_views(w3, contracts):
+    """Same answers from both deployments for stored and unknown commitments."""
+    stored = random_commitment()
+    unknown = random_commitment()
+    answers = []
+    for contract in contracts:
+        gas_of(w3, contract.functions.storeCommitment(stored))
+        block = w3.eth.block_number
+        sender = w3.eth.default_account
+        for c, expected_block, expected_sender in ((stored, block, sender), (unknown, 0, '0x' + '00' * 20)):
+            assert contract.functions.hasCommitment(c).call() == (expected_block != 0)
+            assert contract.functions.committed(c).call() == (expected_block != 0)
+            assert contract.functions.getCommitmentBlock(c).call() == expected_block
+            assert contract.functions.commitmentBlock(c).call() == expected_block
+            assert contract.functions.getCommitmentSender(c).call().lower() == expected_sender.lower()
+            assert contract.functions.commitmentSender(c).call().lower() == expected_sender.lower()
+        try:
+            contract.functions.storeCommitment(stored).call()
+            answers.append(None)
+        except Exception as e:
+            answers.append('Commitment already exists' in str(e))
+    assert all(answers), f"duplicate storeCommitment must revert with the same reason: {answers}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--solc', default='0.8.24', help='solc version')
+    parser.add_argument('--votos', type=int, default=50, help='storeCommitment calls averaged')
+    args = parser.parse_args()
+
+    try:
+        from web3 import EthereumTesterProvider
+        import eth_tester  # noqa: F401
+        import solcx  # noqa: F401
+    except ImportError as e:
+        sys.exit(f"Missing benchmark dependency ({e}): pip install py-solc-x \"eth-tester[py-evm]\"")
+
+    compiled = compile_contracts(args.solc)
+    w3 = Web3(EthereumTesterProvider())
+    w3.eth.default_account = w3.eth.accounts[0]
+
+    contracts, results, deploy_gas = [], [], []
+    for name, _ in CONTRACTS:
+        contract, gas = deploy(w3, compiled[name])
+        contracts.append(contract)
+        deploy_gas.append(gas)
+        results.append(measure(w3, contract, args.votos))
+
+    check_views(w3, contracts)
+    print("OK: VotingRegistryPacked answers the VOTING_REGISTRY_ABI views like VotingRegistry\n")
+
+    original, packed = results
+    print(f"{'':40} {'VotingRegistry':>15} {'Packed':>12} {'saving':>8}")
+    print(f"{'deployment':40} {deploy_gas[0]:>15,} {deploy_gas[1]:>12,} {1 - deploy_gas[1] / deploy_gas[0]:>8.1%}")
+    for key in original:
+        print(f"{key:40} {original[key]:>15,.0f} {packed[key]:>12,.0f} {1 - packed[key] / original[key]:>8.1%}")
+    print()
+    for size in BATCH_SIZES:
+        key = f'storeCommitments x{size}'
+        print(f"{'gas per vote, batch of ' + str(size):40} {original[key] / size:>15,.0f} {packed[key] / size:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
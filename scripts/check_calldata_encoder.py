@@ -0,0 +1,105 @@
+"""
+Check that the precompiled registry calldata in elecciones.web3_utils is
+byte-identical to web3's ABI encoding, and compare their cost.
+
+Usage (from the project root):
+    python scripts/check_calldata_encoder.py
+"""
+
+import os
+import secrets
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eth_account import Account
+from web3 import Web3
+
+from elecciones.web3_utils import (
+    VOTING_REGISTRY_ABI, _EncodedCall, encode_anchor_root, encode_store_commitment,
+    encode_store_commitments,
+)
+
+ADDRESS = '0x5FbDB2315678afecb367f032d93F642f64180aa3'
+
+
+def random_commitment():
+    return '0x' + secrets.token_hex(32)
+
+
+def check_calldata(contract):
+    cases = 0
+    for _ in range(200):
+        c = random_commitment()
+        assert encode_store_commitment(c) == contract.encode_abi('storeCommitment', args=[c]), c
+        cases += 1
+    # Uppercase hex and edge values
+    for c in ['0x' + '00' * 32, '0x' + 'ff' * 32, '0x' + secrets.token_hex(32).upper()]:
+        assert encode_store_commitment(c) == contract.encode_abi('storeCommitment', args=[c]), c
+        cases += 1
+
+    for size in (0, 1, 2, 3, 31, 100, 500):
+        cs = [random_commitment() for _ in range(size)]
+        assert encode_store_commitments(cs) == contract.encode_abi('storeCommitments', args=[cs]), size
+        cases += 1
+
+    for leaf_count in (0, 1, 1024, 2 ** 64, 2 ** 256 - 1):
+        root = random_commitment()
+        expected = contract.encode_abi('anchorRoot', args=[root, leaf_count])
+        assert encode_anchor_root(root, leaf_count) == expected, leaf_count
+        cases += 1
+    return cases
+
+
+def check_signed_transactions(w3, contract):
+    account = Account.create()
+    base = {'from': account.address, 'nonce': 7, 'gas': 200000, 'chainId': 80002}
+    fee_styles = [
+        {'maxFeePerGas': 90 * 10 ** 9, 'maxPriorityFeePerGas': 30 * 10 ** 9},
+        {'gasPrice': 40 * 10 ** 9},
+    ]
+    cs = [random_commitment() for _ in range(10)]
+    calls = [
+        (contract.functions.storeCommitment(cs[0]), 'storeCommitment', encode_store_commitment(cs[0])),
+        (contract.functions.storeCommitments(cs), 'storeCommitments', encode_store_commitments(cs)),
+        (contract.functions.anchorRoot(cs[1], 10), 'anchorRoot', encode_anchor_root(cs[1], 10)),
+    ]
+    cases = 0
+    for fees in fee_styles:
+        for contract_fn, fn_name, data in calls:
+            fields = {**base, **fees}
+            expected = contract_fn.build_transaction(dict(fields))
+            built = _EncodedCall(w3, contract.address, fn_name, data).build_transaction(dict(fields))
+            assert built == expected, (fn_name, built, expected)
+            assert (account.sign_transaction(built).raw_transaction
+                    == account.sign_transaction(expected).raw_transaction), fn_name
+            cases += 1
+    return cases
+
+
+def benchmark(contract, size, rounds=300):
+    cs = [random_commitment() for _ in range(size)]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        contract.encode_abi('storeCommitments', args=[cs])
+    web3_ms = (time.perf_counter() - start) * 1000 / rounds
+    start = time.perf_counter()
+    for _ in range(rounds):
+        encode_store_commitments(cs)
+    fast_ms = (time.perf_counter() - start) * 1000 / rounds
+    print(f"storeCommitments x{size:<4} web3 {web3_ms:8.3f} ms   precompiled {fast_ms:8.3f} ms")
+
+
+def main():
+    w3 = Web3()
+    contract = w3.eth.contract(address=ADDRESS, abi=VOTING_REGISTRY_ABI)
+
+    cases = check_calldata(contract) + check_signed_transactions(w3, contract)
+    print(f"OK: {cases} cases byte-identical to web3")
+    for size in (1, 100, 500):
+        benchmark(contract, size)
+
+
+if __name__ == '__main__':
+    main()
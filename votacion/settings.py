@@ -160,6 +160,26 @@ AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
 ]
 
+# Caché compartida entre procesos (boleta de cada evento, cursor del barrido de votos).
+# Sin CACHE_REDIS_URL cada proceso usa su propia caché en memoria
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', '')
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+            'KEY_PREFIX': 'votacion',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+# Segundos que se guarda la boleta de un evento (se invalida además al cambiar sus candidatos)
+BOLETA_CACHE_SEGUNDOS = int(os.getenv('BOLETA_CACHE_SEGUNDOS', '3600'))
+
 # Celery Configuration
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
@@ -170,6 +190,116 @@ CELERY_TIMEZONE = 'UTC'
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes hard limit
 
+# Blockchain: modo de envío de votos
+# 'sync'  -> la vista espera el recibo on-chain antes de guardar el voto (comportamiento original)
+# 'async' -> el voto se guarda como 'pending' y Celery lo envía a la blockchain
+# 'batch' -> el voto se guarda como 'pending' y drain_pending_votes lo envía en lotes
+BLOCKCHAIN_VOTE_SUBMIT_MODE = os.getenv('BLOCKCHAIN_VOTE_SUBMIT_MODE', 'sync')
+
+# Modo 'async': la vista deja el id del voto en una lista de Redis (BLOCKCHAIN_VOTE_QUEUE_REDIS_URL,
+# o el broker de Celery) y drain_vote_queue los envía por lotes; sin Redis, una tarea por voto
+BLOCKCHAIN_VOTE_QUEUE = os.getenv('BLOCKCHAIN_VOTE_QUEUE', '1') == '1'
+
+# Lotes de storeCommitments: tamaño máximo y espera máxima del voto más antiguo
+BLOCKCHAIN_BATCH_SIZE = int(os.getenv('BLOCKCHAIN_BATCH_SIZE', '100'))
+BLOCKCHAIN_BATCH_WINDOW_SECONDS = int(os.getenv('BLOCKCHAIN_BATCH_WINDOW_SECONDS', '10'))
+
+# Eventos con modo_anclaje='merkle': votos por época y espera máxima antes de cerrarla
+MERKLE_EPOCH_SIZE = int(os.getenv('MERKLE_EPOCH_SIZE', '1024'))
+MERKLE_EPOCH_WINDOW_SECONDS = int(os.getenv('MERKLE_EPOCH_WINDOW_SECONDS', '60'))
+
+# Vigilante de recibos: un solo proceso sigue los bloques nuevos y resuelve todas las
+# transacciones 'sent'; los envíos de Celery ya no esperan su propio recibo.
+# Desactivado por defecto: al activarlo debe correr Celery beat (watch_receipts),
+# si no los votos se quedan en 'sent'
+BLOCKCHAIN_RECEIPT_WATCHER = os.getenv('BLOCKCHAIN_RECEIPT_WATCHER', '0') == '1'
+BLOCKCHAIN_WATCHER_MAX_BLOCKS = int(os.getenv('BLOCKCHAIN_WATCHER_MAX_BLOCKS', '200'))
+BLOCKCHAIN_WATCHER_LOOKBACK_BLOCKS = int(os.getenv('BLOCKCHAIN_WATCHER_LOOKBACK_BLOCKS', '200'))
+BLOCKCHAIN_WATCHER_LAG_BLOCKS = int(os.getenv('BLOCKCHAIN_WATCHER_LAG_BLOCKS', '2'))
+
+# Índice local de eventos CommitmentStored: bloque de despliegue del contrato
+# (inicio de la primera sincronización) y rango máximo por consulta eth_getLogs
+VOTING_REGISTRY_DEPLOY_BLOCK = int(os.getenv('VOTING_REGISTRY_DEPLOY_BLOCK', '0'))
+COMMITMENT_INDEX_MAX_RANGE = int(os.getenv('COMMITMENT_INDEX_MAX_RANGE', '2000'))
+
+# Reemplazo de transacciones atascadas: las que siguen sin minarse tras N bloques se
+# reenvían con el mismo nonce y tarifas un X% más altas, hasta un múltiplo de las originales.
+# Desactivado por defecto (gasta más en tarifas); al activarlo debe correr Celery beat
+# (replace_stuck_transactions) y hace falta BLOCKCHAIN_RECEIPT_WATCHER=1: el reemplazo solo
+# cambia Voto.tx_hash y es el vigilante quien sigue los hashes anteriores por si se mina el
+# original (sin él el voto se queda en 'sent'; el check elecciones.E001 lo impide)
+BLOCKCHAIN_TX_REPLACEMENT = os.getenv('BLOCKCHAIN_TX_REPLACEMENT', '0') == '1'
+BLOCKCHAIN_STUCK_TX_BLOCKS = int(os.getenv('BLOCKCHAIN_STUCK_TX_BLOCKS', '10'))
+BLOCKCHAIN_FEE_BUMP_PERCENT = float(os.getenv('BLOCKCHAIN_FEE_BUMP_PERCENT', '15'))
+BLOCKCHAIN_MAX_FEE_ESCALATION = float(os.getenv('BLOCKCHAIN_MAX_FEE_ESCALATION', '3'))
+
+# Confirmaciones: los votos 'success' pasan a 'confirmed' cuando su bloque tiene N bloques
+# encima; los que una reorganización dejó fuera de la cadena se vuelven a encolar
+BLOCKCHAIN_CONFIRMATION_DEPTH = int(os.getenv('BLOCKCHAIN_CONFIRMATION_DEPTH', '12'))
+BLOCKCHAIN_CONFIRMATION_MAX_BLOCKS = int(os.getenv('BLOCKCHAIN_CONFIRMATION_MAX_BLOCKS', '200'))
+
+# Barrido de conciliación: los votos 'pending', 'sent', 'failed' o 'simulated' con más de
+# N segundos se comprueban contra la cadena y se corrigen o reenvían (hasta M filas por estado
+# y pasada); se avisa cuando el voto sin resolver más antiguo supera el SLA
+BLOCKCHAIN_SWEEPER_GRACE_SECONDS = int(os.getenv('BLOCKCHAIN_SWEEPER_GRACE_SECONDS', '300'))
+BLOCKCHAIN_SWEEPER_MAX_ROWS = int(os.getenv('BLOCKCHAIN_SWEEPER_MAX_ROWS', '5000'))
+BLOCKCHAIN_VOTE_SLA_SECONDS = int(os.getenv('BLOCKCHAIN_VOTE_SLA_SECONDS', '900'))
+
+# Conteo de votos: fragmentos por candidato (ResultadoShard) en los que suman los votos;
+# consolidate_results recuenta en Resultado los votos nuevos desde la marca de cada evento
+RESULTADOS_SHARDS = int(os.getenv('RESULTADOS_SHARDS', '16'))
+# Los votos más recientes que esto se dejan para el siguiente recuento (su time_stamp
+# se fija antes de que su transacción confirme)
+RESULTADOS_MARGEN_SEGUNDOS = int(os.getenv('RESULTADOS_MARGEN_SEGUNDOS', '60'))
+
+# Fases de los eventos (programado / abierto / cerrado): advance_event_phases las avanza
+# cada tantos segundos y programa la apertura y el cierre exactos que caen antes de la siguiente pasada
+EVENTOS_FASE_INTERVALO_SEGUNDOS = int(os.getenv('EVENTOS_FASE_INTERVALO_SEGUNDOS', '30'))
+
+# Tareas periódicas (celery -A votacion beat)
+CELERY_BEAT_SCHEDULE = {
+    'drain-pending-votes': {
+        'task': 'elecciones.tasks.drain_pending_votes',
+        'schedule': 5.0,
+    },
+    'drain-vote-queue': {
+        'task': 'elecciones.tasks.drain_vote_queue',
+        'schedule': 2.0,
+    },
+    'anchor-merkle-epochs': {
+        'task': 'elecciones.tasks.anchor_merkle_epochs',
+        'schedule': 15.0,
+    },
+    'watch-receipts': {
+        'task': 'elecciones.tasks.watch_receipts',
+        'schedule': 3.0,
+    },
+    'sync-commitment-index': {
+        'task': 'elecciones.tasks.sync_commitment_index',
+        'schedule': 10.0,
+    },
+    'replace-stuck-transactions': {
+        'task': 'elecciones.tasks.replace_stuck_transactions',
+        'schedule': 15.0,
+    },
+    'confirm-votes': {
+        'task': 'elecciones.tasks.confirm_votes',
+        'schedule': 10.0,
+    },
+    'sweep-votes': {
+        'task': 'elecciones.tasks.sweep_votes',
+        'schedule': 60.0,
+    },
+    'consolidate-results': {
+        'task': 'elecciones.tasks.consolidate_results',
+        'schedule': 60.0,
+    },
+    'advance-event-phases': {
+        'task': 'elecciones.tasks.advance_event_phases',
+        'schedule': float(EVENTOS_FASE_INTERVALO_SEGUNDOS),
+    },
+}
+
 # Email Configuration
 # Producción con Gmail - ACTIVADO
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
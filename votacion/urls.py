@@ -35,6 +35,7 @@ urlpatterns = [
     path('evento/<str:evento_id>/resultados/', views.resultados_evento, name='resultados_evento'),
     path('voto-confirmado/<str:evento_id>/', views.voto_confirmado, name='voto_confirmado'),
     path('voto-status/<str:evento_id>/', views.voto_status, name='voto_status'),
+    path('admin-panel/estado-rpc/', views.estado_rpc, name='estado_rpc'),
     # Django admin
     path('admin/', admin.site.urls),
 ]